@@ -0,0 +1,74 @@
+"""
+Benchmark IVF approximate memory search against exact search.
+
+Reports recall@5 and per-query latency for a sweep of nprobe values, which is
+the knob exposed as AgentSettings.memory_ann_nprobe. Sentence embeddings are
+far from uniformly random, so the synthetic memories are drawn around a set
+of topic centres rather than from a plain Gaussian.
+
+Usage (from blitz_cli/):
+    PYTHONPATH=src python benchmarks/bench_ann.py [--sizes 10000 100000] [--nprobe 1 4 8 16 32]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from blitzcoder.memory.ann import IVFVectorIndex
+
+DIMS = 768
+K = 5
+TOPICS = 500
+
+
+def clustered(rng, centres, count, noise):
+    picks = rng.integers(len(centres), size=count)
+    return (centres[picks] + noise * rng.standard_normal((count, DIMS))).astype(np.float32)
+
+
+def per_query_ms(search, queries):
+    start = time.perf_counter()
+    for query in queries:
+        search(query, K)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def run(size: int, nprobes, queries: int):
+    rng = np.random.default_rng(size)
+    centres = rng.standard_normal((TOPICS, DIMS))
+    vectors = clustered(rng, centres, size, noise=1.0)
+    query_vectors = clustered(rng, centres, queries, noise=1.0)
+
+    index = IVFVectorIndex(DIMS, capacity=size, min_size=0)
+    start = time.perf_counter()
+    index.add_many([f"memory-{i}" for i in range(size)], vectors, range(size))
+    build_s = time.perf_counter() - start
+
+    exact_ms = per_query_ms(index.exact_search, query_vectors)
+    print(
+        f"{size:>8,} memories | {len(index.centroids)} lists | "
+        f"load+train {build_s:5.1f} s | exact {exact_ms:7.2f} ms/query"
+    )
+    for nprobe in nprobes:
+        index.nprobe = nprobe
+        recall = index.recall(query_vectors, K)
+        ann_ms = per_query_ms(index.search, query_vectors)
+        print(
+            f"{'':>10} nprobe {nprobe:>3} | recall@{K} {recall:5.3f} | "
+            f"{ann_ms:7.2f} ms/query | {exact_ms / ann_ms:5.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.nprobe, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the LLMModelManager create/get path.
+
+Times building a fresh manager (what every convenience helper used to do)
+against fetching the process-wide one, the first create_model for a
+configuration (which builds the provider client) against repeated ones
+(cache hits), and get_model lookups with a full client cache. Clients are
+created with a dummy API key and never called, so no network is used.
+
+Usage (from blitz_cli/):
+    PYTHONPATH=.:src python benchmarks/bench_model_manager.py [--repeat 1000] [--model llama3-8b-8192]
+"""
+
+import argparse
+import time
+
+from models.llm_model import (
+    LLMModelManager,
+    ModelConfig,
+    Provider,
+    get_model_manager,
+)
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--provider", default="groq", choices=[p.value for p in Provider])
+    parser.add_argument("--model", default="llama3-8b-8192")
+    args = parser.parse_args()
+
+    config = ModelConfig(
+        provider=Provider(args.provider), model_name=args.model, api_key="bench-dummy-key"
+    )
+
+    fresh_us = per_call_us(lambda: LLMModelManager().list_available_models(), 20)
+    shared_us = per_call_us(lambda: get_model_manager().list_available_models(), args.repeat)
+    print(
+        f"manager + registry | new {fresh_us:9.1f} us | "
+        f"shared {shared_us:7.1f} us | {fresh_us / shared_us:6.0f}x"
+    )
+
+    manager = get_model_manager()
+    start = time.perf_counter()
+    manager.create_model("bench", custom_config=config)
+    cold_us = (time.perf_counter() - start) * 1e6
+    warm_us = per_call_us(
+        lambda: manager.create_model("bench", custom_config=config), args.repeat
+    )
+    print(
+        f"create_model       | cold {cold_us:8.1f} us | "
+        f"warm   {warm_us:7.1f} us | {cold_us / warm_us:6.0f}x"
+    )
+
+    for i in range(manager.max_cached_models - 1):
+        other = config.model_copy(update={"model_name": f"{args.model}-{i}"})
+        manager.create_model(f"bench-{i}", custom_config=other)
+    get_us = per_call_us(lambda: manager.get_model("bench"), args.repeat)
+    print(f"get_model          | {len(manager.models)} cached clients | {get_us:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark quantized memory vectors: footprint, recall@5 and latency.
+
+Compares float16 and int8 VectorIndex storage against the float32 index,
+with and without re-ranking the top `rerank` x k candidates at full
+precision (what SqliteMemoryStore does with the float32 vectors it keeps on
+disk). Memories are drawn around topic centres, like real sentence
+embeddings, so near neighbours are genuinely close and ranking is sensitive
+to precision.
+
+Usage (from blitz_cli/):
+    PYTHONPATH=src python benchmarks/bench_quantized.py [--sizes 10000 100000] [--rerank 4]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from blitzcoder.memory.vector_index import VectorIndex
+
+DIMS = 768
+K = 5
+TOPICS = 500
+
+
+def build(dtype, keys, vectors):
+    index = VectorIndex(DIMS, capacity=len(keys), dtype=dtype)
+    index.add_many(keys, vectors, range(len(keys)))
+    return index
+
+
+def rerank(hits, full, query, k):
+    rows = np.array([int(key) for key, _ in hits])
+    scores = full[rows] @ query
+    order = np.argsort(-scores)[:k]
+    return [hits[i][0] for i in order]
+
+
+def run(size: int, queries: int, factor: int):
+    rng = np.random.default_rng(size)
+    centres = rng.standard_normal((TOPICS, DIMS))
+    vectors = (
+        centres[rng.integers(TOPICS, size=size)] + rng.standard_normal((size, DIMS))
+    ).astype(np.float32)
+    query_vectors = (
+        centres[rng.integers(TOPICS, size=queries)] + rng.standard_normal((queries, DIMS))
+    ).astype(np.float32)
+    keys = [str(i) for i in range(size)]
+    full = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized_queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    reference = build("float32", keys, vectors)
+    truth = [{key for key, _ in reference.search(q, K)} for q in query_vectors]
+    print(f"{size:,} memories, {DIMS} dims")
+    for dtype in ("float32", "float16", "int8"):
+        index = reference if dtype == "float32" else build(dtype, keys, vectors)
+        start = time.perf_counter()
+        results = [[key for key, _ in index.search(q, K)] for q in query_vectors]
+        plain_ms = (time.perf_counter() - start) / queries * 1e3
+        plain_recall = np.mean([len(truth[i] & set(r)) / K for i, r in enumerate(results)])
+
+        start = time.perf_counter()
+        reranked = [
+            rerank(index.search(q, K * factor), full, nq, K)
+            for q, nq in zip(query_vectors, normalized_queries)
+        ]
+        rerank_ms = (time.perf_counter() - start) / queries * 1e3
+        rerank_recall = np.mean([len(truth[i] & set(r)) / K for i, r in enumerate(reranked)])
+
+        print(
+            f"  {dtype:>7} | {index.nbytes / 2**20:7.1f} MiB "
+            f"({index.nbytes / reference.nbytes:4.0%}) | "
+            f"recall@{K} {plain_recall:5.3f} in {plain_ms:6.2f} ms | "
+            f"re-ranked x{factor}: {rerank_recall:5.3f} in {rerank_ms:6.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--rerank", type=int, default=4)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.rerank)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark memory search: per-item Python scoring vs. VectorIndex.
+
+The baseline mirrors what a store does without a vector index: walk every
+memory, compute its cosine similarity to the query, then sort all of them.
+VectorIndex scores the whole namespace with one matrix-vector product and
+picks the top k with argpartition.
+
+Usage (from blitz_cli/):
+    PYTHONPATH=src python benchmarks/bench_vector_search.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from blitzcoder.memory.vector_index import VectorIndex
+
+DIMS = 768
+K = 5
+
+
+def python_loop_search(items, query, k):
+    query_norm = math.sqrt(sum(q * q for q in query))
+    scored = []
+    for key, vector in items:
+        dot = float(np.dot(vector, query))
+        scored.append((dot / (np.linalg.norm(vector) * query_norm), key))
+    scored.sort(reverse=True)
+    return [key for _, key in scored[:k]]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(size: int, queries: int, skip_baseline: bool):
+    rng = np.random.default_rng(size)
+    vectors = rng.standard_normal((size, DIMS), dtype=np.float32)
+    keys = [f"memory-{i}" for i in range(size)]
+    query_vectors = rng.standard_normal((queries, DIMS), dtype=np.float32)
+
+    index = VectorIndex(DIMS)
+    start = time.perf_counter()
+    for key, vector in zip(keys, vectors):
+        index.add(key, vector)
+    append_us = (time.perf_counter() - start) / size * 1e6
+
+    index_s, _ = timed(lambda: [index.search(q, K) for q in query_vectors], 3)
+    index_ms = index_s / queries * 1e3
+
+    line = (
+        f"{size:>8,} | append {append_us:6.1f} us/item | "
+        f"index {index_ms:8.3f} ms/query | matrix {index.nbytes / 2**20:7.1f} MiB"
+    )
+    if not skip_baseline:
+        items = list(zip(keys, vectors))
+        loop_s, _ = timed(
+            lambda: [python_loop_search(items, q, K) for q in query_vectors[:3]], 1
+        )
+        loop_ms = loop_s / 3 * 1e3
+        # Both must return the same top k.
+        for q in query_vectors[:3]:
+            assert python_loop_search(items, q, K) == [key for key, _ in index.search(q, K)]
+        line += f" | python loop {loop_ms:9.2f} ms/query | speedup {loop_ms / index_ms:6.0f}x"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    print(f"top-{K} cosine search, {DIMS} dims")
+    for size in args.sizes:
+        run(size, args.queries, args.skip_baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -89,7 +89,53 @@ class AgentSettings(BaseSettings):
 
     # Recursion and memory
     recursion_limit: int = 100
-    memory_size: int = 1000
+    memory_size: int = 1000  # Max memories kept per user; extras are evicted
+    memory_eviction_policy: str = "lru"  # "lru", "lowest_score" or "age"
+    memory_dedup_threshold: float = 0.95  # Drop new memories this similar to an old one
+    memory_recency_half_life_days: float = 30.0
+    memory_recency_weight: float = 0.3
+
+    # Approximate (IVF) memory search for large namespaces. memory_ann_nprobe is
+    # the recall/latency knob: more probed lists = higher recall, slower search.
+    memory_ann_enabled: bool = False
+    memory_ann_nprobe: int = 8
+    memory_ann_min_size: int = 10000
+
+    # In-memory vector precision: "float32", "float16" or "int8". Quantized
+    # indexes re-score memory_rerank_factor x top-k candidates at float32.
+    memory_vector_dtype: str = "float32"
+    memory_rerank_factor: int = 4
+
+    # Memory retrieval: BM25 share of the fused score, and how many prompt tokens
+    # recalled memories may take (picked by MMR; lower lambda = more diverse).
+    memory_lexical_weight: float = 0.3
+    memory_context_token_budget: int = 800
+    memory_mmr_lambda: float = 0.7
+
+    # Chat threads are checkpointed to disk (resumable with `chat --resume`);
+    # only this many of the newest checkpoints are kept per thread.
+    checkpoint_keep_last: int = 10
+
+    # Conversation history sent to the model: the last history_keep_turns turns
+    # stay verbatim, older tool outputs become stubs and the oldest turns are
+    # summarized once the estimate (per provider tokenizer) passes the budget.
+    history_token_budget: int = 32000
+    history_keep_turns: int = 3
+    history_token_provider: str = "google"
+
+    # Tool results longer than this are cut to head + tail + summary; the full
+    # output is kept on disk (up to tool_output_store_mb) for read_tool_output.
+    tool_output_max_chars: int = 8000
+    tool_output_store_mb: int = 256
+
+    # Model calls share one token bucket per provider model. The rate halves
+    # on each 429 (honouring the provider's retry delay) and climbs back on
+    # success; llm_rate_limit_burst calls may go out back to back.
+    llm_requests_per_minute: float = 60.0
+    llm_rate_limit_burst: int = 4
+
+    # Files of a scaffolded project generated at once (still under the rate limit)
+    scaffold_max_workers: int = 4
 
     # API keys (can be loaded from env)
     groq_api_key: Optional[str] = None
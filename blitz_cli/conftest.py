@@ -0,0 +1,6 @@
+"""Shared test setup: the package is imported from src/, uninstalled"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
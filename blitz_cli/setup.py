@@ -33,12 +33,14 @@ setup(
         "click>=8.1.8",
         "click-help-colors>=0.9.4",
         "rich>=14.0.0",
+        "numpy>=1.22",
+        "zstandard>=0.21",
         "langfuse>=3.0.5",
     ],
     python_requires=">=3.9",
     entry_points={
         "console_scripts": [
-            "blitzcoder=blitzcoder.cli.cli_coder:cli",
+            "blitzcoder=blitzcoder.cli.main:cli",
         ]
     },
     classifiers=[
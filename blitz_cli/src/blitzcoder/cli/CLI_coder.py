@@ -1,30 +1,13 @@
 import os
-import uuid
-import click
-from rich.console import Console,Group
-from rich.panel import Panel
-from rich.prompt import Prompt
-from rich.markdown import Markdown
-from rich.progress import Progress, SpinnerColumn, BarColumn, TimeElapsedColumn
-
-from langgraph.graph import StateGraph, START, END, MessagesState
-from langgraph.store.memory import InMemoryStore
-from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.store.base import BaseStore
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.runnables import RunnableConfig
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-import os
 import re
 import time
 import uuid
 import traceback
 import subprocess
 import threading
-from typing import List
+from typing import ClassVar, Iterator, List
 import json
+from datetime import datetime, timezone
 
 # from langfuse.langchain import CallbackHandler
 # from langfuse import Langfuse
@@ -32,25 +15,18 @@ import json
 from rich.console import Console
 from rich.tree import Tree
 from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.syntax import Syntax
+from rich.prompt import Prompt
 from rich.progress import Progress, SpinnerColumn, BarColumn, TimeElapsedColumn
-from rich.text import Text
-from rich.table import Table
-from rich.live import Live
 
 
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph, START, END, MessagesState
-from langgraph.store.memory import InMemoryStore
-from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.prebuilt import ToolNode
 from langgraph.prebuilt import tools_condition
 from langgraph.store.base import BaseStore
-from langgraph.types import Command, interrupt
 
 
 from langchain.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, AIMessageChunk
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from dotenv import load_dotenv
@@ -61,9 +37,72 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 
 
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_huggingface import HuggingFaceEmbeddings
 
-from e2b_code_interpreter import Sandbox
+from .ui import (
+    LiveResponse,
+    console,
+    print_welcome_banner,
+    show_success,
+    show_error,
+    show_info,
+    print_agent_response,
+    print_turn_summary,
+    show_code,
+    build_rich_tree,
+    simulate_progress,
+)
+from blitzcoder.llm import (
+    BACKGROUND,
+    ResumableStreamMixin,
+    get_llm_pool,
+    in_lane,
+    llm_lane,
+)
+from blitzcoder.llm.rate_limit import wait_retry_after
+from blitzcoder.llm.streaming import STREAM_RESTART
+from blitzcoder.llm.structured import (
+    StructuredOutputError,
+    invoke_structured,
+    repair_structured,
+    structured_generation_config,
+)
+from blitzcoder.memory import CappedToolNode
+from blitzcoder.memory.history import message_text
+from blitzcoder.scaffold import (
+    COMPLETE,
+    DEFAULT_MAX_WORKERS,
+    FAILED,
+    MANIFEST_NAME,
+    MAX_PROJECT_FILES,
+    PENDING,
+    ArchitecturePlan,
+    FileGenerationEngine,
+    FileJob,
+    FileSpec,
+    PlanStreamParser,
+    ProjectStructure,
+    ScaffoldManifest,
+    content_hash,
+    extract_signatures,
+    plan_jobs,
+    stream_plan_jobs,
+)
+from blitzcoder.settings import get_setting
+from blitzcoder.telemetry import (
+    TelemetryCallbackHandler,
+    get_tracer,
+    span,
+    summarize_spans,
+)
+
+from .memory import (
+    get_checkpointer,
+    get_history_manager,
+    get_semantic_memory_store,
+    get_tool_output_store,
+    retrieve_context_memories,
+    search_memories,
+)
 
 try:
     from google.api_core import exceptions as google_exceptions
@@ -87,14 +126,20 @@ RETRYABLE_EXCEPTIONS = (
     google_exceptions.Aborted,               # Other transient connection errors
 )
 
-class RetryingChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+class RetryingChatGoogleGenerativeAI(ResumableStreamMixin, ChatGoogleGenerativeAI):
     """
     A ChatGoogleGenerativeAI subclass that automatically retries API calls
     on specific, transient errors using an exponential backoff strategy.
+    A 429 also pauses the shared rate limiter, so concurrent calls to the
+    same model wait out the provider's retry delay together. Streams are
+    retried chunk-aware by ResumableStreamMixin: an interrupted reply is
+    resumed where it stopped rather than restarted.
     """
+    stream_retry_on: ClassVar[tuple] = RETRYABLE_EXCEPTIONS
+
     @retry(
-        # Wait with exponential backoff, starting at 2s, up to 60s between retries.
-        wait=wait_exponential(multiplier=1, min=2, max=60),
+        # Wait as long as a 429 asks, otherwise back off exponentially from 2s up to 60s.
+        wait=wait_retry_after(wait_exponential(multiplier=1, min=2, max=60)),
         # Retry up to 5 times before giving up.
         stop=stop_after_attempt(5),
         # Only retry on the specified Google API exceptions.
@@ -106,7 +151,7 @@ class RetryingChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
         return super().invoke(*args, **kwargs)
 
     @retry(
-        wait=wait_exponential(multiplier=1, min=2, max=60),
+        wait=wait_retry_after(wait_exponential(multiplier=1, min=2, max=60)),
         stop=stop_after_attempt(5),
         retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
         reraise=True
@@ -114,14 +159,12 @@ class RetryingChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
     async def ainvoke(self, *args, **kwargs):
         return await super().ainvoke(*args, **kwargs)
 
-    @retry(
-        wait=wait_exponential(multiplier=1, min=2, max=60),
-        stop=stop_after_attempt(5),
-        retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
-        reraise=True
-    )
-    def stream(self, *args, **kwargs):
-        yield from super().stream(*args, **kwargs)
+
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_MAX_TOKENS = 100000
+# Gemini clients come from the shared pool: one instance (and connection) per
+# key and parameter set, reused by the agent loop and every tool.
+get_llm_pool().register("google", RetryingChatGoogleGenerativeAI)
 
 logger.add(
     lambda msg: print(msg, end=""),
@@ -130,14 +173,6 @@ logger.add(
     if "INFO" in "{level}"
     else "<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{message}</cyan>",
 )
-model_name = "sentence-transformers/all-mpnet-base-v2"
-model_kwargs = {"device": "cpu"}
-encode_kwargs = {"normalize_embeddings": False}
-hf = HuggingFaceEmbeddings(
-    model_name=model_name, model_kwargs=model_kwargs, encode_kwargs=encode_kwargs
-)
-
-gemini_2_flash = None
 
 def setup_api_keys():
     """
@@ -204,8 +239,7 @@ To enable this critical security feature, you need a free API key from E2B.
         show_success("E2B Sandbox API key found in environment variables.")
 
 def initialize_gemini_2_flash(api_key: str = None):
-    """Initialize the Gemini 2.0 Flash model with the provided API key"""
-    global gemini_2_flash
+    """Get the pooled Gemini 2.5 Flash client for the given (or environment) API key"""
     if api_key:
         api_key_to_use = api_key
     else:
@@ -216,135 +250,18 @@ def initialize_gemini_2_flash(api_key: str = None):
             "GOOGLE_API_KEY is required to initialize Gemini 2.0 Flash model"
         )
 
-    gemini_2_flash =RetryingChatGoogleGenerativeAI(
-        model="gemini-2.5-flash", api_key=api_key_to_use, max_tokens=100000
+    return get_llm_pool().get(
+        "google", GEMINI_MODEL, api_key_to_use, max_tokens=GEMINI_MAX_TOKENS
     )
-    return gemini_2_flash
 
 
 def get_gemini_25_flash():
-    """Get the initialized Gemini 2.5 Flash model"""
-    global gemini_2_flash
-    if gemini_2_flash is None:
-        initialize_gemini_2_flash()
-    return gemini_2_flash
+    """Get the Gemini 2.5 Flash model for the current GOOGLE_API_KEY"""
+    return initialize_gemini_2_flash()
 
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
-console = Console()
-
-def print_welcome_banner():
-    """Prints an enhanced welcome banner with instructions and capabilities."""
-    banner_text = Text(
-        """
-      ██████╗ ██╗     ██╗████████╗███████╗ ██████╗ ██████╗ ██████╗ ███████╗██████╗ 
-      ██╔══██╗██║     ██║╚══██╔══╝╚══███╔╝██╔════╝██╔═══██╗██╔══██╗██╔════╝██╔══██╗
-      ██████╔╝██║     ██║   ██║     ███╔╝ ██║     ██║   ██║██║  ██║█████╗  ██████╔╝
-      ██╔══██╗██║     ██║   ██║    ███╔╝  ██║     ██║   ██║██║  ██║██╔══╝  ██╔══██╗
-      ██████╔╝███████╗██║   ██║   ███████╗╚██████╗╚██████╔╝██████╔╝███████╗██║  ██║
-      ╚═════╝ ╚══════╝╚═╝   ╚═╝   ╚══════╝ ╚═════╝ ╚═════╝ ╚═════╝ ╚══════╝╚═╝  ╚═╝
-      """,
-        style="orange1",
-        justify="center",
-    )
-
-    welcome_message = Markdown("""
-### Welcome to BlitzCoder! Your AI-Powered Development Assistant.
-This tool leverages AI to help you with a wide range of development tasks, right from your terminal.
-
----
-### Key Capabilities:
-*   **Project Scaffolding:** Generate entire, production-ready project structures for any framework.
-*   **Code Generation & Refactoring:** Write, explain, and refactor code in any language.
-*   **Secure Command Execution:** Run shell commands, linters (`ruff`), and installers (`pip`) in a secure, isolated sandbox.
-*   **Debugging Assistance:** Run servers (FastAPI, Node.js), capture logs, and get AI-powered suggestions for errors.
-*   **Filesystem Operations:** Navigate your codebase, inspect files, and manage your project directory.
-*   **Semantic Memory:** Remembers the context of your conversation for more relevant assistance over time.
-
----
-### How to Use:
-Simply type your request in plain English. Here are some examples:
-- `scaffold a new go project for a REST API with Fiber`
-- `run the ruff formatter on my current directory`
-- `explain the code in src/main.py`
-- `search: what was the database model we discussed earlier?`
-""")
-    
-    panel_content = Group(banner_text, welcome_message)
-
-    panel = Panel(
-        panel_content,
-        title="[bold orange1]⚡ BLITZCODER CLI[/bold orange1]",
-        subtitle="[orange1]AI-Powered Dev Assistant[/orange1]",
-        border_style="orange1",
-        width=140,
-        expand=True,
-        padding=(2, 2),
-    )
-    console.print(panel)
-
-
-def show_success(msg):
-    console.print(Panel(f"[green]✅ {msg}", title="Success", style="green"))
-
-
-def show_error(msg):
-    console.print(Panel(f"[red]❌ {msg}", title="Error", style="red"))
-
-
-def show_info(msg):
-    console.print(f"[cyan]{msg}[/cyan]")
-
-
-def print_agent_response(text: str, title: str = "BlitzCoder"):
-    """Display agent output inside a Rich panel box with orange color"""
-    console.print(
-        Panel.fit(
-            Markdown(text),
-            title=f"[bold orange1]{title}[/bold orange1]",
-            border_style="orange1",
-        )
-    )
-
-
-def show_code(code: str, lang: str = "python"):
-    syntax = Syntax(code, lang, theme="monokai", line_numbers=True)
-    console.print(syntax)
-
-
-def build_rich_tree(root_path: str) -> Tree:
-    root_name = os.path.basename(os.path.abspath(root_path))
-    tree = Tree(f"📁 [bold blue]{root_name}[/bold blue]")
-
-    def add_nodes(directory: str, branch: Tree):
-        try:
-            for entry in sorted(os.listdir(directory)):
-                full_path = os.path.join(directory, entry)
-                if os.path.isdir(full_path):
-                    sub_branch = branch.add(f"📁 [bold]{entry}[/bold]")
-                    add_nodes(full_path, sub_branch)
-                else:
-                    branch.add(f"📄 {entry}")
-        except PermissionError:
-            branch.add("[red]Permission Denied[/red]")
-
-    add_nodes(root_path, tree)
-    return tree
-
-
-def simulate_progress(task_desc: str):
-    with Progress(
-        SpinnerColumn(),
-        "[progress.description]{task.description}",
-        BarColumn(),
-        TimeElapsedColumn(),
-    ) as progress:
-        task = progress.add_task(f"[green]{task_desc}", total=100)
-        while not progress.finished:
-            progress.update(task, advance=5)
-            time.sleep(0.05)
-
 
 class PersistentPowerShell:
     def _init_(self):
@@ -390,20 +307,9 @@ code_pattern = r"(?:\w+)?\n(.*?)\n"
 
 class AgentState(MessagesState):
     documents: list[str]
+    # Running summary of the turns the history manager has folded away.
+    summary: str
 
-model_name = "sentence-transformers/all-mpnet-base-v2"
-model_kwargs = {"device": "cpu"}
-semantic_memory_store = InMemoryStore(
-    index={
-        "embed": HuggingFaceEmbeddings(
-            model_name=model_name,
-            model_kwargs=model_kwargs,
-            encode_kwargs=encode_kwargs,
-        ),
-        "dims": 768,  # Google embedding dimension
-        "fields": ["memory", "$"],  # Fields to embed
-    }
-)
 
 error_logs_prompt = ChatPromptTemplate.from_messages(
     [
@@ -432,7 +338,7 @@ def send_error_logs_to_agent(error_logs):
     logs_text = "".join(error_logs)
     prompt = error_logs_prompt.format(error_logs=logs_text)
     show_info("\n--- Sending error logs to Gemini ---")
-    response = get_gemini_2_flash().invoke(prompt)
+    response = get_gemini_25_flash().invoke(prompt)
     show_info("\n--- Gemini Response ---")
     show_info(response.content)
 
@@ -759,6 +665,8 @@ def run_shell_command_in_sandbox(
     """
     show_info(f"Executing shell command in E2B sandbox: '{command}'")
     try:
+        from e2b_code_interpreter import Sandbox
+
         # The tool now simply assumes the API key is set in the environment.
         e2b_api_key = os.getenv("E2B_API_KEY")
         if not e2b_api_key:
@@ -936,50 +844,6 @@ def error_detection(error: str, path: str):
     return f"Error detected in {path}:\n{error}"
 
 
-def validate_project_structure(tree_structure: str) -> bool:
-    """
-    Validate that the generated project structure is not overly complex.
-    Returns True if the structure is acceptable, False if it's too complex.
-    """
-    lines = tree_structure.strip().split("\n")
-    file_count = 0
-    max_depth = 0
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        # Count files (lines that don't end with /)
-        if (
-            not line.endswith("/")
-            and not line.endswith("│")
-            and not line.endswith("├──")
-            and not line.endswith("└──")
-        ):
-            file_count += 1
-
-        # Calculate depth by counting leading spaces or tree characters
-        depth = 0
-        for char in line:
-            if char in [" ", "│", "├", "└", "─"]:
-                depth += 1
-            else:
-                break
-        max_depth = max(max_depth, depth // 4)  # Approximate depth level
-
-    # Reject if too many files or too deep
-    if file_count > 25:
-        show_error(f"❌ Project structure too complex: {file_count} files (max 25)")
-        return False
-
-    if max_depth > 5:
-        show_error(f"❌ Project structure too deep: {max_depth} levels (max 5)")
-        return False
-
-    return True
-
-
 @tool
 def generate_project_structure(framework: str, use_case: str) -> str:
     """
@@ -1005,8 +869,7 @@ CRITICAL CONSTRAINTS - YOU MUST FOLLOW THESE:
 
 Requirements:
 - Follow {framework} conventions and file extensions
-- Wrap output in triple backticks
-- NO explanations, just the folder structure
+- List every file by its path from the project's top-level folder; folders follow from the paths
 - Small-to-medium scale application
 - Basic CRUD operations only
 
@@ -1022,23 +885,17 @@ Remember: SIMPLE, PRACTICAL, WORKING - NOT COMPLEX!""",
         ]
     )
 
-    # Try up to 3 times to get a simple structure
-    for attempt in range(3):
-        messages = prompt_template.format_messages(
-            framework=framework, use_case=use_case
+    messages = prompt_template.format_messages(framework=framework, use_case=use_case)
+    try:
+        structure = invoke_structured(
+            get_gemini_25_flash(), messages, ProjectStructure, "project_structure"
         )
-        result = get_gemini_2_flash().invoke(messages)
-        match = re.search(tree_pattern, result.content, re.DOTALL)
-        tree_structure = match.group(1).strip() if match else result.content
-
-        # Validate the structure
-        if validate_project_structure(tree_structure):
-            show_info(f"✅ Generated simple project structure (attempt {attempt + 1})")
-            return tree_structure
-        else:
-            show_info(f"⚠️ Structure too complex, retrying... (attempt {attempt + 1}/3)")
+        show_info("✅ Generated simple project structure")
+        return structure.to_tree()
+    except StructuredOutputError as e:
+        show_error(f"❌ Invalid project structure: {e}")
 
-    # If all attempts failed, return a simple fallback structure
+    # If it couldn't be repaired, return a simple fallback structure
     show_error("❌ Failed to generate simple structure, using fallback")
     fallback_structure = f"""
 {framework.lower()}-app/
@@ -1057,14 +914,7 @@ Remember: SIMPLE, PRACTICAL, WORKING - NOT COMPLEX!""",
     return fallback_structure.strip()
 
 
-@tool
-def generate_architecture_plan(
-    framework: str, use_case: str, tree_structure: str
-) -> str:
-    """
-    Generate a comprehensive architecture plan for the given project structure.
-    Returns the plan as a JSON string.
-    """
+def _architecture_plan_messages(framework: str, use_case: str, tree_structure: str):
     reasoning_prompt = ChatPromptTemplate.from_messages(
         [
             (
@@ -1099,30 +949,11 @@ CRITICAL REQUIREMENTS:
 - Core application files should be high priority
 - Test files should be medium priority
 - Documentation files should be low priority
+- In each file's "dependencies", list the other project files it imports by their path in the structure, alongside any libraries
+- "implementation_order" lists every file path, each after the project files it depends on
+- Write the "file_analysis" entries in implementation order too: they are generated as they arrive
 
-CRITICAL: You MUST return ONLY valid JSON. Do not include any text before or after the JSON.
-Use this exact format:
-{{
-    "architecture_overview": "Brief description of the project architecture",
-    "key_components": [
-        {{
-            "name": "component_name",
-            "purpose": "What this component does",
-            "dependencies": ["dependency1", "dependency2"],
-            "files": ["file1", "file2"]
-        }}
-    ],
-    "file_analysis": {{
-        "src/main/java/com/example/todoapp/TodoAppApplication.java": {{
-            "purpose": "Main Spring Boot application class",
-            "key_features": ["@SpringBootApplication", "main method"],
-            "dependencies": ["Spring Boot"],
-            "implementation_priority": "high"
-        }}
-    }},
-    "data_flow": "Description of how data flows through the application",
-    "implementation_order": ["file1", "file2", "file3"]
-}}""",
+Return the plan as JSON matching the response schema. In "file_analysis", give each file's full path in "path".""",
             ),
             (
                 "user",
@@ -1130,189 +961,76 @@ Use this exact format:
             ),
         ]
     )
-    messages = reasoning_prompt.format_messages(
+    return reasoning_prompt.format_messages(
         framework=framework, use_case=use_case, tree_structure=tree_structure
     )
-    result = get_gemini_2_flash().invoke(messages)
 
-    # Try multiple regex patterns to extract JSON
-    content = result.content.strip()
 
-    # Pattern 1: Look for JSON between triple backticks
-    json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL)
-    if json_match:
-        plan = json_match.group(1).strip()
-    else:
-        # Pattern 2: Look for JSON starting with { and ending with }
-        json_match = re.search(r"(\{.*\})", content, re.DOTALL)
-        if json_match:
-            plan = json_match.group(1).strip()
-        else:
-            # Pattern 3: If no JSON found, try to use the entire content
-            plan = content.strip()
-
-    # Validate that we have valid JSON
+@tool
+def generate_architecture_plan(
+    framework: str, use_case: str, tree_structure: str
+) -> str:
+    """
+    Generate a comprehensive architecture plan for the given project structure.
+    Returns the plan as a JSON string.
+    """
+    messages = _architecture_plan_messages(framework, use_case, tree_structure)
     try:
-        import json
-
-        json.loads(plan)
-        show_info("✅ Architecture plan created with valid JSON!")
-        return plan
-    except json.JSONDecodeError as e:
-        show_error(f"❌ Invalid JSON in architecture plan: {e}")
-        show_error(f"Raw content: {content[:200]}...")
-
-        # Return a simple fallback JSON structure
-        fallback_plan = {
-            "architecture_overview": f"Simple {framework} application for {use_case}",
-            "key_components": [
-                {
-                    "name": "Main Application",
-                    "purpose": "Core application functionality",
-                    "dependencies": [framework],
-                    "files": ["main.py", "config.py", "README.md"],
-                }
-            ],
-            "file_analysis": {
-                "main.py": {
-                    "purpose": "Main application entry point",
-                    "key_features": ["Main function", "Application setup"],
-                    "dependencies": [],
-                    "implementation_priority": "high",
-                },
-                "config.py": {
-                    "purpose": "Configuration settings",
-                    "key_features": ["Settings", "Environment variables"],
-                    "dependencies": [],
-                    "implementation_priority": "high",
-                },
-                "README.md": {
-                    "purpose": "Project documentation",
-                    "key_features": ["Setup instructions", "Usage guide"],
-                    "dependencies": [],
-                    "implementation_priority": "low",
-                },
-            },
-            "data_flow": "Simple request-response flow",
-            "implementation_order": ["main.py", "config.py", "README.md"],
-        }
-
-        try:
-            plan = json.loads(plan_json)
-        except Exception as e:
-            show_error(f"❌ Failed to parse architecture plan as JSON: {e}")
-            return f"Failed to parse architecture plan as JSON:\n{plan_json}"
-
-        file_analysis = plan.get("file_analysis", {})
-        all_files = list(file_analysis.keys())
-
-        # Limit the number of files to prevent overly complex projects
-        if len(all_files) > 25:
-            show_error(
-                f"❌ Too many files in architecture plan: {len(all_files)} (max 25)"
-            )
-            return f"❌ Architecture plan too complex with {len(all_files)} files. Please try again with a simpler use case."
-
-        created_files = []
-        show_info(f"📝 Generating {len(all_files)} files...")
-
-        for i, file_path in enumerate(all_files, 1):
-            show_info(f"📄 Creating file {i}/{len(all_files)}: {file_path}")
-
-            # Ensure the directory exists
-            abs_file_path = os.path.join(project_root, file_path)
-            dir_path = os.path.dirname(abs_file_path)
-            if dir_path:
-                os.makedirs(dir_path, exist_ok=True)
-
-            # Generate the file content
-            file_info = file_analysis[file_path]
-            show_info(f"🔧 Generating content for {file_path}...")
-
-            try:
-                content = generate_file_content.invoke(
-                    {
-                        "framework": framework,
-                        "use_case": use_case,
-                        "file_path": file_path,
-                        "purpose": file_info.get("purpose", "Core application file"),
-                        "features": ", ".join(file_info.get("key_features", [])),
-                        "architecture_overview": plan.get("architecture_overview", ""),
-                        "data_flow": plan.get("data_flow", ""),
-                        "dependencies": json.dumps(
-                            file_info.get("dependencies", []), indent=2
-                        ),
-                    }
-                )
-
-                # Ensure we have valid content
-                if not content or content.strip() == "":
-                    show_error(f"⚠️ No content generated for {file_path}")
-                    content = (
-                        f"// TODO: Implement {file_path} - Content generation failed"
-                    )
-                elif len(content.strip()) < 10:
-                    show_error(
-                        f"⚠️ Minimal content generated for {file_path} (only {len(content)} chars)"
-                    )
-                    content = f"// TODO: Implement {file_path} - Insufficient content generated"
-
-                show_info(f"💾 Writing {len(content)} characters to {file_path}...")
-
-                # Write the extracted code to the file
-                with open(abs_file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-
-                # Verify the file was written correctly
-                try:
-                    with open(abs_file_path, "r", encoding="utf-8") as f:
-                        written_content = f.read()
-
-                    if len(written_content) == len(content):
-                        show_info(
-                            f"✅ Successfully wrote {len(written_content)} characters to {file_path}"
-                        )
-                        if len(written_content) < 100:
-                            show_info(f"📄 Content preview: {written_content[:100]}...")
-                    else:
-                        show_error(
-                            f"❌ Content length mismatch for {file_path}: expected {len(content)}, got {len(written_content)}"
-                        )
-
-                except Exception as e:
-                    show_error(f"❌ Failed to verify file {file_path}: {e}")
-
-            except Exception as e:
-                show_error(f"❌ Error generating content for {file_path}: {e}")
-                # Write a fallback content
-                fallback_content = f"// TODO: Implement {file_path} - Error: {e}"
-                with open(abs_file_path, "w", encoding="utf-8") as f:
-                    f.write(fallback_content)
-                show_info(f"💾 Wrote fallback content to {file_path}")
-
-            created_files.append(abs_file_path)
-            show_info(f"✅ File {i}/{len(all_files)} processed: {file_path}")
-
-        show_success(
-            f"✅ Successfully created {len(created_files)} files at [bold]{os.path.abspath(project_root)}[/bold]"
+        plan = invoke_structured(
+            get_gemini_25_flash(), messages, ArchitecturePlan, "architecture_plan"
         )
+    except StructuredOutputError as e:
+        show_error(f"❌ Invalid architecture plan: {e}")
+        return f"Error generating architecture plan: {e}"
+    show_info("✅ Architecture plan created with valid JSON!")
+    return json.dumps(plan.to_plan(), indent=2)
 
-        # Final verification - show what was written to each file
-        show_info("📋 Final verification - Files created with content:")
-        for file_path in created_files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                rel_path = os.path.relpath(file_path, project_root)
-                show_info(f"  📄 {rel_path}: {len(content)} characters")
-            except Exception as e:
-                show_error(f"  ❌ {file_path}: Error reading file - {e}")
-
-        return f"✅ Project scaffolding completed! {len(created_files)} files created at {os.path.abspath(project_root)}"
 
-    except Exception as e:
-        show_error(f"❌ Error in scaffold_and_generate_files: {e}")
-        return f"Error in scaffold_and_generate_files: {e}"
+def stream_architecture_plan(
+    framework: str, use_case: str, tree_structure: str
+) -> Iterator[tuple]:
+    """
+    Stream the architecture plan in JSON-schema output mode, yielding
+    PlanStreamParser events as its parts complete. File entries that don't
+    validate are held back. The whole reply is validated at the end, and
+    repaired if needed; the validated fields are yielded again, along with
+    any files not reported yet.
+    """
+    messages = _architecture_plan_messages(framework, use_case, tree_structure)
+    llm = get_gemini_25_flash()
+    parser = PlanStreamParser()
+    reported = set()
+    for chunk in llm.stream(
+        messages, generation_config=structured_generation_config(ArchitecturePlan)
+    ):
+        if chunk.response_metadata.get(STREAM_RESTART):
+            # The reply was cut and is being sent again from the start; files
+            # already started keep going and aren't reported twice.
+            parser = PlanStreamParser()
+            continue
+        if not isinstance(chunk.content, str):
+            continue
+        for kind, key, value in parser.feed(chunk.content):
+            if kind == "field" and key == "file_analysis":
+                continue  # unvalidated; the validated one comes at the end
+            if kind == "file":
+                try:
+                    spec = FileSpec.model_validate({**value, "path": key})
+                except (TypeError, ValueError):
+                    continue
+                key, value = spec.path, spec.model_dump(exclude={"path"})
+                reported.add(key)
+            yield kind, key, value
+
+    plan = repair_structured(
+        llm, messages, parser.text, ArchitecturePlan, "architecture_plan"
+    ).to_plan()
+    show_info("✅ Architecture plan streamed with valid JSON!")
+    for path, info in plan["file_analysis"].items():
+        if path not in reported:
+            yield "file", path, info
+    for key, value in plan.items():
+        yield "field", key, value
 
 
 @tool
@@ -1334,7 +1052,7 @@ def generate_folder_creation_script(tree_structure: str) -> str:
         ]
     )
     messages = folder_prompt.format_messages(tree_structure=tree_structure)
-    result = get_gemini_2_flash().invoke(messages)
+    result = get_gemini_25_flash().invoke(messages)
     match = re.search(r"(?:python)?\s*([\s\S]*?)", result.content, re.DOTALL)
     code = match.group(1).strip() if match else result.content
     show_info("Folder creation script generated!")
@@ -1351,9 +1069,11 @@ def generate_file_content(
     architecture_overview: str = "",
     data_flow: str = "",
     dependencies: str = "[]",
+    dependency_interfaces: str = "",
 ) -> str:
     """
     Generate content for a specific file based on the architecture plan and project context.
+    `dependency_interfaces` lists the declarations of already generated files this one depends on.
     Returns the code as a string.
     """
     system_prompt = """You are an expert software developer. Generate production-ready code for the specified file.
@@ -1376,6 +1096,9 @@ DATA FLOW:
 DEPENDENCIES:
 {dependencies}
 
+INTERFACES OF PROJECT FILES THIS FILE DEPENDS ON (already written; import and call these exact names and signatures):
+{dependency_interfaces}
+
 REQUIREMENTS:
 1. Generate ONLY the complete, production-ready code for: {file_path}
 2. Follow modern best practices
@@ -1403,10 +1126,11 @@ Generate the complete code for {file_path} now:"""
         architecture_overview=architecture_overview,
         data_flow=data_flow,
         dependencies=dependencies,
+        dependency_interfaces=dependency_interfaces or "None",
     )
 
     try:
-        result = get_gemini_2_flash().invoke(messages)
+        result = get_gemini_25_flash().invoke(messages)
     except Exception as e:
         show_error(f"❌ Error calling Gemini model for {file_path}: {e}")
         return f"// TODO: Implement {file_path} - Model error: {e}"
@@ -1495,7 +1219,7 @@ def explain_code(path: str):
         with open(path, "r", encoding="utf-8") as f:
             code = f.read()
         prompt = f"Explain what the following code does:\n\n{code}"
-        response = get_gemini_2_flash().invoke(prompt)
+        response = get_gemini_25_flash().invoke(prompt)
         return response.content
     except Exception as e:
         return f"Error: {e}"
@@ -1565,7 +1289,7 @@ def agent_refactor_code(path: str) -> str:
         with open(path, "r", encoding="utf-8") as f:
             code = f.read()
         prompt = f"Refactor and fix any errors in the following Python code. Return only the corrected code.\n\n{code}"
-        response = get_gemini_2_flash().invoke(prompt)
+        response = get_gemini_25_flash().invoke(prompt)
         refactored_code = (
             response.content if hasattr(response, "content") else str(response)
         )
@@ -1665,6 +1389,7 @@ def create_or_delete_file(path: str):
 
 
 @tool
+@in_lane(BACKGROUND)
 def scaffold_and_generate_files(
     framework: str, use_case: str, project_root: str = None
 ) -> str:
@@ -1679,141 +1404,212 @@ def scaffold_and_generate_files(
             project_root = f"./{safe_framework}_project"
 
         show_info(f"🚀 Starting project scaffolding for {framework} - {use_case}")
-
-        # Step 1: Generate the project structure
-        show_info("📁 Generating project structure...")
-        tree_structure = generate_project_structure.invoke(
-            {"framework": framework, "use_case": use_case}
-        )
-
-        # Validate the structure before proceeding
-        if not validate_project_structure(tree_structure):
-            return f"❌ Project structure validation failed. Please try again with a simpler use case."
-
-        # Step 2: Generate the architecture plan
-        show_info("🏗️ Generating architecture plan...")
-        plan_json = generate_architecture_plan.invoke(
-            {
-                "framework": framework,
-                "use_case": use_case,
-                "tree_structure": tree_structure,
-            }
-        )
+        max_workers = get_setting("scaffold_max_workers", DEFAULT_MAX_WORKERS)
 
         import json
 
-        try:
-            plan = json.loads(plan_json)
-        except Exception as e:
-            show_error(f"❌ Failed to parse architecture plan as JSON: {e}")
-            return f"Failed to parse architecture plan as JSON:\n{plan_json}"
-
-        file_analysis = plan.get("file_analysis", {})
-        all_files = list(file_analysis.keys())
-
-        # Limit the number of files to prevent overly complex projects
-        if len(all_files) > 25:
-            show_error(
-                f"❌ Too many files in architecture plan: {len(all_files)} (max 25)"
+        # A rerun of an interrupted scaffold reuses its plan and finished files
+        manifest = ScaffoldManifest.load(project_root)
+        plan = manifest.plan_for(framework, use_case)
+        if plan is not None:
+            show_info(
+                f"♻️ Resuming from {MANIFEST_NAME}: reusing the recorded architecture plan"
+            )
+            if not manifest.plan_complete:
+                show_error(
+                    f"⚠️ The recorded plan was cut short after "
+                    f"{len(plan.get('file_analysis') or {})} files; delete "
+                    f"{MANIFEST_NAME} to plan the project again"
+                )
+            jobs = plan_jobs(plan)
+        else:
+            # Step 1: Generate the project structure
+            show_info("📁 Generating project structure...")
+            tree_structure = generate_project_structure.invoke(
+                {"framework": framework, "use_case": use_case}
             )
-            return f"❌ Architecture plan too complex with {len(all_files)} files. Please try again with a simpler use case."
 
-        created_files = []
-        show_info(f"📝 Generating {len(all_files)} files...")
+            # Step 2: Stream the architecture plan; each file is generated as
+            # soon as its entry is complete, while the rest is still planned.
+            show_info(
+                f"🏗️ Streaming architecture plan, generating files as they are "
+                f"planned, {max_workers} at a time..."
+            )
+            # The plan is recorded as it arrives, so a rerun after a failure
+            # mid-stream resumes from what was planned
+            plan = {}
+            manifest.start(framework, use_case, plan, complete=False)
+            jobs = stream_plan_jobs(
+                stream_architecture_plan(framework, use_case, tree_structure),
+                plan,
+                max_files=MAX_PROJECT_FILES,
+                on_update=manifest.extend,
+            )
 
-        for i, file_path in enumerate(all_files, 1):
-            show_info(f"📄 Creating file {i}/{len(all_files)}: {file_path}")
+        if isinstance(jobs, list):
+            # Limit the number of files to prevent overly complex projects
+            if len(jobs) > MAX_PROJECT_FILES:
+                show_error(
+                    f"❌ Too many files in architecture plan: {len(jobs)} "
+                    f"(max {MAX_PROJECT_FILES})"
+                )
+                return f"❌ Architecture plan too complex with {len(jobs)} files. Please try again with a simpler use case."
+            manifest.start(framework, use_case, plan, manifest.plan_complete)
+            show_info(
+                f"📝 Generating {len(jobs)} files, "
+                f"{max_workers} at a time..."
+            )
+        prompt_hashes = {}
+        reused = set()
+
+        def interfaces(job: FileJob) -> str:
+            sections = []
+            for dep, dep_content in job.upstream.items():
+                signatures = extract_signatures(dep_content)
+                if signatures:
+                    sections.append(f"# {dep}\n{signatures}")
+            return "\n\n".join(sections)
+
+        def generate(job: FileJob) -> str:
+            inputs = {
+                "framework": framework,
+                "use_case": use_case,
+                "file_path": job.path,
+                "purpose": job.info.get("purpose", "Core application file"),
+                "features": ", ".join(job.info.get("key_features", [])),
+                "architecture_overview": plan.get("architecture_overview", ""),
+                "data_flow": plan.get("data_flow", ""),
+                "dependencies": json.dumps(job.info.get("dependencies", []), indent=2),
+                "dependency_interfaces": interfaces(job),
+            }
+            prompt_hashes[job.path] = content_hash(inputs)
+            content = manifest.reusable(job.path, prompt_hashes[job.path])
+            if content is not None:
+                reused.add(job.path)
+                return content
+
+            content = generate_file_content.invoke(inputs)
+            # Ensure we have valid content
+            if not content or content.strip() == "":
+                show_error(f"⚠️ No content generated for {job.path}")
+                content = f"// TODO: Implement {job.path} - Content generation failed"
+            elif len(content.strip()) < 10:
+                show_error(
+                    f"⚠️ Minimal content generated for {job.path} (only {len(content)} chars)"
+                )
+                content = f"// TODO: Implement {job.path} - Insufficient content generated"
+            return content
 
-            # Ensure the directory exists
-            abs_file_path = os.path.join(project_root, file_path)
+        def write(job: FileJob, content: str):
+            if job.path in reused:
+                return  # already on disk, as the manifest recorded it
+            abs_file_path = os.path.join(project_root, job.path)
             dir_path = os.path.dirname(abs_file_path)
             if dir_path:
                 os.makedirs(dir_path, exist_ok=True)
-
-            # Generate the file content
-            file_info = file_analysis[file_path]
-            show_info(f"🔧 Generating content for {file_path}...")
-
-            try:
-                content = generate_file_content.invoke(
-                    {
-                        "framework": framework,
-                        "use_case": use_case,
-                        "file_path": file_path,
-                        "purpose": file_info.get("purpose", "Core application file"),
-                        "features": ", ".join(file_info.get("key_features", [])),
-                        "architecture_overview": plan.get("architecture_overview", ""),
-                        "data_flow": plan.get("data_flow", ""),
-                        "dependencies": json.dumps(
-                            file_info.get("dependencies", []), indent=2
-                        ),
-                    }
+            with open(abs_file_path, "w", encoding="utf-8", newline="") as f:
+                written = f.write(content)
+            if written != len(content):
+                raise OSError(f"wrote {written} of {len(content)} characters")
+
+        # Files are written as soon as they arrive; one progress line per file
+        # being generated, under the overall count.
+        with Progress(
+            SpinnerColumn(),
+            "[progress.description]{task.description}",
+            BarColumn(),
+            "{task.completed}/{task.total}",
+            TimeElapsedColumn(),
+            console=console,
+            transient=True,
+        ) as progress:
+            planned = len(jobs) if isinstance(jobs, list) else None
+            overall = progress.add_task("[cyan]Generating files", total=planned)
+            running = {}
+
+            def announced(jobs):
+                # The overall total grows as the streamed plan names files
+                for count, job in enumerate(jobs, 1):
+                    progress.update(overall, total=count)
+                    yield job
+
+            def on_start(job: FileJob):
+                running[job.path] = progress.add_task(f"  📄 {job.path}", total=None)
+
+            def on_done(job: FileJob, result):
+                progress.remove_task(running.pop(job.path))
+                progress.advance(overall)
+                if job.path in reused:
+                    show_info(f"♻️ {job.path}: unchanged since the last run, skipped")
+                    return
+                # Placeholders are written, but regenerated on the next run
+                failed = result.error or result.content.startswith("// TODO: Implement")
+                manifest.record(
+                    job.path,
+                    prompt_hashes.get(job.path, ""),
+                    result.content,
+                    FAILED if failed else COMPLETE,
+                    result.seconds,
                 )
-
-                # Ensure we have valid content
-                if not content or content.strip() == "":
-                    show_error(f"⚠️ No content generated for {file_path}")
-                    content = (
-                        f"// TODO: Implement {file_path} - Content generation failed"
-                    )
-                elif len(content.strip()) < 10:
-                    show_error(
-                        f"⚠️ Minimal content generated for {file_path} (only {len(content)} chars)"
+                if result.error:
+                    show_error(f"❌ Error generating content for {job.path}: {result.error}")
+                else:
+                    show_info(
+                        f"✅ {job.path}: {len(result.content)} characters "
+                        f"in {result.seconds:.1f}s"
                     )
-                    content = f"// TODO: Implement {file_path} - Insufficient content generated"
 
-                show_info(f"💾 Writing {len(content)} characters to {file_path}...")
-
-                # Write the extracted code to the file
-                with open(abs_file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-
-                # Verify the file was written correctly
-                try:
-                    with open(abs_file_path, "r", encoding="utf-8") as f:
-                        written_content = f.read()
-
-                    if len(written_content) == len(content):
-                        show_info(
-                            f"✅ Successfully wrote {len(written_content)} characters to {file_path}"
-                        )
-                        if len(written_content) < 100:
-                            show_info(f"📄 Content preview: {written_content[:100]}...")
-                    else:
-                        show_error(
-                            f"❌ Content length mismatch for {file_path}: expected {len(content)}, got {len(written_content)}"
-                        )
-
-                except Exception as e:
-                    show_error(f"❌ Failed to verify file {file_path}: {e}")
-
-            except Exception as e:
-                show_error(f"❌ Error generating content for {file_path}: {e}")
-                # Write a fallback content
-                fallback_content = f"// TODO: Implement {file_path} - Error: {e}"
-                with open(abs_file_path, "w", encoding="utf-8") as f:
-                    f.write(fallback_content)
-                show_info(f"💾 Wrote fallback content to {file_path}")
-
-            created_files.append(abs_file_path)
-            show_info(f"✅ File {i}/{len(all_files)} processed: {file_path}")
+            engine = FileGenerationEngine(
+                generate,
+                write,
+                max_workers=max_workers,
+                on_start=on_start,
+                on_done=on_done,
+            )
+            try:
+                report = engine.run(jobs if planned is not None else announced(jobs))
+            except ValueError as e:
+                # The streamed plan was unusable; what was planned and
+                # generated up to then stays recorded, flagged incomplete.
+                show_error(f"❌ Architecture plan failed: {e}")
+                return f"❌ Architecture plan failed: {e}. Please try again with a simpler use case."
+
+        if planned is None:
+            manifest.start(framework, use_case, plan)
+        all_files = list(plan.get("file_analysis") or {})
+        counts = manifest.counts()
+        first_file = (
+            f"first file after {report.first_file_s:.1f}s, "
+            if report.first_file_s is not None
+            else ""
+        )
+        show_info(
+            f"⏱️ Generated {len(all_files) - len(reused)} files in {report.wall_s:.1f}s "
+            f"({first_file}≈{report.sequential_s:.1f}s one at a time, "
+            f"{report.speedup:.1f}x; critical path {report.critical_path_s:.1f}s), "
+            f"reused {len(reused)}"
+        )
 
         show_success(
-            f"✅ Successfully created {len(created_files)} files at [bold]{os.path.abspath(project_root)}[/bold]"
+            f"✅ Successfully created {counts[COMPLETE]} files at [bold]{os.path.abspath(project_root)}[/bold]"
         )
 
-        # Final verification - show what was written to each file
-        show_info("📋 Final verification - Files created with content:")
-        for file_path in created_files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                rel_path = os.path.relpath(file_path, project_root)
-                show_info(f"  📄 {rel_path}: {len(content)} characters")
-            except Exception as e:
-                show_error(f"  ❌ {file_path}: Error reading file - {e}")
+        # What was written to each file, as the manifest recorded it
+        show_info("📋 Files created with content:")
+        for path in all_files:
+            entry = manifest.files.get(path, {})
+            if entry.get("status") == COMPLETE:
+                show_info(f"  📄 {path}: {entry.get('chars', 0)} characters")
+            else:
+                show_error(f"  ❌ {path}: {entry.get('status', PENDING)}")
 
-        return f"✅ Project scaffolding completed! {len(created_files)} files created at {os.path.abspath(project_root)}"
+        if counts[FAILED]:
+            return (
+                f"⚠️ Project scaffolding finished with {counts[FAILED]} failed files "
+                f"({counts[COMPLETE]} complete) at {os.path.abspath(project_root)}. "
+                f"Run it again to retry only the failed files."
+            )
+        return f"✅ Project scaffolding completed! {counts[COMPLETE]} files created at {os.path.abspath(project_root)}"
 
     except Exception as e:
         show_error(f"❌ Error in scaffold_and_generate_files: {e}")
@@ -1861,11 +1657,29 @@ ruff format  # Format all files in the current directory.
 - look_for_file_or_directory(name: str, root_path: str): Searches for a file or directory by name.
 - create_or_delete_file(path: str): Creates or deletes a file at the given path.
 - scaffold_and_generate_files(framework: str, use_case: str, project_root: str): Scaffolds a project and generates files.
+- read_tool_output(handle: str, offset: int, length: int): Reads more of a tool output that was truncated; the truncated output says which handle and offset to use.
 
 If a user's query can be answered by any tool, you MUST call the tool. Do NOT answer in text if a tool is available. Always use the most relevant tool for the user's request.
 """
 
+@tool
+def read_tool_output(handle: str, offset: int = 0, length: int = 8000) -> str:
+    """
+    Read part of a tool output that was too long to return in full.
+
+    Args:
+        handle (str): The handle given in the truncated output.
+        offset (int): Character position to start reading from.
+        length (int): Number of characters to read.
+
+    Returns:
+        str: The requested characters, prefixed with their position in the output.
+    """
+    return get_tool_output_store().read(handle, offset, length)
+
+
 tools = [
+    read_tool_output,
     run_uvicorn_and_capture_logs,
     current_directory,
     change_directory,
@@ -1897,240 +1711,13 @@ def get_gemini_model():
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable is not set")
-    return RetryingChatGoogleGenerativeAI(
-        model="gemini-2.5-flash", api_key=api_key, max_tokens=100000
-    )
-
-
-def update_memory(state: AgentState, config: RunnableConfig, *, store: BaseStore):
-    """Update semantic memory with conversation context"""
-    user_id = config["configurable"].get("user_id", "default")
-    namespace = (user_id, "memories")
-
-    # Get the latest messages
-    messages = state["messages"]
-    if len(messages) >= 2:
-        # Store user-assistant interaction pairs
-        user_msg = messages[-2] if isinstance(messages[-2], HumanMessage) else None
-        ai_msg = messages[-1] if isinstance(messages[-1], AIMessage) else None
-
-        if user_msg and ai_msg:
-            memory_id = str(uuid.uuid4())
-            memory_content = {
-                "memory": f"User asked: {user_msg.content} | Assistant responded: {ai_msg.content[:200]}...",
-                "context": "conversation",
-                "user_query": user_msg.content,
-                "ai_response": ai_msg.content,
-                "timestamp": str(
-                    uuid.uuid4()
-                ),  # You might want to use actual timestamp
-            }
-
-            # Store the memory with semantic indexing
-            store.put(
-                namespace,
-                memory_id,
-                memory_content,
-                index=["memory", "context", "user_query"],  # Fields to embed
-            )
-
-    return state
-
-
-def retrieve_and_enhance_context(
-    state: AgentState, config: RunnableConfig, *, store: BaseStore
-):
-    """Retrieve relevant memories and enhance the context"""
-    user_id = config["configurable"].get("user_id", "default")
-    namespace = (user_id, "memories")
-
-    # Get the latest user message
-    latest_message = state["messages"][-1]
-    if isinstance(latest_message, HumanMessage):
-        query = latest_message.content
-
-        # Search for relevant memories
-        memories = store.search(
-            namespace,
-            query=query,
-            limit=5,  # Get top 5 relevant memories
-        )
-
-        if memories:
-            # Extract memory information
-            memory_context = []
-            for memory in memories:
-                memory_data = memory.value
-                memory_context.append(
-                    f"Previous context: {memory_data.get('memory', '')}"
-                )
-
-            # Create enhanced context message
-            context_info = "\n".join(memory_context)
-            enhanced_query = f"""Based on our previous conversations:
-{context_info}
-
-Current question: {query}
-
-Please respond considering our conversation history and any relevant context from previous interactions."""
-
-            # Replace the latest message with enhanced context
-            enhanced_messages = state["messages"][:-1] + [
-                HumanMessage(content=enhanced_query)
-            ]
-
-            return {"messages": enhanced_messages}
-
-    return state
-
-
-def enhanced_tool_calling_llm(
-    state: AgentState, config: RunnableConfig, *, store: BaseStore
-):
-    """Enhanced LLM call that considers semantic memory and always prepends the SYSTEM_PROMPT."""
-    # First retrieve relevant context
-    enhanced_state = retrieve_and_enhance_context(state, config, store=store)
-
-    # Always prepend SYSTEM_PROMPT as the first message
-    messages = enhanced_state["messages"]
-    # Remove any previous system messages
-    messages = [
-        msg
-        for msg in messages
-        if not (hasattr(msg, "role") and getattr(msg, "role", None) == "system")
-    ]
-    # Prepend SYSTEM_PROMPT
-    messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
-
-    # Create model and bind tools when needed
-    gemini_model = get_gemini_model()
-    llm_with_tool = gemini_model.bind_tools(tools)
-    response = llm_with_tool.invoke(messages)
-
-    return {"messages": [response]}
-
-
-builder = StateGraph(AgentState)
-
-
-builder.add_node("enhanced_llm", enhanced_tool_calling_llm)
-builder.add_node("update_memory", update_memory)
-builder.add_node("tools", ToolNode(tools))
-
-
-builder.add_edge(START, "enhanced_llm")
-
-builder.add_conditional_edges(
-    "enhanced_llm", tools_condition, {"tools": "tools", "__end__": "update_memory"}
-)
-builder.add_edge("tools", "enhanced_llm")
-builder.add_edge("update_memory", END)
-
-
-checkpointer = InMemorySaver()
-
-semantic_graph = builder.compile(checkpointer=checkpointer, store=semantic_memory_store)
-
-
-def run_agent_with_memory(query: str, user_id: str = "default", thread_id: str = None):
-    """Run the agent with semantic memory"""
-    if thread_id is None:
-        thread_id = str(uuid.uuid4())
-
-    config = {
-        "configurable": {"thread_id": thread_id, "user_id": user_id},
-        "recursion_limit": 100,
-    }
-
-    output_buffer = ""
-
-    # Show progress bar while processing
-    with Progress(
-        SpinnerColumn(),
-        "[progress.description]{task.description}",
-        BarColumn(),
-        TimeElapsedColumn(),
-        console=console,
-        transient=True,  # This makes the progress bar disappear after completion
-    ) as progress:
-        task = progress.add_task("[cyan]Initializing AI agent...", total=None)
-
-        # Update progress to show memory retrieval
-        progress.update(task, description="[yellow]Retrieving relevant memories...")
-
-        for chunk, metadata in semantic_graph.stream(
-            {"messages": [HumanMessage(content=query)]},
-            config=config,
-            stream_mode="messages",
-        ):
-            if hasattr(chunk, "content") and chunk.content:
-                # Update progress when we start receiving content
-                if not output_buffer:
-                    progress.update(task, description="[green]Receiving AI response...")
-                output_buffer += chunk.content  # Accumulate output
-
-        # Stop the progress bar after processing is complete
-        progress.stop()
-
-    if output_buffer.strip():
-        (output_buffer.strip())
-
-
-def search_memories(user_id: str, query: str, limit: int = 5):
-    """Search memories for a specific user"""
-    namespace = (user_id, "memories")
-
-    # Show progress for memory search
-    with Progress(
-        SpinnerColumn(),
-        "[progress.description]{task.description}",
-        BarColumn(),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
-        memories = semantic_memory_store.search(namespace, query=query, limit=limit)
-
-    print(f"\nFound {len(memories)} relevant memories for query: '{query}'")
-    for i, memory in enumerate(memories, 1):
-        memory_data = memory.value
-        print(f"\nMemory {i}:")
-        print(f"Content: {memory_data.get('memory', 'N/A')}")
-        print(f"Context: {memory_data.get('context', 'N/A')}")
-        print(f"Created: {memory.created_at}")
-
-
-if __name__ == "_main_":
-    print_welcome_banner()
-
-    # Get user ID for session
-    user_id = str(uuid.uuid4())
-    thread_id = str(uuid.uuid4())
-
-    while True:
-        query = input("\nEnter your query : ")
-        if query.lower() in {"bye", "exit"}:
-            show_info("Exiting interactive agent loop.")
-            break
-
-        if query.startswith("search:"):
-            search_query = query[7:].strip()
-            search_memories(user_id, search_query)
-            continue
-
-        run_agent_with_memory(query, user_id, thread_id)
-# --- Console ---
-console = Console()
-
-# --- Your tools ---
-
-
-class AgentState(MessagesState):
-    documents: list[str]
+    return initialize_gemini_2_flash(api_key)
 
 
 def validate_google_api_key(api_key: str) -> bool:
     try:
-        model = RetryingChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key)
+        # The validated client is the one the session goes on to use.
+        model = initialize_gemini_2_flash(api_key)
         response = model.invoke(["Hello"])  # Simple call
         return True
     except Exception as e:
@@ -2138,15 +1725,7 @@ def validate_google_api_key(api_key: str) -> bool:
         return False
 
 
-def print_agent_response(text: str, title: str = "BlitzCoder"):
-    """Display agent output inside a Rich panel box with orange color"""
-    console.print(
-        Panel.fit(
-            Markdown(text),
-            title=f"[bold orange1]{title}[/bold orange1]",
-            border_style="orange1",
-        )
-    )
+MAX_MEMORY_RESPONSE_CHARS = 4000
 
 
 def update_memory(state: AgentState, config: RunnableConfig, *, store: BaseStore):
@@ -2164,10 +1743,10 @@ def update_memory(state: AgentState, config: RunnableConfig, *, store: BaseStore
                 "memory": f"User asked: {user_msg.content} | Assistant responded: {ai_msg.content[:200]}...",
                 "context": "conversation",
                 "user_query": user_msg.content,
-                "ai_response": ai_msg.content,
-                "timestamp": str(
-                    uuid.uuid4()
-                ),  # Replace with actual timestamp if needed
+                # Memories are kept for a long time; long answers (generated
+                # files, logs) are cut so each one stays small.
+                "ai_response": ai_msg.content[:MAX_MEMORY_RESPONSE_CHARS],
+                "timestamp": datetime.now(timezone.utc).isoformat(),
             }
 
             store.put(
@@ -2189,7 +1768,11 @@ def retrieve_and_enhance_context(
 
     if isinstance(latest_message, HumanMessage):
         query = latest_message.content
-        memories = store.search(namespace, query=query, limit=5)
+        # Hybrid (vector + BM25) search, then MMR within a token budget: a few
+        # distinct memories instead of five near-copies of the same one.
+        with span("retrieve_context_memories", "memory") as attrs:
+            memories = retrieve_context_memories(store, namespace, query)
+            attrs["results"] = len(memories)
         if memories:
             memory_context = [
                 f"Previous context: {memory.value.get('memory', '')}"
@@ -2211,6 +1794,45 @@ Please respond considering our conversation history and any relevant context fro
     return state
 
 
+HISTORY_SUMMARY_PROMPT = """You are maintaining a running summary of a coding session.
+
+Summary so far:
+{summary}
+
+Newer part of the conversation:
+{transcript}
+
+Rewrite the summary so it also covers the newer part. Keep the user's goals, decisions,
+file paths, commands and errors that may matter later; drop chit-chat and raw tool output.
+Use at most 300 words of plain text."""
+
+
+def summarize_history(summary: str, messages) -> str:
+    """Fold messages dropped from the context window into the running summary"""
+    transcript = "\n".join(
+        f"{message.type}: {message_text(message)[:2000]}" for message in messages
+    )
+    prompt = HISTORY_SUMMARY_PROMPT.format(summary=summary or "(none)", transcript=transcript)
+    # nostream: the summary is bookkeeping, not part of the streamed answer.
+    with llm_lane(BACKGROUND):
+        response = get_gemini_model().invoke(prompt, config={"tags": [TAG_NOSTREAM]})
+    return response.content
+
+
+def manage_history(state: AgentState):
+    """Stub old tool outputs and fold old turns into the summary to stay in budget"""
+    summary = state.get("summary", "")
+    updates, new_summary = get_history_manager(summarize_history).compact(
+        state["messages"], summary, SYSTEM_PROMPT
+    )
+    changes = {}
+    if updates:
+        changes["messages"] = updates
+    if new_summary != summary:
+        changes["summary"] = new_summary
+    return changes
+
+
 def enhanced_tool_calling_llm(
     state: AgentState, config: RunnableConfig, *, store: BaseStore
 ):
@@ -2218,38 +1840,78 @@ def enhanced_tool_calling_llm(
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY is not set. Please provide it.")
 
-    gemini_model = RetryingChatGoogleGenerativeAI(
-        model="gemini-2.5-flash", api_key=api_key, max_tokens=100000
-    )
-
     enhanced_state = retrieve_and_enhance_context(state, config, store=store)
     messages = [
         msg
         for msg in enhanced_state["messages"]
         if not (hasattr(msg, "role") and getattr(msg, "role", None) == "system")
     ]
-    messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
-    llm_with_tool = gemini_model.bind_tools(tools)
+    system_prompt = SYSTEM_PROMPT
+    if state.get("summary"):
+        system_prompt += f"\nSummary of the earlier conversation:\n{state['summary']}\n"
+    messages = [SystemMessage(content=system_prompt)] + messages
+    # Bound once per client: the 20+ tool schemas are not re-converted per step.
+    llm_with_tool = get_llm_pool().bind_tools(initialize_gemini_2_flash(api_key), tools)
     response = llm_with_tool.invoke(messages)
     return {"messages": [response]}
 
 
-builder = StateGraph(AgentState)
-builder.add_node("enhanced_llm", enhanced_tool_calling_llm)
-builder.add_node("update_memory", update_memory)
-builder.add_node("tools", ToolNode(tools))
-builder.add_edge(START, "enhanced_llm")
-builder.add_conditional_edges(
-    "enhanced_llm", tools_condition, {"tools": "tools", "__end__": "update_memory"}
-)
-builder.add_edge("tools", "enhanced_llm")
-builder.add_edge("update_memory", END)
+semantic_graph = None
+
+
+def build_semantic_graph():
+    """Build and compile the agent graph against the semantic memory store"""
+    builder = StateGraph(AgentState)
+    builder.add_node("manage_history", manage_history)
+    builder.add_node("enhanced_llm", enhanced_tool_calling_llm)
+    builder.add_node("update_memory", update_memory)
+    # Long tool results are capped before they reach the history; the model
+    # pages through the rest with read_tool_output.
+    builder.add_node(
+        "tools",
+        CappedToolNode(
+            tools, output_store=get_tool_output_store(), uncapped={"read_tool_output"}
+        ),
+    )
+    # Every model call goes through the history manager first, including the
+    # ones after tool results come back.
+    builder.add_edge(START, "manage_history")
+    builder.add_edge("manage_history", "enhanced_llm")
+    builder.add_conditional_edges(
+        "enhanced_llm", tools_condition, {"tools": "tools", "__end__": "update_memory"}
+    )
+    builder.add_edge("tools", "manage_history")
+    builder.add_edge("update_memory", END)
+
+    return builder.compile(
+        checkpointer=get_checkpointer(), store=get_semantic_memory_store()
+    )
+
+
+def get_semantic_graph():
+    """Get the compiled agent graph, building it on first use"""
+    global semantic_graph
+    if semantic_graph is None:
+        semantic_graph = build_semantic_graph()
+    return semantic_graph
 
-checkpointer = InMemorySaver()
-semantic_graph = builder.compile(checkpointer=checkpointer, store=semantic_memory_store)
 
+def _next_step(node: str, update) -> str:
+    """What the agent does after `node` produced `update`, for the status line"""
+    if node == "enhanced_llm":
+        messages = (update or {}).get("messages") or []
+        calls = getattr(messages[-1], "tool_calls", None) if messages else None
+        if calls:
+            return "Running " + ", ".join(call["name"] for call in calls)
+        return "Saving to memory"
+    if node in ("manage_history", "tools"):
+        return "Thinking"
+    return node
 
-def run_agent_with_memory(query: str, user_id: str = "default", thread_id: str = None):
+
+def run_agent_with_memory(
+    query: str, user_id: str = "default", thread_id: str = None, show_stats: bool = False
+):
     if thread_id is None:
         thread_id = str(uuid.uuid4())
 
@@ -2257,109 +1919,53 @@ def run_agent_with_memory(query: str, user_id: str = "default", thread_id: str =
         "configurable": {"thread_id": thread_id, "user_id": user_id},
         "recursion_limit": 100,
     }
-
-    output_buffer = ""
-
-    with Progress(
-        SpinnerColumn(),
-        "[progress.description]{task.description}",
-        BarColumn(),
-        TimeElapsedColumn(),
-        console=console,
-        transient=True,
-    ) as progress:
-        task = progress.add_task("[cyan]Initializing AI agent...", total=None)
-        progress.update(task, description="[yellow]Retrieving relevant memories...")
-
-        for chunk, metadata in semantic_graph.stream(
+    # With tracing on, every node, model call and tool call of the turn
+    # becomes a span (inherited through the config's callbacks).
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.start_turn(thread_id=thread_id, query_chars=len(query))
+        config["callbacks"] = [TelemetryCallbackHandler(tracer)]
+    try:
+        _stream_agent_reply(query, config)
+    finally:
+        if tracer is not None:
+            spans = tracer.end_turn()
+            if show_stats:
+                print_turn_summary(summarize_spans(spans), spans[-1].duration_s)
+
+
+def _stream_agent_reply(query: str, config: dict):
+    # Tokens are shown as they arrive; "updates" events tell which node or
+    # tool runs next.
+    with LiveResponse() as live:
+        live.set_status("Retrieving relevant memories")
+        for mode, payload in get_semantic_graph().stream(
             {"messages": [HumanMessage(content=query)]},
             config=config,
-            stream_mode="messages",
+            stream_mode=["messages", "updates"],
         ):
-            if hasattr(chunk, "content") and chunk.content:
-                if not output_buffer:
-                    progress.update(task, description="[green]Receiving AI response...")
-                output_buffer += chunk.content
-
-        progress.stop()
-
-    if output_buffer.strip():
-        print_agent_response(output_buffer.strip())
-
-
-@click.group()
-def cli():
-    """BlitzCoder CLI - AI-Powered Dev Assistant"""
-    pass
-
-
-@cli.command()
-@click.option("--google-api-key", help="Google API key for Gemini model")
-def chat(google_api_key):
-    """Start interactive chat with BlitzCoder AI agent."""
-    setup_api_keys()
-    
-    print_welcome_banner()
-    user_id = str(uuid.uuid4())
-    thread_id = str(uuid.uuid4())
-
-    while True:
-        query = Prompt.ask(
-            "[bold orange1]Enter your query[/bold orange1]", console=console
-        )
-        if query.lower() in {"bye", "exit"}:
-            show_info("Exiting interactive agent loop.")
-            break
-        if query.startswith("search:"):
-            search_query = query[7:].strip()
-            search_memories(user_id, search_query)
-            continue
-        run_agent_with_memory(query, user_id, thread_id)
-
-
-@cli.command()
-@click.option("--user-id", default=None, help="User ID for memory search")
-@click.option("--query", prompt="Search query", help="Query to search in memories")
-@click.option("--google-api-key", help="Google API key for Gemini model")
-def search_memories_cli(user_id, query, google_api_key):
-    """Search your agent memories."""
-    if google_api_key:
-        os.environ["GOOGLE_API_KEY"] = google_api_key
-        # Initialize Gemini 2.0 Flash model
-        try:
-            initialize_gemini_2_flash(google_api_key)
-            show_success("✅ Gemini 2.0 Flash model initialized successfully!")
-        except Exception as e:
-            show_error(f"❌ Failed to initialize Gemini 2.0 Flash model: {e}")
-            exit(1)
-    else:
-        console.print(
-            Panel.fit(
-                "[bold orange1]🔑 Google API Key Required[/bold orange1]\n\n"
-                "Please paste your API key below (input is hidden):",
-                border_style="red",
-            )
-        )
-        google_api_key = Prompt.ask(
-            "🔑 [bold green]Paste your API key[/bold green]", password=True
-        )
-        if validate_google_api_key(google_api_key):
-            os.environ["GOOGLE_API_KEY"] = google_api_key
-            # Initialize Gemini 2.0 Flash model
-            try:
-                initialize_gemini_2_flash(google_api_key)
-                show_success("✅ Gemini 2.5 Flash model initialized successfully!")
-            except Exception as e:
-                show_error(f"❌ Failed to initialize Gemini 2.0 Flash model: {e}")
-                exit(1)
-        else:
-            console.print("[bold red]❌ Invalid API key. Please try again.[/bold red]")
-            exit(1)
+            if mode == "updates":
+                for node, update in payload.items():
+                    live.set_status(_next_step(node, update))
+                continue
+            chunk, metadata = payload
+            # Only the agent model's text: model calls made inside tools
+            # (file generation, the streamed plan) stream here too, tagged
+            # with the tools node. Tool results show up as status changes.
+            if (
+                metadata.get("langgraph_node") == "enhanced_llm"
+                and isinstance(chunk, AIMessageChunk)
+                and isinstance(chunk.content, str)
+                and chunk.content
+            ):
+                live.set_status("Writing response")
+                live.append(chunk.content)
 
-    if not user_id:
-        user_id = str(uuid.uuid4())
-    search_memories(user_id, query)
+    if live.text.strip():
+        print_agent_response(live.text.strip())
 
 
 if __name__ == "__main__":
+    from blitzcoder.cli.main import cli
+
     cli()
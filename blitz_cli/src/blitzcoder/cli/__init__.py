@@ -4,7 +4,7 @@ BlitzCoder CLI - AI-Powered Development Assistant
 A command-line interface for AI-powered code generation, refactoring, and project management.
 """
 
-from .cli_coder import cli, run_agent_with_memory, search_memories_cli
+from .main import cli, search_memories_cli
 
 __version__ = "1.0.0"
 __author__ = "BlitzCoder Team"
@@ -15,3 +15,12 @@ __all__ = [
     "run_agent_with_memory", 
     "search_memories_cli"
 ]
+
+
+def __getattr__(name):
+    # The agent runtime pulls in langgraph/langchain, so only load it on demand.
+    if name == "run_agent_with_memory":
+        from .CLI_coder import run_agent_with_memory
+
+        return run_agent_with_memory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
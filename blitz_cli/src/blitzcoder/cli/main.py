@@ -0,0 +1,127 @@
+"""
+BlitzCoder CLI entry point.
+
+Only click is imported at module level so that ``blitzcoder --help`` stays fast.
+Each command imports the pieces it needs (the agent graph, the memory store,
+the Rich UI helpers) when it actually runs.
+"""
+
+import os
+import uuid
+
+import click
+
+
+@click.group()
+def cli():
+    """BlitzCoder CLI - AI-Powered Dev Assistant"""
+    pass
+
+
+@cli.command()
+@click.option("--google-api-key", help="Google API key for Gemini model")
+@click.option(
+    "--resume",
+    "resume_thread",
+    metavar="THREAD_ID",
+    default=None,
+    help="Continue a previous conversation thread",
+)
+@click.option(
+    "--stats",
+    is_flag=True,
+    help="After each turn, show where its time and tokens went",
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Append a JSON line per node, model call and tool call to this file",
+)
+def chat(google_api_key, resume_thread, stats, trace_file):
+    """Start interactive chat with BlitzCoder AI agent."""
+    from blitzcoder.memory import get_embedding_provider
+
+    # Load the embedding model in the background while the agent runtime is
+    # imported and the API keys/banner are handled, so the first query doesn't
+    # wait for it.
+    get_embedding_provider().warm_up()
+
+    from rich.prompt import Prompt
+
+    from .ui import console, print_welcome_banner, show_error, show_info
+    from .memory import get_checkpointer, search_memories
+    from .CLI_coder import setup_api_keys, run_agent_with_memory
+
+    from blitzcoder.llm import configure_rate_limits_from_settings
+    from blitzcoder.paths import get_local_user_id
+
+    setup_api_keys()
+    configure_rate_limits_from_settings()
+
+    if stats or trace_file:
+        from blitzcoder.telemetry import Tracer, set_tracer
+
+        set_tracer(Tracer(trace_file))
+
+    print_welcome_banner()
+    # Memories are keyed by a per-machine id so they carry over between runs;
+    # the conversation thread is new each time unless --resume names one.
+    user_id = get_local_user_id()
+    thread_id = None
+    if resume_thread:
+        saved = get_checkpointer().get_tuple(
+            {"configurable": {"thread_id": resume_thread}}
+        )
+        if saved is None:
+            show_error(f"No saved conversation {resume_thread}; starting a new one.")
+        else:
+            thread_id = resume_thread
+            messages = saved.checkpoint["channel_values"].get("messages", [])
+            show_info(f"Resumed conversation {thread_id} ({len(messages)} messages).")
+    if thread_id is None:
+        thread_id = str(uuid.uuid4())
+        show_info(f"Conversation {thread_id} (continue it later with --resume {thread_id}).")
+
+    while True:
+        query = Prompt.ask(
+            "[bold orange1]Enter your query[/bold orange1]", console=console
+        )
+        if query.lower() in {"bye", "exit"}:
+            show_info("Exiting interactive agent loop.")
+            break
+        if query.startswith("search:"):
+            search_query = query[7:].strip()
+            search_memories(user_id, search_query)
+            continue
+        run_agent_with_memory(query, user_id, thread_id, show_stats=stats)
+
+
+@cli.command()
+@click.option(
+    "--user-id", default=None, help="User ID for memory search (defaults to this machine's)"
+)
+@click.option("--query", prompt="Search query", help="Query to search in memories")
+@click.option("--google-api-key", help="Google API key for Gemini model")
+def search_memories_cli(user_id, query, google_api_key):
+    """Search your agent memories."""
+    # Memory search runs on the local embedding model, so the Gemini client
+    # (and its key validation round-trip) is not needed here.
+    from blitzcoder.memory import get_embedding_provider
+
+    get_embedding_provider().warm_up()
+
+    from .memory import search_memories
+
+    if google_api_key:
+        os.environ["GOOGLE_API_KEY"] = google_api_key
+
+    if not user_id:
+        from blitzcoder.paths import get_local_user_id
+
+        user_id = get_local_user_id()
+    search_memories(user_id, query)
+
+
+if __name__ == "__main__":
+    cli()
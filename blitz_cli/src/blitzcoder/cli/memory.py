@@ -0,0 +1,158 @@
+import atexit
+
+from rich.progress import Progress, SpinnerColumn, BarColumn, TimeElapsedColumn
+
+from blitzcoder.settings import get_setting as _setting
+
+from .ui import console
+
+# Built on first use so that importing the CLI never loads langgraph or the model.
+semantic_memory_store = None
+checkpointer = None
+history_manager = None
+tool_output_store = None
+
+
+def _store_options() -> dict:
+    """Index, retention and ranking options for the memory store"""
+    from blitzcoder.memory import RetentionPolicy
+
+    options = {
+        "vector_dtype": _setting("memory_vector_dtype", "float32"),
+        "rerank_factor": _setting("memory_rerank_factor", 4),
+        "lexical_weight": _setting("memory_lexical_weight", 0.3),
+        "retention": RetentionPolicy(
+            max_items=_setting("memory_size", 1000),
+            eviction=_setting("memory_eviction_policy", "lru"),
+            dedup_threshold=_setting("memory_dedup_threshold", 0.95),
+            half_life_days=_setting("memory_recency_half_life_days", 30.0),
+            recency_weight=_setting("memory_recency_weight", 0.3),
+        ),
+    }
+    if _setting("memory_ann_enabled", False):
+        options["ann_nprobe"] = _setting("memory_ann_nprobe", 8)
+        options["ann_min_size"] = _setting("memory_ann_min_size", 10000)
+    return options
+
+
+def retrieve_context_memories(store, namespace, query: str):
+    """Relevant, non-redundant memories for a turn, within the context token budget"""
+    from blitzcoder.memory import retrieve_memories
+
+    return retrieve_memories(
+        store,
+        namespace,
+        query,
+        limit=5,
+        token_budget=_setting("memory_context_token_budget", 800),
+        mmr_lambda=_setting("memory_mmr_lambda", 0.7),
+    )
+
+
+def get_semantic_memory_store():
+    """Get the semantic memory store, creating it on first use"""
+    global semantic_memory_store
+    if semantic_memory_store is None:
+        from blitzcoder.memory import (
+            DEFAULT_DIMS,
+            BackgroundWriteStore,
+            IndexingPolicy,
+            PolicyIndexedStore,
+            get_embedding_provider,
+            open_default_store,
+        )
+
+        index = {
+            "embed": get_embedding_provider(),
+            "dims": DEFAULT_DIMS,
+            "fields": ["memory", "$"],  # Fields to embed
+        }
+        # Memories persist in the data directory so later runs (and
+        # search-memories-cli) see them; fall back to RAM if it can't be opened.
+        store = open_default_store(index, **_store_options())
+        if store is None:
+            from langgraph.store.memory import InMemoryStore
+
+            store = InMemoryStore(index=index)
+        # update_memory asks for ["memory", "context", "user_query"]; "context" is
+        # always "conversation" and user_query is part of "memory", so the policy
+        # brings that down to a single embedding per turn.
+        store = PolicyIndexedStore(store, IndexingPolicy(skip_fields=("context",)))
+        # update_memory's puts are embedded and written by a background thread,
+        # so a turn ends without waiting for memory indexing.
+        semantic_memory_store = BackgroundWriteStore(store)
+        atexit.register(semantic_memory_store.close)
+    return semantic_memory_store
+
+
+def get_checkpointer():
+    """Get the chat checkpointer, opening it on first use"""
+    global checkpointer
+    if checkpointer is None:
+        from blitzcoder.memory import open_default_checkpointer
+
+        # Threads persist in the data directory so `chat --resume` can pick
+        # them up; fall back to RAM if the file can't be opened.
+        checkpointer = open_default_checkpointer(
+            keep_last=_setting("checkpoint_keep_last", 10)
+        )
+        if checkpointer is None:
+            from langgraph.checkpoint.memory import InMemorySaver
+
+            checkpointer = InMemorySaver()
+    return checkpointer
+
+
+def get_history_manager(summarize=None):
+    """Get the conversation history manager, creating it on first use"""
+    global history_manager
+    if history_manager is None:
+        from blitzcoder.memory import HistoryManager
+
+        history_manager = HistoryManager(
+            token_budget=_setting("history_token_budget", 32000),
+            keep_turns=_setting("history_keep_turns", 3),
+            provider=_setting("history_token_provider", "google"),
+            summarize=summarize,
+        )
+    return history_manager
+
+
+def get_tool_output_store():
+    """Get the store for oversized tool outputs, creating it on first use"""
+    global tool_output_store
+    if tool_output_store is None:
+        import os
+
+        from blitzcoder.memory import ToolOutputStore
+        from blitzcoder.paths import get_data_dir
+
+        tool_output_store = ToolOutputStore(
+            os.path.join(get_data_dir(), "tool_outputs"),
+            max_chars=_setting("tool_output_max_chars", 8000),
+            max_bytes=_setting("tool_output_store_mb", 256) * 2**20,
+        )
+    return tool_output_store
+
+
+def search_memories(user_id: str, query: str, limit: int = 5):
+    """Search memories for a specific user"""
+    namespace = (user_id, "memories")
+
+    # Show progress for memory search
+    with Progress(
+        SpinnerColumn(),
+        "[progress.description]{task.description}",
+        BarColumn(),
+        TimeElapsedColumn(),
+        console=console,
+    ) as progress:
+        memories = get_semantic_memory_store().search(namespace, query=query, limit=limit)
+
+    print(f"\nFound {len(memories)} relevant memories for query: '{query}'")
+    for i, memory in enumerate(memories, 1):
+        memory_data = memory.value
+        print(f"\nMemory {i}:")
+        print(f"Content: {memory_data.get('memory', 'N/A')}")
+        print(f"Context: {memory_data.get('context', 'N/A')}")
+        print(f"Created: {memory.created_at}")
@@ -0,0 +1,224 @@
+import os
+import time
+
+from rich.console import Console, Group
+from rich.tree import Tree
+from rich.panel import Panel
+from rich.markdown import Markdown
+from rich.syntax import Syntax
+from rich.progress import Progress, SpinnerColumn, BarColumn, TimeElapsedColumn
+from rich.text import Text
+from rich.live import Live
+from rich.spinner import Spinner
+from rich.table import Table
+
+
+console = Console()
+# Redraws per second of streamed replies; tokens arriving in between are
+# batched into the next frame.
+LIVE_FPS = 12
+
+def print_welcome_banner():
+    """Prints an enhanced welcome banner with instructions and capabilities."""
+    banner_text = Text(
+        """
+      ██████╗ ██╗     ██╗████████╗███████╗ ██████╗ ██████╗ ██████╗ ███████╗██████╗ 
+      ██╔══██╗██║     ██║╚══██╔══╝╚══███╔╝██╔════╝██╔═══██╗██╔══██╗██╔════╝██╔══██╗
+      ██████╔╝██║     ██║   ██║     ███╔╝ ██║     ██║   ██║██║  ██║█████╗  ██████╔╝
+      ██╔══██╗██║     ██║   ██║    ███╔╝  ██║     ██║   ██║██║  ██║██╔══╝  ██╔══██╗
+      ██████╔╝███████╗██║   ██║   ███████╗╚██████╗╚██████╔╝██████╔╝███████╗██║  ██║
+      ╚═════╝ ╚══════╝╚═╝   ╚═╝   ╚══════╝ ╚═════╝ ╚═════╝ ╚═════╝ ╚══════╝╚═╝  ╚═╝
+      """,
+        style="orange1",
+        justify="center",
+    )
+
+    welcome_message = Markdown("""
+### Welcome to BlitzCoder! Your AI-Powered Development Assistant.
+This tool leverages AI to help you with a wide range of development tasks, right from your terminal.
+
+---
+### Key Capabilities:
+*   **Project Scaffolding:** Generate entire, production-ready project structures for any framework.
+*   **Code Generation & Refactoring:** Write, explain, and refactor code in any language.
+*   **Secure Command Execution:** Run shell commands, linters (`ruff`), and installers (`pip`) in a secure, isolated sandbox.
+*   **Debugging Assistance:** Run servers (FastAPI, Node.js), capture logs, and get AI-powered suggestions for errors.
+*   **Filesystem Operations:** Navigate your codebase, inspect files, and manage your project directory.
+*   **Semantic Memory:** Remembers the context of your conversation for more relevant assistance over time.
+
+---
+### How to Use:
+Simply type your request in plain English. Here are some examples:
+- `scaffold a new go project for a REST API with Fiber`
+- `run the ruff formatter on my current directory`
+- `explain the code in src/main.py`
+- `search: what was the database model we discussed earlier?`
+""")
+    
+    panel_content = Group(banner_text, welcome_message)
+
+    panel = Panel(
+        panel_content,
+        title="[bold orange1]⚡ BLITZCODER CLI[/bold orange1]",
+        subtitle="[orange1]AI-Powered Dev Assistant[/orange1]",
+        border_style="orange1",
+        width=140,
+        expand=True,
+        padding=(2, 2),
+    )
+    console.print(panel)
+
+
+def show_success(msg):
+    console.print(Panel(f"[green]✅ {msg}", title="Success", style="green"))
+
+
+def show_error(msg):
+    console.print(Panel(f"[red]❌ {msg}", title="Error", style="red"))
+
+
+def show_info(msg):
+    console.print(f"[cyan]{msg}[/cyan]")
+
+
+def print_agent_response(text: str, title: str = "BlitzCoder"):
+    """Display agent output inside a Rich panel box with orange color"""
+    console.print(
+        Panel.fit(
+            Markdown(text),
+            title=f"[bold orange1]{title}[/bold orange1]",
+            border_style="orange1",
+        )
+    )
+
+
+def show_code(code: str, lang: str = "python"):
+    syntax = Syntax(code, lang, theme="monokai", line_numbers=True)
+    console.print(syntax)
+
+
+def build_rich_tree(root_path: str) -> Tree:
+    root_name = os.path.basename(os.path.abspath(root_path))
+    tree = Tree(f"📁 [bold blue]{root_name}[/bold blue]")
+
+    def add_nodes(directory: str, branch: Tree):
+        try:
+            for entry in sorted(os.listdir(directory)):
+                full_path = os.path.join(directory, entry)
+                if os.path.isdir(full_path):
+                    sub_branch = branch.add(f"📁 [bold]{entry}[/bold]")
+                    add_nodes(full_path, sub_branch)
+                else:
+                    branch.add(f"📄 {entry}")
+        except PermissionError:
+            branch.add("[red]Permission Denied[/red]")
+
+    add_nodes(root_path, tree)
+    return tree
+
+
+def simulate_progress(task_desc: str):
+    with Progress(
+        SpinnerColumn(),
+        "[progress.description]{task.description}",
+        BarColumn(),
+        TimeElapsedColumn(),
+    ) as progress:
+        task = progress.add_task(f"[green]{task_desc}", total=100)
+        while not progress.finished:
+            progress.update(task, advance=5)
+            time.sleep(0.05)
+
+
+class LiveResponse:
+    """
+    Shows an agent reply while it streams: the tail of the text that fits on
+    screen, and below it the step that is running with its elapsed time.
+    Appending is just string concatenation; the screen is redrawn by rich's
+    refresh thread at most `fps` times a second, however fast tokens come.
+    The live view is transient, so print the final reply once it is done.
+    """
+
+    def __init__(self, title: str = "BlitzCoder", fps: int = LIVE_FPS):
+        self.title = title
+        self.fps = fps
+        self.text = ""
+        self.status = "Starting"
+        self.started = self.step_started = time.monotonic()
+        self._spinner = Spinner("dots")
+        self._live = None
+
+    def __enter__(self):
+        self._live = Live(
+            self, console=console, refresh_per_second=self.fps, transient=True
+        )
+        self._live.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._live.__exit__(*exc)
+
+    def append(self, text: str):
+        self.text += text
+
+    def set_status(self, status: str):
+        if status != self.status:
+            self.status = status
+            self.step_started = time.monotonic()
+
+    def _tail(self) -> str:
+        lines = self.text.splitlines()
+        keep = max(console.height - 6, 5)
+        if len(lines) <= keep:
+            return self.text
+        head, tail = lines[:-keep], lines[-keep:]
+        # Reopen a code block the cut landed in, so the tail still renders as code.
+        opened = sum(line.lstrip().startswith("```") for line in head) % 2
+        return ("```\n" if opened else "") + "\n".join(tail)
+
+    def __rich__(self):
+        now = time.monotonic()
+        self._spinner.update(
+            text=Text.from_markup(
+                f"[cyan]{self.status}[/cyan] {now - self.step_started:4.1f}s "
+                f"[dim](total {now - self.started:.1f}s)[/dim]"
+            )
+        )
+        if not self.text:
+            return self._spinner
+        reply = Panel(
+            Markdown(self._tail()),
+            title=f"[bold orange1]{self.title}[/bold orange1]",
+            border_style="orange1",
+        )
+        return Group(reply, self._spinner)
+
+
+def print_turn_summary(rows, total_s: float):
+    """Where the time of a turn went, one row per node, model, tool or memory step"""
+    table = Table(
+        title=f"Turn took {total_s:.2f}s",
+        title_style="dim",
+        header_style="bold cyan",
+        box=None,
+        pad_edge=False,
+    )
+    table.add_column("kind", style="dim")
+    table.add_column("name")
+    for column in ("calls", "time", "tokens in", "tokens out", "retries", "bytes"):
+        table.add_column(column, justify="right")
+    for row in rows:
+        calls = str(row["calls"])
+        if row["errors"]:
+            calls += f" [red]({row['errors']} failed)[/red]"
+        table.add_row(
+            row["kind"],
+            row["name"],
+            calls,
+            f"{row['seconds']:.2f}s",
+            f"{row['tokens_in']:,}" if row["tokens_in"] else "",
+            f"{row['tokens_out']:,}" if row["tokens_out"] else "",
+            str(row["retries"]) if row["retries"] else "",
+            f"{row['bytes']:,}" if row["bytes"] else "",
+        )
+    console.print(table)
@@ -0,0 +1,55 @@
+"""
+BlitzCoder LLM Module
+
+Shared chat model clients and the plumbing around model calls.
+"""
+
+from .pool import DEFAULT_MAX_CLIENTS, LLMClientPool, get_llm_pool
+from .rate_limit import (
+    BACKGROUND,
+    INTERACTIVE,
+    AdaptiveRateLimiter,
+    RateLimitFeedback,
+    configure_rate_limits,
+    configure_rate_limits_from_settings,
+    get_rate_limiter,
+    in_lane,
+    llm_lane,
+    rate_limit_params,
+)
+from .streaming import STREAM_RESTART, ResumableStreamMixin, stream_totals
+from .structured import (
+    DEFAULT_REPAIR_ATTEMPTS,
+    StructuredOutputError,
+    invoke_structured,
+    repair_structured,
+    response_schema,
+    structured_generation_config,
+    structured_totals,
+)
+
+__all__ = [
+    "BACKGROUND",
+    "DEFAULT_MAX_CLIENTS",
+    "DEFAULT_REPAIR_ATTEMPTS",
+    "INTERACTIVE",
+    "STREAM_RESTART",
+    "AdaptiveRateLimiter",
+    "LLMClientPool",
+    "RateLimitFeedback",
+    "ResumableStreamMixin",
+    "StructuredOutputError",
+    "configure_rate_limits",
+    "configure_rate_limits_from_settings",
+    "get_llm_pool",
+    "get_rate_limiter",
+    "in_lane",
+    "invoke_structured",
+    "llm_lane",
+    "rate_limit_params",
+    "repair_structured",
+    "response_schema",
+    "stream_totals",
+    "structured_generation_config",
+    "structured_totals",
+]
@@ -0,0 +1,151 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from loguru import logger
+
+from .rate_limit import rate_limit_params
+
+DEFAULT_MAX_CLIENTS = 16
+
+ClientKey = Tuple[str, str, Optional[str], Hashable]
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable form of (possibly nested) sampling parameters"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _key_fingerprint(api_key: Optional[str]) -> Optional[str]:
+    # Keys are told apart by a digest so the secret itself never sits in the
+    # pool's keys (which end up in logs and reprs).
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else None
+
+
+def _tool_name(tool: Any) -> str:
+    return getattr(tool, "name", None) or getattr(tool, "__name__", repr(tool))
+
+
+class LLMClientPool:
+    """
+    Process-wide pool of chat model clients.
+
+    Clients are keyed by (provider, model, api key, sampling params) and
+    built once by the provider's registered factory, so every caller asking
+    for the same configuration shares one instance and with it the HTTP/gRPC
+    connection it keeps open. Runnables returned by `bind_tools` are cached
+    per pooled client and tool set, so tool schemas are converted once, not
+    on every call, and dropped with the client when it leaves the pool. The
+    `max_clients` most recently used clients are kept. Clients are built
+    with the shared rate limiter of their provider model unless
+    `rate_limiter` is passed explicitly.
+    """
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self.hits = 0
+        self.misses = 0
+        self._factories: Dict[str, Callable[..., BaseChatModel]] = {}
+        self._clients: "OrderedDict[ClientKey, BaseChatModel]" = OrderedDict()
+        self._bound: Dict[
+            Tuple[ClientKey, Hashable], Tuple[Sequence[Any], Runnable]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def register(self, provider: str, factory: Callable[..., BaseChatModel]):
+        """Use `factory(model=..., api_key=..., **params)` to build `provider` clients"""
+        with self._lock:
+            self._factories[provider] = factory
+
+    def get(
+        self, provider: str, model: str, api_key: Optional[str] = None, **params: Any
+    ) -> BaseChatModel:
+        """The shared client for this configuration, built on first use"""
+        key = (provider, model, _key_fingerprint(api_key), _freeze(params))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+            factory = self._factories.get(provider)
+            if factory is None:
+                raise ValueError(f"No LLM client factory registered for {provider!r}")
+            self.misses += 1
+            logger.debug(f"Creating {provider} client for {model}")
+            if "rate_limiter" not in params:
+                params = {**rate_limit_params(provider, model), **params}
+            client = factory(model=model, api_key=api_key, **params)
+            self._clients[key] = client
+            while len(self._clients) > self.max_clients:
+                evicted, _ = self._clients.popitem(last=False)
+                self._drop_bound(evicted)
+            return client
+
+    def _pool_key(self, client: BaseChatModel) -> Optional[ClientKey]:
+        # Called with _lock held; the pool is small, so a scan is cheap.
+        for key, pooled in self._clients.items():
+            if pooled is client:
+                return key
+        return None
+
+    def _drop_bound(self, client_key: ClientKey):
+        # Called with _lock held
+        for key in [key for key in self._bound if key[0] == client_key]:
+            del self._bound[key]
+
+    def bind_tools(
+        self, client: BaseChatModel, tools: Sequence[Any], **kwargs: Any
+    ) -> Runnable:
+        """
+        `client.bind_tools(tools, **kwargs)`, cached per pooled client and tool
+        set. A client not (or no longer) in the pool is bound uncached.
+        """
+        tool_key = (tuple(map(_tool_name, tools)), tuple(map(id, tools)))
+        with self._lock:
+            client_key = self._pool_key(client)
+            key = (client_key, (tool_key, _freeze(kwargs)))
+            cached = self._bound.get(key) if client_key is not None else None
+            if cached is not None:
+                return cached[1]
+        bound = client.bind_tools(tools, **kwargs)
+        with self._lock:
+            if client_key is not None and self._clients.get(client_key) is client:
+                # Keep the tools alive with the entry so their ids stay unique.
+                self._bound[key] = (tuple(tools), bound)
+        return bound
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._bound.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "bound": len(self._bound),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_pool: Optional[LLMClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool() -> LLMClientPool:
+    """Get the process-wide LLM client pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = LLMClientPool()
+    return _pool
@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+from loguru import logger
+
+# Priority lanes: a waiting interactive call always goes before a waiting
+# background one (scaffolding, summaries).
+INTERACTIVE = 0
+BACKGROUND = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+DEFAULT_REQUESTS_PER_MINUTE = 60.0
+DEFAULT_BURST = 4
+# Each 429 multiplies the rate by BACKOFF_FACTOR (down to MIN_RATE_SHARE of the
+# configured rate); each success adds RECOVERY_SHARE of it back.
+BACKOFF_FACTOR = 0.5
+MIN_RATE_SHARE = 0.05
+RECOVERY_SHARE = 0.05
+# Pause after a 429 that names no retry delay
+DEFAULT_PAUSE_S = 2.0
+MAX_PAUSE_S = 120.0
+
+_lane: ContextVar[int] = ContextVar("blitzcoder_llm_lane", default=INTERACTIVE)
+_RETRY_IN = re.compile(r"retry (?:in|after) ([\d.]+)\s*(ms|s)", re.IGNORECASE)
+_RETRY_DELAY = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)")
+
+
+def current_lane() -> int:
+    return _lane.get()
+
+
+@contextmanager
+def llm_lane(lane: int) -> Iterator[None]:
+    """Run model calls made in this block (and this thread/task) in `lane`"""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def in_lane(lane: int):
+    """Decorator form of `llm_lane`"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with llm_lane(lane):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception from any provider SDK is a 429"""
+    for attr in ("status_code", "code", "http_status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    name = type(error).__name__
+    return name in ("ResourceExhausted", "TooManyRequests") or "RateLimit" in name
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, if the error says"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value:
+        try:
+            return min(float(value), MAX_PAUSE_S)
+        except ValueError:
+            pass  # an HTTP date; fall through to the message
+    text = str(error)
+    match = _RETRY_DELAY.search(text)
+    if match:
+        return min(float(match.group(1)), MAX_PAUSE_S)
+    match = _RETRY_IN.search(text)
+    if match:
+        seconds = float(match.group(1)) / (1000 if match.group(2).lower() == "ms" else 1)
+        return min(seconds, MAX_PAUSE_S)
+    return None
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """
+    Token bucket shared by every call to one provider model.
+
+    Starts at `requests_per_minute` with `burst` tokens of headroom. A 429
+    halves the rate and stops all calls until the provider's retry delay has
+    passed (so one rate-limited call holds back the rest instead of each
+    backing off blindly); successes then raise it again step by step.
+    Waiters are served by lane, then in arrival order.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        burst: int = DEFAULT_BURST,
+        name: str = "llm",
+    ):
+        self.name = name
+        self.max_rate = requests_per_minute / 60.0
+        self.rate = self.max_rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.waited_s = 0.0
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, *, blocking: bool = True, lane: Optional[int] = None) -> bool:
+        ticket = (current_lane() if lane is None else lane, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    first = self._waiters[0] == ticket
+                    if first and now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        heapq.heappop(self._waiters)
+                        self.waited_s += now - start
+                        return True
+                    if not blocking:
+                        return False
+                    if first:
+                        delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            finally:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        # asyncio.to_thread copies the context, so the caller's lane applies.
+        return await asyncio.to_thread(self.acquire, blocking=blocking)
+
+    def on_success(self):
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_SHARE)
+
+    def on_rate_limited(self, delay: Optional[float] = None):
+        """Back off after a 429, for `delay` seconds if the provider gave one"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            self.rate = max(self.max_rate * MIN_RATE_SHARE, self.rate * BACKOFF_FACTOR)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, now + (delay or DEFAULT_PAUSE_S))
+            self._cond.notify_all()
+        logger.warning(
+            f"{self.name} rate limited; pausing {delay or DEFAULT_PAUSE_S:.1f}s, "
+            f"now {self.rate * 60:.1f} requests/min"
+        )
+
+    def record_error(self, error: BaseException):
+        if is_rate_limit_error(error):
+            self.on_rate_limited(retry_after(error))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waiting = {name: 0 for name in LANE_NAMES.values()}
+            for lane, _ in self._waiters:
+                waiting[LANE_NAMES.get(lane, str(lane))] += 1
+            return {
+                "requests_per_minute": round(self.rate * 60, 2),
+                "throttled": self.throttled,
+                "waited_s": round(self.waited_s, 3),
+                "waiting": waiting,
+            }
+
+
+class RateLimitFeedback(BaseCallbackHandler):
+    """Reports a model's successes and 429s back to its limiter"""
+
+    def __init__(self, limiter: AdaptiveRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response, **kwargs: Any):
+        self.limiter.on_success()
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any):
+        self.limiter.record_error(error)
+
+
+class wait_retry_after:
+    """tenacity wait: the provider's retry delay if it gave one, else `fallback`"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def __call__(self, retry_state) -> float:
+        outcome = retry_state.outcome
+        error = outcome.exception() if outcome is not None else None
+        delay = retry_after(error) if error is not None else None
+        return delay if delay is not None else self.fallback(retry_state)
+
+
+_limiters: Dict[Tuple[str, str], AdaptiveRateLimiter] = {}
+_limits = {"requests_per_minute": DEFAULT_REQUESTS_PER_MINUTE, "burst": DEFAULT_BURST}
+_limiters_lock = threading.Lock()
+
+
+def configure_rate_limits(
+    requests_per_minute: Optional[float] = None, burst: Optional[int] = None
+):
+    """Set the limits of limiters created from now on"""
+    with _limiters_lock:
+        if requests_per_minute is not None:
+            _limits["requests_per_minute"] = requests_per_minute
+        if burst is not None:
+            _limits["burst"] = burst
+
+
+def configure_rate_limits_from_settings():
+    """Apply `llm_requests_per_minute` and `llm_rate_limit_burst` from AgentSettings"""
+    from ..settings import get_setting
+
+    configure_rate_limits(
+        requests_per_minute=get_setting(
+            "llm_requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE
+        ),
+        burst=get_setting("llm_rate_limit_burst", DEFAULT_BURST),
+    )
+
+
+def get_rate_limiter(provider: str, model: str) -> AdaptiveRateLimiter:
+    """The process-wide limiter for one provider model"""
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(name=f"{provider}:{model}", **_limits)
+                _limiters[key] = limiter
+    return limiter
+
+
+def rate_limit_params(provider: str, model: str) -> Dict[str, Any]:
+    """Keyword arguments that put a LangChain chat model under the shared limiter"""
+    limiter = get_rate_limiter(provider, model)
+    return {"rate_limiter": limiter, "callbacks": [RateLimitFeedback(limiter)]}
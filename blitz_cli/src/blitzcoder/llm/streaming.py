@@ -0,0 +1,383 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Tuple, Type
+
+from langchain_core.language_models.chat_models import (
+    agenerate_from_stream,
+    generate_from_stream,
+)
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from loguru import logger
+
+from .rate_limit import is_rate_limit_error, retry_after
+
+DEFAULT_STREAM_ATTEMPTS = 5
+BACKOFF_MIN_S = 2.0
+BACKOFF_MAX_S = 60.0
+# A resumed reply is held back until this many characters have arrived, so
+# text the model repeats from before the cut can be recognised and dropped.
+OVERLAP_WINDOW = 200
+# Shorter matches between the old tail and the new head are coincidence.
+MIN_OVERLAP = 16
+# generation_info flag on an empty chunk: the reply starts over from here,
+# and what was streamed before it is to be discarded
+STREAM_RESTART = "stream_restart"
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off after the text above. Continue it from "
+    "exactly where it stopped, without repeating anything and without any "
+    "commentary."
+)
+
+_totals = {"streams": 0, "retries": 0, "resumed": 0, "ttft_s": 0.0}
+_totals_lock = threading.Lock()
+
+
+def stream_totals() -> Dict[str, float]:
+    """Streams, retries and resumes so far in this process, and the mean TTFT"""
+    with _totals_lock:
+        totals = dict(_totals)
+    streams = totals.pop("streams")
+    totals["streams"] = streams
+    totals["mean_ttft_s"] = round(totals.pop("ttft_s") / streams, 3) if streams else 0.0
+    return totals
+
+
+def _chunk_text(chunk: ChatGenerationChunk) -> str:
+    content = chunk.message.content
+    return content if isinstance(content, str) else chunk.text
+
+
+def _has_tool_calls(chunk: ChatGenerationChunk) -> bool:
+    return bool(getattr(chunk.message, "tool_call_chunks", None))
+
+
+def _is_restart(chunk: ChatGenerationChunk) -> bool:
+    return bool((chunk.generation_info or {}).get(STREAM_RESTART))
+
+
+async def _aiter(items: List) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+class _Stitcher:
+    """
+    Joins a resumed reply onto the text already emitted: the model may start
+    over from the beginning or repeat the tail before the cut, and either
+    way the repeated part is dropped.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.pending: List[ChatGenerationChunk] = []
+        self.text = ""
+        self.done = False
+
+    def feed(self, chunk: ChatGenerationChunk) -> Optional[ChatGenerationChunk]:
+        if self.done:
+            return chunk
+        self.pending.append(chunk)
+        self.text += _chunk_text(chunk)
+        replaying = self.prefix.startswith(self.text) and len(self.text) < len(self.prefix)
+        if replaying or len(self.text) < OVERLAP_WINDOW:
+            return None
+        return self.flush()
+
+    def _overlap(self) -> int:
+        if self.text.startswith(self.prefix):
+            return len(self.prefix)
+        if self.prefix.startswith(self.text):
+            return len(self.text)
+        # The shortest repeat wins: in periodic text (rows of similar code)
+        # longer matches exist too, and would drop lines that are new.
+        for k in range(MIN_OVERLAP, min(len(self.prefix), len(self.text)) + 1):
+            if self.prefix.endswith(self.text[:k]):
+                return k
+        return 0
+
+    def flush(self) -> Optional[ChatGenerationChunk]:
+        if self.done or not self.pending:
+            self.done = True
+            return None
+        self.done = True
+        merged = self.pending[0]
+        for chunk in self.pending[1:]:
+            merged = merged + chunk
+        if isinstance(merged.message.content, str):
+            merged.message.content = self.text[self._overlap() :]
+        self.pending = []
+        return merged
+
+
+class ResumableStreamMixin:
+    """
+    Chat model mixin whose `_stream` survives transient errors mid-reply.
+
+    The text already streamed is tracked. After an error the call is retried,
+    and if text had gone out, it is retried as a continuation of that text
+    instead of from scratch, with any repeated part dropped, so callers never
+    see a chunk twice. A reply that had already streamed tool calls cannot be
+    stitched and re-raises. Nor can one in JSON output mode (a response
+    schema or JSON mime type in `generation_config`), where the model only
+    sends whole documents: it is retried from scratch, after an empty chunk
+    flagged `stream_restart` in its generation info telling the caller to
+    drop what it got so far. The last chunk carries `stream_stats` (time to
+    first token, retries, resumed) in its generation info.
+
+    `invoke()` with a streaming callback handler streams through `_stream`
+    too, and keeps only the chunks after the last restart.
+
+    List the exceptions to retry in `stream_retry_on`; 429s always are.
+    """
+
+    stream_retry_on: ClassVar[Tuple[Type[BaseException], ...]] = ()
+    stream_max_attempts: ClassVar[int] = DEFAULT_STREAM_ATTEMPTS
+
+    def _should_retry_stream(self, error: BaseException, attempt: int) -> bool:
+        retryable = isinstance(error, self.stream_retry_on) or is_rate_limit_error(error)
+        return retryable and attempt < self.stream_max_attempts
+
+    def _stream_retry_delay(self, error: BaseException, attempt: int) -> float:
+        limiter = getattr(self, "rate_limiter", None)
+        if limiter is not None and hasattr(limiter, "record_error"):
+            limiter.record_error(error)
+            if is_rate_limit_error(error):
+                return 0.0  # the limiter holds every caller until the pause ends
+        delay = retry_after(error)
+        if delay is None:
+            delay = min(BACKOFF_MAX_S, BACKOFF_MIN_S * 2 ** (attempt - 1))
+        return delay
+
+    @staticmethod
+    def _can_resume(kwargs: Dict) -> bool:
+        # In JSON output mode the model only ever sends a whole document, so
+        # asked to continue it starts a second one.
+        config = kwargs.get("generation_config") or {}
+        if isinstance(config, dict):
+            schema = config.get("response_schema")
+            mime_type = config.get("response_mime_type")
+        else:
+            schema = getattr(config, "response_schema", None)
+            mime_type = getattr(config, "response_mime_type", None)
+        return not schema and mime_type != "application/json"
+
+    @staticmethod
+    def _restart_chunk() -> ChatGenerationChunk:
+        return ChatGenerationChunk(
+            message=AIMessageChunk(content=""),
+            generation_info={STREAM_RESTART: True},
+        )
+
+    def _should_stream(self, *, async_api: bool, run_manager=None, **kwargs) -> bool:
+        # stream() and astream() ask with stream=True and get _stream as is;
+        # invoke() with a streaming handler goes through _generate instead,
+        # which can drop what a restart discards.
+        if "stream" not in kwargs:
+            return False
+        return super()._should_stream(
+            async_api=async_api, run_manager=run_manager, **kwargs
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if not super()._should_stream(
+            async_api=False, run_manager=run_manager, **kwargs
+        ):
+            return super()._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+        chunks: List[ChatGenerationChunk] = []
+        for chunk in self._stream(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        ):
+            if _is_restart(chunk):
+                chunks.clear()
+            else:
+                chunks.append(chunk)
+        return generate_from_stream(iter(chunks))
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        if not super()._should_stream(
+            async_api=True, run_manager=run_manager, **kwargs
+        ):
+            return await super()._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+        chunks: List[ChatGenerationChunk] = []
+        async for chunk in self._astream(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        ):
+            if _is_restart(chunk):
+                chunks.clear()
+            else:
+                chunks.append(chunk)
+        return await agenerate_from_stream(_aiter(chunks))
+
+    def _resume_messages(
+        self, messages: List[BaseMessage], emitted: str
+    ) -> List[BaseMessage]:
+        if not emitted:
+            return messages
+        return [
+            *messages,
+            AIMessage(content=emitted),
+            HumanMessage(content=CONTINUE_PROMPT),
+        ]
+
+    @staticmethod
+    def _stats_chunk(
+        start: float,
+        first: Optional[float],
+        retries: int,
+        resumed: bool,
+        chars: int,
+        record: bool = True,
+    ) -> ChatGenerationChunk:
+        ttft = (first if first is not None else time.monotonic()) - start
+        stats = {
+            "ttft_s": round(ttft, 3),
+            "elapsed_s": round(time.monotonic() - start, 3),
+            "retries": retries,
+            "resumed": resumed,
+            "chars": chars,
+        }
+        if record:
+            with _totals_lock:
+                _totals["streams"] += 1
+                _totals["retries"] += retries
+                _totals["resumed"] += int(resumed)
+                _totals["ttft_s"] += ttft
+        if retries:
+            logger.debug(f"Stream finished after {retries} retries: {stats}")
+        return ChatGenerationChunk(
+            message=AIMessageChunk(content=""),
+            generation_info={"stream_stats": stats},
+        )
+
+    def _stream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        start, first = time.monotonic(), None
+        emitted, tool_calls, retries, resumed = "", False, 0, False
+        while True:
+            stitcher = _Stitcher(emitted) if emitted else None
+            try:
+                for chunk in super()._stream(
+                    # Tokens are reported here, once stitched, not by the provider.
+                    self._resume_messages(messages, emitted), stop=stop, **kwargs
+                ):
+                    if stitcher is not None:
+                        chunk = stitcher.feed(chunk)
+                        if chunk is None:
+                            continue
+                    if first is None:
+                        first = time.monotonic()
+                    emitted += _chunk_text(chunk)
+                    tool_calls = tool_calls or _has_tool_calls(chunk)
+                    if run_manager:
+                        run_manager.on_llm_new_token(_chunk_text(chunk), chunk=chunk)
+                    yield chunk
+                if stitcher is not None:
+                    chunk = stitcher.flush()
+                    if chunk is not None:
+                        emitted += _chunk_text(chunk)
+                        if run_manager:
+                            run_manager.on_llm_new_token(_chunk_text(chunk), chunk=chunk)
+                        yield chunk
+                break
+            except Exception as e:
+                retries += 1
+                if tool_calls or not self._should_retry_stream(e, retries):
+                    raise
+                delay = self._stream_retry_delay(e, retries)
+                restart = bool(emitted) and not self._can_resume(kwargs)
+                action = ", restarting" if restart else ", resuming" if emitted else ""
+                logger.warning(
+                    f"Stream interrupted after {len(emitted)} chars ({type(e).__name__}); "
+                    f"retry {retries} in {delay:.1f}s{action}"
+                )
+                if restart:
+                    # Start over; the caller drops what it got so far
+                    emitted = ""
+                    chunk = self._restart_chunk()
+                    if run_manager:
+                        run_manager.on_llm_new_token("", chunk=chunk)
+                    yield chunk
+                resumed = resumed or bool(emitted)
+                time.sleep(delay)
+                limiter = getattr(self, "rate_limiter", None)
+                if limiter is not None:
+                    limiter.acquire(blocking=True)
+        yield self._stats_chunk(start, first, retries, resumed, len(emitted))
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        start, first = time.monotonic(), None
+        emitted, tool_calls, retries, resumed = "", False, 0, False
+        nested = None
+        while True:
+            stitcher = _Stitcher(emitted) if emitted else None
+            try:
+                async for chunk in super()._astream(
+                    # Tokens are reported here, once stitched, not by the provider.
+                    self._resume_messages(messages, emitted), stop=stop, **kwargs
+                ):
+                    # Without a native async client, the default _astream runs
+                    # our own _stream in a thread; that one has already retried.
+                    stats = (chunk.generation_info or {}).get("stream_stats")
+                    if stats is not None:
+                        nested = stats
+                        continue
+                    if stitcher is not None:
+                        chunk = stitcher.feed(chunk)
+                        if chunk is None:
+                            continue
+                    if first is None:
+                        first = time.monotonic()
+                    # A restart from the nested _stream starts the text over too
+                    emitted = "" if _is_restart(chunk) else emitted + _chunk_text(chunk)
+                    tool_calls = tool_calls or _has_tool_calls(chunk)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(_chunk_text(chunk), chunk=chunk)
+                    yield chunk
+                if stitcher is not None:
+                    chunk = stitcher.flush()
+                    if chunk is not None:
+                        emitted += _chunk_text(chunk)
+                        if run_manager:
+                            await run_manager.on_llm_new_token(_chunk_text(chunk), chunk=chunk)
+                        yield chunk
+                break
+            except Exception as e:
+                retries += 1
+                if tool_calls or not self._should_retry_stream(e, retries):
+                    raise
+                delay = self._stream_retry_delay(e, retries)
+                restart = bool(emitted) and not self._can_resume(kwargs)
+                action = ", restarting" if restart else ", resuming" if emitted else ""
+                logger.warning(
+                    f"Stream interrupted after {len(emitted)} chars ({type(e).__name__}); "
+                    f"retry {retries} in {delay:.1f}s{action}"
+                )
+                if restart:
+                    # Start over; the caller drops what it got so far
+                    emitted = ""
+                    chunk = self._restart_chunk()
+                    if run_manager:
+                        await run_manager.on_llm_new_token("", chunk=chunk)
+                    yield chunk
+                resumed = resumed or bool(emitted)
+                await asyncio.sleep(delay)
+                limiter = getattr(self, "rate_limiter", None)
+                if limiter is not None:
+                    await limiter.aacquire(blocking=True)
+        if nested is not None:
+            retries += nested["retries"]
+            resumed = resumed or nested["resumed"]
+        yield self._stats_chunk(
+            start, first, retries, resumed, len(emitted), record=nested is None
+        )
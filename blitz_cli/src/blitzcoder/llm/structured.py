@@ -0,0 +1,189 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.utils.json_schema import dereference_refs
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+from blitzcoder.telemetry import span
+
+DEFAULT_REPAIR_ATTEMPTS = 2
+# Validation errors listed in a repair prompt, at most
+MAX_REPAIR_ERRORS = 20
+REPAIR_PROMPT = (
+    "Your JSON above does not match the required schema:\n{errors}\n\n"
+    "Return the complete corrected JSON object only, changing only what these "
+    "errors require."
+)
+
+# JSON Schema keywords Gemini's response schema understands, and its names
+# for them
+_SCHEMA_KEYS = {
+    "description": "description",
+    "enum": "enum",
+    "required": "required",
+    "minItems": "min_items",
+    "maxItems": "max_items",
+    "minimum": "minimum",
+    "maximum": "maximum",
+}
+_FENCE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+_totals = {"calls": 0, "repairs": 0, "failures": 0}
+_totals_lock = threading.Lock()
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class StructuredOutputError(ValueError):
+    """A structured reply still failed validation after its repairs"""
+
+
+def structured_totals() -> Dict[str, float]:
+    """Structured calls, repairs and failures so far in this process"""
+    with _totals_lock:
+        totals: Dict[str, float] = dict(_totals)
+    calls = totals["calls"]
+    totals["repair_rate"] = round(totals["repairs"] / calls, 3) if calls else 0.0
+    return totals
+
+
+def _convert(schema: Dict[str, Any]) -> Dict[str, Any]:
+    variants = schema.get("anyOf")
+    if variants:
+        # Optional[X] is anyOf [X, null]; other unions keep their first type
+        present = [v for v in variants if v.get("type") != "null"]
+        rest = {k: v for k, v in schema.items() if k != "anyOf"}
+        converted = _convert({**present[0], **rest})
+        if len(present) < len(variants):
+            converted["nullable"] = True
+        return converted
+    converted: Dict[str, Any] = {}
+    if "type" in schema:
+        converted["type"] = schema["type"].upper()
+    for key, name in _SCHEMA_KEYS.items():
+        if key in schema:
+            converted[name] = schema[key]
+    if "properties" in schema:
+        converted["properties"] = {
+            name: _convert(prop) for name, prop in schema["properties"].items()
+        }
+        # Streamed replies arrive in this order, so fields come as declared
+        converted["property_ordering"] = list(schema["properties"])
+    if "items" in schema:
+        converted["items"] = _convert(schema["items"])
+    return converted
+
+
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """`model`'s JSON schema in the subset Gemini's response_schema accepts"""
+    return _convert(dereference_refs(model.model_json_schema()))
+
+
+def structured_generation_config(model: Type[BaseModel]) -> Dict[str, Any]:
+    """generation_config for a Gemini call whose reply must be a `model`"""
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": response_schema(model),
+    }
+
+
+def _reply_text(reply: Any) -> str:
+    content = getattr(reply, "content", reply)
+    return content if isinstance(content, str) else str(content)
+
+
+def _error_list(error: ValidationError) -> str:
+    lines = []
+    for item in error.errors()[:MAX_REPAIR_ERRORS]:
+        where = ".".join(str(part) for part in item["loc"]) or "(root)"
+        lines.append(f"- {where}: {item['msg']}")
+    return "\n".join(lines)
+
+
+def _validate_or_repair(
+    llm,
+    messages: List[BaseMessage],
+    text: str,
+    model: Type[M],
+    attempts: int,
+    attrs: Dict[str, Any],
+) -> M:
+    config = structured_generation_config(model)
+    for repair in range(attempts + 1):
+        match = _FENCE.match(text)
+        try:
+            result = model.model_validate_json(match.group(1) if match else text)
+        except ValidationError as e:
+            error = e
+        else:
+            with _totals_lock:
+                _totals["calls"] += 1
+                _totals["repairs"] += repair
+            return result
+        if repair == attempts:
+            break
+        attrs["retries"] += 1
+        logger.info(
+            f"{model.__name__} reply failed validation "
+            f"({error.error_count()} errors); asking for a repair"
+        )
+        reply = llm.invoke(
+            [
+                *messages,
+                AIMessage(content=text),
+                HumanMessage(content=REPAIR_PROMPT.format(errors=_error_list(error))),
+            ],
+            generation_config=config,
+        )
+        text = _reply_text(reply)
+    with _totals_lock:
+        _totals["calls"] += 1
+        _totals["repairs"] += attempts
+        _totals["failures"] += 1
+    raise StructuredOutputError(
+        f"{model.__name__} still invalid after {attempts} repairs:\n"
+        f"{_error_list(error)}"
+    )
+
+
+def invoke_structured(
+    llm,
+    messages: List[BaseMessage],
+    model: Type[M],
+    name: Optional[str] = None,
+    repair_attempts: int = DEFAULT_REPAIR_ATTEMPTS,
+) -> M:
+    """
+    Ask a Gemini chat model for a `model` instance in its JSON-schema output
+    mode, and validate the reply with pydantic.
+
+    A reply that fails validation is sent back with the errors for a
+    targeted repair, up to `repair_attempts` times, rather than generated
+    again from scratch; StructuredOutputError if it still fails. The call is
+    traced as a "structured" span with the repairs as its retries.
+    """
+    with span(name or model.__name__, "structured", retries=0) as attrs:
+        config = structured_generation_config(model)
+        reply = llm.invoke(messages, generation_config=config)
+        return _validate_or_repair(
+            llm, messages, _reply_text(reply), model, repair_attempts, attrs
+        )
+
+
+def repair_structured(
+    llm,
+    messages: List[BaseMessage],
+    text: str,
+    model: Type[M],
+    name: Optional[str] = None,
+    repair_attempts: int = DEFAULT_REPAIR_ATTEMPTS,
+) -> M:
+    """
+    Validate a reply already received for `messages`, e.g. a streamed one,
+    repairing it as invoke_structured does.
+    """
+    with span(name or model.__name__, "structured", retries=0) as attrs:
+        return _validate_or_repair(llm, messages, text, model, repair_attempts, attrs)
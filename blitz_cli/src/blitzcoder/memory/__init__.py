@@ -0,0 +1,49 @@
+"""
+BlitzCoder Memory Module
+
+Embedding and storage components behind the agent's semantic memory.
+"""
+
+from .ann import IVFVectorIndex
+from .cache import EmbeddingCache
+from .checkpoint import SqliteCheckpointSaver, open_default_checkpointer
+from .embeddings import (
+    DEFAULT_DIMS,
+    DEFAULT_MODEL_NAME,
+    EmbeddingProvider,
+    get_embedding_provider,
+)
+from .history import HistoryManager, get_token_counter
+from .lexical import BM25Index
+from .policy import IndexingPolicy, PolicyIndexedStore, RetentionPolicy
+from .retriever import mmr_select, retrieve_memories
+from .store import SqliteMemoryStore, open_default_store
+from .tool_outputs import CappedToolNode, ToolOutputStore
+from .vector_index import VECTOR_DTYPES, VectorIndex
+from .writer import BackgroundWriteStore
+
+__all__ = [
+    "DEFAULT_DIMS",
+    "DEFAULT_MODEL_NAME",
+    "VECTOR_DTYPES",
+    "BM25Index",
+    "BackgroundWriteStore",
+    "CappedToolNode",
+    "EmbeddingCache",
+    "EmbeddingProvider",
+    "HistoryManager",
+    "IVFVectorIndex",
+    "IndexingPolicy",
+    "PolicyIndexedStore",
+    "RetentionPolicy",
+    "SqliteCheckpointSaver",
+    "SqliteMemoryStore",
+    "ToolOutputStore",
+    "VectorIndex",
+    "get_embedding_provider",
+    "get_token_counter",
+    "mmr_select",
+    "open_default_checkpointer",
+    "open_default_store",
+    "retrieve_memories",
+]
@@ -0,0 +1,161 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .vector_index import DECODE_BLOCK, VectorIndex
+
+DEFAULT_NPROBE = 8
+DEFAULT_MIN_SIZE = 10_000
+KMEANS_ITERATIONS = 10
+# Train on at most this many vectors per list (and MAX_TRAIN_SAMPLES overall);
+# more barely moves the centroids.
+SAMPLES_PER_LIST = 32
+MAX_TRAIN_SAMPLES = 20_000
+# Retrain once the index has grown this much since the last training.
+RETRAIN_GROWTH = 4
+
+
+class IVFVectorIndex(VectorIndex):
+    """
+    VectorIndex with an inverted-file (IVF) approximate search.
+
+    Once the index holds `min_size` rows, spherical k-means splits it into
+    about 4*sqrt(n) lists. A query is scored against the centroids first and
+    then only against the rows of the `nprobe` closest lists, so latency drops
+    roughly by nlist/nprobe at the cost of some recall. Raising `nprobe` trades
+    latency back for recall; below `min_size` the search is exact.
+
+    New rows are assigned to their nearest centroid on insert. The centroids
+    are retrained when the index has grown `RETRAIN_GROWTH` times past the
+    size they were trained on. `centroids` (with `trained_rows`) can be saved
+    and passed back in to skip training after a restart.
+    """
+
+    def __init__(
+        self,
+        dims: int,
+        capacity: int = 64,
+        dtype: str = "float32",
+        nprobe: int = DEFAULT_NPROBE,
+        min_size: int = DEFAULT_MIN_SIZE,
+        centroids: Optional[np.ndarray] = None,
+        trained_rows: int = 0,
+        seed: int = 0,
+    ):
+        super().__init__(dims, capacity, dtype)
+        self.nprobe = nprobe
+        self.min_size = min_size
+        self._rng = np.random.default_rng(seed)
+        self._row_list = np.zeros(self._matrix.shape[0], dtype=np.int32)
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_rows = trained_rows
+        # Bumped on every (re)training so callers know when to persist centroids.
+        self.version = 0
+        if centroids is not None:
+            self.centroids = np.asarray(centroids, dtype=np.float32).reshape(-1, dims)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _reserve(self, extra: int):
+        super()._reserve(extra)
+        if len(self._row_list) < self._matrix.shape[0]:
+            row_list = np.zeros(self._matrix.shape[0], dtype=np.int32)
+            row_list[: len(self._row_list)] = self._row_list
+            self._row_list = row_list
+
+    def _assign(self, start: int, end: int):
+        if self.centroids is None:
+            return
+        for block in range(start, end, DECODE_BLOCK):
+            rows = slice(block, min(block + DECODE_BLOCK, end))
+            self._row_list[rows] = np.argmax(self._decode(rows) @ self.centroids.T, axis=1)
+
+    def _after_insert(self, start: int):
+        if self.centroids is None:
+            if self._rows >= self.min_size:
+                self.train()
+        elif self.trained_rows and self._rows > self.trained_rows * RETRAIN_GROWTH:
+            self.train()
+        else:
+            self._assign(start, self._rows)
+
+    def add(self, key: str, vectors: Sequence[Sequence[float]]):
+        # Remove first: it may compact the matrix and move the append point.
+        self.remove(key)
+        start = self._rows
+        super().add(key, vectors)
+        self._after_insert(start)
+
+    def add_many(self, keys: Sequence[str], vectors: np.ndarray, owners: Sequence[int]):
+        for key in keys:
+            self.remove(key)
+        start = self._rows
+        super().add_many(keys, vectors, owners)
+        self._after_insert(start)
+
+    def compact(self):
+        super().compact()
+        self._row_list = np.zeros(self._matrix.shape[0], dtype=np.int32)
+        self._assign(0, self._rows)
+
+    def train(self, nlist: Optional[int] = None):
+        """(Re)build the centroids with spherical k-means over the live rows"""
+        live = np.flatnonzero(self._alive[: self._rows])
+        if not len(live):
+            return
+        nlist = nlist or max(1, int(4 * np.sqrt(len(live))))
+        nlist = min(nlist, len(live), MAX_TRAIN_SAMPLES)
+        sample_size = min(len(live), nlist * SAMPLES_PER_LIST, MAX_TRAIN_SAMPLES)
+        sample = self._decode(np.sort(self._rng.choice(live, sample_size, replace=False)))
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Keep the previous centroid for lists that lost all their points.
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+        self.centroids = centroids.astype(np.float32)
+        self.trained_rows = self._rows
+        self.version += 1
+        self._assign(0, self._rows)
+
+    def scores(self, query: Sequence[float]) -> np.ndarray:
+        if self.centroids is None or self._rows < self.min_size:
+            return super().scores(query)
+        query = self._prepare_query(query)
+        nprobe = min(self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        in_probe = np.zeros(len(self.centroids), dtype=bool)
+        in_probe[probe] = True
+        rows = np.flatnonzero(
+            in_probe[self._row_list[: self._rows]] & self._alive[: self._rows]
+        )
+        slot_scores = np.full(len(self._keys), -np.inf, dtype=np.float32)
+        if self._multi_row:
+            np.maximum.at(slot_scores, self._owner[rows], self._row_scores(query, rows))
+        else:
+            slot_scores[self._owner[rows]] = self._row_scores(query, rows)
+        return slot_scores
+
+    def exact_search(self, query: Sequence[float], k: int):
+        """Exhaustive search over all rows, ignoring the IVF lists"""
+        return self._top_k(VectorIndex.scores(self, query), k)
+
+    def recall(self, queries: np.ndarray, k: int = 5) -> float:
+        """Mean recall@k of the approximate search against exact search"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dims)
+        total = 0.0
+        for query in queries:
+            exact = {key for key, _ in self.exact_search(query, k)}
+            if not exact:
+                continue
+            approx = {key for key, _ in self.search(query, k)}
+            total += len(exact & approx) / len(exact)
+        return total / len(queries) if len(queries) else 1.0
@@ -0,0 +1,199 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from ..paths import get_data_dir
+
+DEFAULT_MAX_ENTRIES = 20_000
+# Cache hits whose last_used update is held in memory before being written
+DEFAULT_TOUCH_BATCH = 256
+
+
+def text_hash(text: str) -> str:
+    """Content hash used as the cache key for a piece of text"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk cache mapping (model name, text hash) to an embedding vector.
+
+    Vectors are stored as float32 blobs in SQLite (WAL mode). The cache holds at
+    most `max_entries` vectors; once over the limit, the least recently used
+    entries are evicted. Hits update `last_used` in memory; the updates are
+    written in one statement on the next put, every `touch_batch` hits and
+    on close, so a lookup that only hits doesn't write. Hit/miss counters
+    cover the lifetime of this instance.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        touch_batch: int = DEFAULT_TOUCH_BATCH,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # (model, text hash) -> last use not yet written to the database
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for whichever of `hashes` are present"""
+        if not hashes:
+            return {}
+        unique = list(dict.fromkeys(hashes))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(unique), 500):
+                chunk = unique[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *chunk),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                for key in found:
+                    self._touched[(model, key)] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._write_touched()
+                    self._conn.commit()
+            hit_count = sum(1 for key in hashes if key in found)
+            self.hits += hit_count
+            self.misses += len(hashes) - hit_count
+        return found
+
+    def put_many(self, model: str, items: Dict[str, Sequence[float]]):
+        """Store vectors keyed by text hash, evicting old entries if over budget"""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (model, key, array("f", vector).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._size += self._conn.total_changes - before
+            self._write_touched()
+            if self._size > self.max_entries:
+                # Other processes share the file; evict by the true count.
+                self._size = self._conn.execute(
+                    "SELECT COUNT(*) FROM embeddings"
+                ).fetchone()[0]
+                if self._size > self.max_entries:
+                    self._evict(self._size - self.max_entries)
+            self._conn.commit()
+
+    def _write_touched(self):
+        # Called with _lock held; the caller commits
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = MAX(last_used, ?) "
+            "WHERE model = ? AND text_hash = ?",
+            [(used, model, key) for (model, key), used in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self, count: int):
+        deleted = self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (count,),
+        ).rowcount
+        self._size -= deleted
+        self.evictions += deleted
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._touched.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._write_touched()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not save embedding cache use times: {e}")
+            self._conn.close()
+
+
+def open_default_cache(max_entries: int = DEFAULT_MAX_ENTRIES) -> Optional[EmbeddingCache]:
+    """
+    Open the embedding cache in the BlitzCoder data directory, if possible.
+    It is closed at exit, which writes out the last batched hit times.
+    """
+    try:
+        cache = EmbeddingCache(
+            os.path.join(get_data_dir(), "embedding_cache.sqlite3"), max_entries
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Embedding cache disabled, could not open it: {e}")
+        return None
+    # Opened before the memory store, so closed after the store's last writes
+    atexit.register(cache.close)
+    return cache
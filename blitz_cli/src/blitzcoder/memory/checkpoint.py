@@ -0,0 +1,557 @@
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from loguru import logger
+
+from ..paths import get_data_dir
+
+try:
+    import zstandard
+except ImportError:  # zlib is always there; zstd is just faster and smaller
+    zstandard = None
+
+DEFAULT_KEEP_LAST = 10
+# SQLite's default limit on bound parameters is 999.
+_CHUNK = 500
+_ZSTD = b"z"
+_ZLIB = b"d"
+
+
+def _typed_to_bytes(typed: Tuple[str, bytes]) -> bytes:
+    kind, data = typed
+    return kind.encode() + b"\x00" + data
+
+
+def _typed_from_bytes(raw: bytes) -> Tuple[str, bytes]:
+    kind, _, data = raw.partition(b"\x00")
+    return kind.decode(), data
+
+
+def _content_hash(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _split_hashes(refs: bytes) -> List[bytes]:
+    return [refs[i : i + 16] for i in range(0, len(refs), 16)]
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    langgraph checkpointer that keeps chat threads in one SQLite file.
+
+    Channel values are stored once per (channel, version), like InMemorySaver,
+    but list channels (the message history) are split into their elements and
+    each element is stored once, compressed, under its content hash. A
+    checkpoint that adds one message to a 200-message history therefore
+    writes one new blob and 200 hash references, not 200 messages again.
+    Blobs are reference-counted and dropped with the last channel version
+    that uses them.
+
+    Only the newest `keep_last` checkpoints of each thread are kept, so a long
+    session costs disk space for its history, not for every step of it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        keep_last: int = DEFAULT_KEEP_LAST,
+        serde: Optional[SerializerProtocol] = None,
+        compression_level: int = 3,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_last = max(keep_last, 1)
+        self._lock = threading.RLock()
+        self._compressor = (
+            zstandard.ZstdCompressor(level=compression_level) if zstandard else None
+        )
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+        self._compression_level = compression_level
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                checkpoint BLOB NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS channels (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                refs BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash BLOB PRIMARY KEY,
+                data BLOB NOT NULL,
+                refs INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                value BLOB NOT NULL,
+                task_path TEXT NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+        self._conn.commit()
+
+    # Encoding
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self._compressor is not None:
+            return _ZSTD + self._compressor.compress(raw)
+        return _ZLIB + zlib.compress(raw, self._compression_level)
+
+    def _decompress(self, blob: bytes) -> bytes:
+        codec, data = blob[:1], blob[1:]
+        if codec == _ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("This checkpoint file needs the zstandard package")
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+    def _dumps(self, obj: Any) -> bytes:
+        return self._compress(_typed_to_bytes(self.serde.dumps_typed(obj)))
+
+    def _loads(self, blob: bytes) -> Any:
+        return self.serde.loads_typed(_typed_from_bytes(self._decompress(blob)))
+
+    # Content-addressed blobs
+
+    def _store_blobs(self, raws: Dict[bytes, bytes], counts: Counter):
+        """Insert the blobs that are new and add `counts` references"""
+        hashes = list(counts)
+        existing = set()
+        for i in range(0, len(hashes), _CHUNK):
+            chunk = hashes[i : i + _CHUNK]
+            existing.update(
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT hash FROM blobs WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        # Only new content is compressed; known messages cost one UPDATE each.
+        self._conn.executemany(
+            "INSERT INTO blobs (hash, data, refs) VALUES (?, ?, 0)",
+            [(h, self._compress(raws[h])) for h in hashes if h not in existing],
+        )
+        self._conn.executemany(
+            "UPDATE blobs SET refs = refs + ? WHERE hash = ?",
+            [(count, h) for h, count in counts.items()],
+        )
+
+    def _release_blobs(self, counts: Counter):
+        self._conn.executemany(
+            "UPDATE blobs SET refs = refs - ? WHERE hash = ?",
+            [(count, h) for h, count in counts.items()],
+        )
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE hash = ? AND refs <= 0", [(h,) for h in counts]
+        )
+
+    def _load_blobs(self, hashes: Sequence[bytes]) -> Dict[bytes, Any]:
+        unique = list(set(hashes))
+        values: Dict[bytes, Any] = {}
+        for i in range(0, len(unique), _CHUNK):
+            chunk = unique[i : i + _CHUNK]
+            for h, data in self._conn.execute(
+                f"SELECT hash, data FROM blobs WHERE hash IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ):
+                values[h] = self._loads(data)
+        return values
+
+    # Channel values
+
+    def _put_channel(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: Any,
+        values: Dict[str, Any],
+    ):
+        version = str(version)
+        if self._conn.execute(
+            "SELECT 1 FROM channels WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version = ?",
+            (thread_id, checkpoint_ns, channel, version),
+        ).fetchone():
+            return
+        if channel not in values:
+            kind, elements = "empty", []
+        elif isinstance(values[channel], list):
+            kind, elements = "list", values[channel]
+        else:
+            kind, elements = "value", [values[channel]]
+        raws = {}
+        hashes = []
+        for element in elements:
+            raw = _typed_to_bytes(self.serde.dumps_typed(element))
+            h = _content_hash(raw)
+            raws[h] = raw
+            hashes.append(h)
+        if hashes:
+            self._store_blobs(raws, Counter(hashes))
+        self._conn.execute(
+            "INSERT INTO channels (thread_id, checkpoint_ns, channel, version, kind, refs) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, channel, version, kind, b"".join(hashes)),
+        )
+
+    def _load_channels(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        rows = []
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT kind, refs FROM channels WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row and row[0] != "empty":
+                rows.append((channel, row[0], _split_hashes(row[1])))
+        blobs = self._load_blobs([h for _, _, hashes in rows for h in hashes])
+        return {
+            channel: [blobs[h] for h in hashes] if kind == "list" else blobs[hashes[0]]
+            for channel, kind, hashes in rows
+        }
+
+    # Checkpoints
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint_blob, metadata_blob = row
+        checkpoint = self._loads(checkpoint_blob)
+        writes = self._conn.execute(
+            "SELECT task_id, channel, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channels(
+                    thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self._loads(metadata_blob),
+            pending_writes=[
+                (task_id, channel, self._loads(value)) for task_id, channel, value in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: List[Any] = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "checkpoint, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self._loads(row[3])
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                results.append(self._tuple(thread_id, checkpoint_ns, tuple(row)))
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        with self._lock:
+            for channel, version in new_versions.items():
+                self._put_channel(thread_id, checkpoint_ns, channel, version, values)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, checkpoint, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    self._dumps(c),
+                    self._dumps(get_checkpoint_metadata(config, metadata)),
+                ),
+            )
+            self._prune(thread_id, checkpoint_ns)
+            self._conn.commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Special writes (errors, interrupts) replace; regular ones are
+                # kept from the first attempt, as in InMemorySaver.
+                verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+                self._conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, "
+                    "task_id, idx, channel, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        idx,
+                        channel,
+                        self._dumps(value),
+                        task_path,
+                    ),
+                )
+            self._conn.commit()
+
+    def _drop_channels(
+        self, thread_id: str, checkpoint_ns: str, rows: List[Tuple[str, str, bytes]]
+    ):
+        counts: Counter = Counter()
+        for channel, version, refs in rows:
+            counts.update(_split_hashes(refs))
+        self._conn.executemany(
+            "DELETE FROM channels WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version = ?",
+            [(thread_id, checkpoint_ns, channel, version) for channel, version, _ in rows],
+        )
+        if counts:
+            self._release_blobs(counts)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Drop all but the newest `keep_last` checkpoints of a thread"""
+        old = [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.keep_last),
+            )
+        ]
+        if not old:
+            return
+        for table in ("checkpoints", "writes"):
+            self._conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in old],
+            )
+        live = set()
+        for (blob,) in self._conn.execute(
+            "SELECT checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ):
+            live.update((k, str(v)) for k, v in self._loads(blob)["channel_versions"].items())
+        stale = [
+            row
+            for row in self._conn.execute(
+                "SELECT channel, version, refs FROM channels "
+                "WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+            if (row[0], row[1]) not in live
+        ]
+        self._drop_channels(thread_id, checkpoint_ns, stale)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            by_ns: Dict[str, List[Tuple[str, str, bytes]]] = {}
+            for checkpoint_ns, channel, version, refs in self._conn.execute(
+                "SELECT checkpoint_ns, channel, version, refs FROM channels WHERE thread_id = ?",
+                (thread_id,),
+            ):
+                by_ns.setdefault(checkpoint_ns, []).append((channel, version, refs))
+            for checkpoint_ns, rows in by_ns.items():
+                self._drop_channels(thread_id, checkpoint_ns, rows)
+            for table in ("checkpoints", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same scheme as InMemorySaver: a zero-padded counter that sorts as text.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Async entry points run the sync ones off the event loop.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in results:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id, task_path
+        )
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.delete_thread, thread_id
+        )
+
+
+def open_default_checkpointer(**kwargs: Any) -> Optional[SqliteCheckpointSaver]:
+    """Open the chat checkpoint file in the BlitzCoder data directory, if possible"""
+    try:
+        return SqliteCheckpointSaver(
+            os.path.join(get_data_dir(), "checkpoints.sqlite3"), **kwargs
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Persistent chat history disabled, could not open it: {e}")
+        return None
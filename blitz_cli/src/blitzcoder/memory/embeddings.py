@@ -0,0 +1,136 @@
+import threading
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+from blitzcoder.telemetry import span
+
+from .cache import EmbeddingCache, open_default_cache, text_hash
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+DEFAULT_DIMS = 768  # all-mpnet-base-v2 embedding dimension
+
+
+class EmbeddingProvider(Embeddings):
+    """
+    Process-wide sentence-transformers embedding model.
+
+    The underlying HuggingFaceEmbeddings instance is created at most once, either
+    by a background warm-up thread started with `warm_up()` or on the first
+    embed call, whichever happens first. Callers that arrive while the model is
+    still loading wait for it instead of loading a second copy.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        device: str = "cpu",
+        normalize_embeddings: bool = False,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.model_name = model_name
+        self.model_kwargs = {"device": device}
+        self.encode_kwargs = {"normalize_embeddings": normalize_embeddings}
+        self.cache = cache
+        # Normalized and raw vectors from the same model must not share entries.
+        self.cache_model_key = model_name + (":normalized" if normalize_embeddings else "")
+        self._model = None
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self._warm_thread: Optional[threading.Thread] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def _load(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+
+                logger.debug(f"Loading embedding model {self.model_name}")
+                model = HuggingFaceEmbeddings(
+                    model_name=self.model_name,
+                    model_kwargs=self.model_kwargs,
+                    encode_kwargs=self.encode_kwargs,
+                )
+                # Run one tiny batch so lazy kernel/tokenizer setup is paid here too.
+                model.embed_query("warm up")
+                self._model = model
+        return self._model
+
+    def _warm(self):
+        try:
+            self._load()
+        except Exception as e:
+            # Leave the model unset; the first real embed call retries and raises.
+            logger.warning(f"Background warm-up of {self.model_name} failed: {e}")
+
+    def warm_up(self) -> threading.Thread:
+        """Start loading the model in a daemon thread, if not already started."""
+        with self._warm_lock:
+            if self._warm_thread is None and self._model is None:
+                self._warm_thread = threading.Thread(
+                    target=self._warm, name="embedding-warm-up", daemon=True
+                )
+                self._warm_thread.start()
+            return self._warm_thread
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            with span("embed_documents", "embedding", texts=len(texts)):
+                return self._load().embed_documents(texts)
+
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.cache_model_key, hashes)
+        # Embed each distinct missing text once, however often it repeats.
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        if missing:
+            with span("embed_documents", "embedding", texts=len(missing)):
+                computed = self._load().embed_documents(list(missing.values()))
+            # Round through float32 so fresh and cached results are identical.
+            new_vectors = {
+                key: array("f", vector).tolist()
+                for key, vector in zip(missing.keys(), computed)
+            }
+            self.cache.put_many(self.cache_model_key, new_vectors)
+            vectors.update(new_vectors)
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            with span("embed_query", "embedding", texts=1):
+                return self._load().embed_query(text)
+
+        key = text_hash(text)
+        cached = self.cache.get_many(self.cache_model_key, [key])
+        if key in cached:
+            return cached[key]
+        with span("embed_query", "embedding", texts=1):
+            vector = array("f", self._load().embed_query(text)).tolist()
+        self.cache.put_many(self.cache_model_key, {key: vector})
+        return vector
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {}
+
+
+_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Get the shared embedding provider used by every memory store and tool"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = EmbeddingProvider(cache=open_default_cache())
+    return _provider
@@ -0,0 +1,176 @@
+import json
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from loguru import logger
+
+DEFAULT_TOKEN_BUDGET = 32000
+DEFAULT_KEEP_TURNS = 3
+DEFAULT_STUB_CHARS = 300
+# Rough characters per token of each provider's tokenizer on mixed English and
+# code. Gemini's SentencePiece vocabulary is close to 4; the Llama models
+# served by Groq and SambaNova split code a little finer.
+PROVIDER_CHARS_PER_TOKEN = {"google": 4.0, "groq": 3.5, "sambanova": 3.5}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+# Role markers and separators each message costs on top of its text.
+MESSAGE_OVERHEAD_TOKENS = 4
+STUB_PREFIX = "[Earlier output of "
+
+Summarizer = Callable[[str, Sequence[BaseMessage]], str]
+
+
+def get_token_counter(provider: str) -> Callable[[str], int]:
+    """Token counting function for a provider's models"""
+    if provider == "openai":
+        try:
+            import tiktoken
+        except ImportError:
+            pass
+        else:
+            encoding = tiktoken.get_encoding("o200k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+    ratio = PROVIDER_CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+    return lambda text: math.ceil(len(text) / ratio)
+
+
+def message_text(message: BaseMessage) -> str:
+    """Everything in a message that reaches the model, as text"""
+    content = message.content
+    if isinstance(content, list):
+        content = "\n".join(
+            part if isinstance(part, str) else str(part.get("text", ""))
+            for part in content
+        )
+    if isinstance(message, AIMessage) and message.tool_calls:
+        content += json.dumps(message.tool_calls, default=str)
+    return content
+
+
+def _turn_starts(messages: Sequence[BaseMessage]) -> List[int]:
+    # A turn is a user message plus the tool loop it started; anything before
+    # the first user message counts as part of the first turn.
+    starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if starts and starts[0] != 0:
+        starts[0] = 0
+    return starts or [0]
+
+
+def extractive_summary(previous: str, messages: Sequence[BaseMessage]) -> str:
+    """Fallback summary: the start of each user question and final answer"""
+    lines = [previous] if previous else []
+    for message in messages:
+        text = message_text(message).strip().replace("\n", " ")
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {text[:200]}")
+        elif isinstance(message, AIMessage) and text and not message.tool_calls:
+            lines.append(f"Assistant: {text[:200]}")
+    return "\n".join(lines)
+
+
+class HistoryManager:
+    """
+    Keeps the conversation sent to the model under a token budget.
+
+    The last `keep_turns` turns are kept verbatim. Older tool outputs are
+    replaced by short stubs (the tool call and its id stay, so the history is
+    still well formed). If that is not enough, the oldest turns are folded
+    into a running summary by `summarize(previous_summary, dropped_messages)`
+    and removed from the thread. The summary lives in the graph state, so it
+    is checkpointed and only newly dropped turns are ever summarized.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        keep_turns: int = DEFAULT_KEEP_TURNS,
+        provider: str = "google",
+        summarize: Optional[Summarizer] = None,
+        stub_chars: int = DEFAULT_STUB_CHARS,
+    ):
+        self.token_budget = token_budget
+        self.keep_turns = max(keep_turns, 1)
+        self.provider = provider
+        self.summarize = summarize
+        self.stub_chars = stub_chars
+        self.count_text = get_token_counter(provider)
+        self.stubbed = 0
+        self.summarized = 0
+        self._cache: Dict[Tuple[str, int], int] = {}
+
+    def count(self, message: BaseMessage) -> int:
+        """Tokens of one message, cached by message id"""
+        text = message_text(message)
+        key = (message.id, len(text)) if message.id else None
+        if key is not None and key in self._cache:
+            return self._cache[key]
+        tokens = self.count_text(text) + MESSAGE_OVERHEAD_TOKENS
+        if key is not None:
+            self._cache[key] = tokens
+        return tokens
+
+    def total(self, messages: Sequence[BaseMessage], system_text: str = "") -> int:
+        return self.count_text(system_text) + sum(self.count(m) for m in messages)
+
+    def _stub(self, message: ToolMessage) -> Optional[ToolMessage]:
+        text = message_text(message)
+        if text.startswith(STUB_PREFIX) or len(text) <= self.stub_chars:
+            return None
+        head = text[: self.stub_chars].rstrip()
+        return ToolMessage(
+            content=f"{STUB_PREFIX}{message.name or 'tool'}, {len(text)} chars]\n{head}...",
+            tool_call_id=message.tool_call_id,
+            name=message.name,
+            id=message.id,
+        )
+
+    def _summarize(self, previous: str, dropped: Sequence[BaseMessage]) -> str:
+        if self.summarize is not None:
+            try:
+                return self.summarize(previous, dropped)
+            except Exception as e:
+                logger.warning(f"History summary failed, keeping an extract instead: {e}")
+        return extractive_summary(previous, dropped)
+
+    def compact(
+        self, messages: Sequence[BaseMessage], summary: str = "", system_text: str = ""
+    ) -> Tuple[List[BaseMessage], str]:
+        """
+        Message updates (stubs and RemoveMessages, for the add_messages
+        reducer) and the new summary that bring the history under budget.
+        """
+        messages = list(messages)
+        starts = _turn_starts(messages)
+        recent = starts[-self.keep_turns] if len(starts) > self.keep_turns else 0
+        updates: List[BaseMessage] = []
+        for i in range(recent):
+            if isinstance(messages[i], ToolMessage) and messages[i].id:
+                stub = self._stub(messages[i])
+                if stub is not None:
+                    messages[i] = stub
+                    updates.append(stub)
+        self.stubbed += len(updates)
+
+        total = self.total(messages, system_text) + self.count_text(summary)
+        # Fold whole turns, oldest first, so tool calls and their results
+        # leave together; the current turn is always kept.
+        cut = 0
+        for start, end in zip(starts, starts[1:]):
+            if total <= self.token_budget:
+                break
+            total -= sum(self.count(m) for m in messages[start:end])
+            cut = end
+        if cut:
+            dropped = messages[:cut]
+            summary = self._summarize(summary, dropped)
+            self.summarized += len(dropped)
+            removed = {m.id for m in dropped}
+            updates = [u for u in updates if u.id not in removed]
+            updates += [RemoveMessage(id=m.id) for m in dropped if m.id]
+        return updates, summary
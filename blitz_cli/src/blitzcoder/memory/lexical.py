@@ -0,0 +1,87 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+# Whole identifiers first (paths, dotted names, error codes), so that
+# "src/app.py" or "ERR_MODULE_NOT_FOUND" can be matched exactly.
+_IDENTIFIER = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_./:\-]*[A-Za-z0-9_]|[A-Za-z0-9_]")
+_PART = re.compile(r"[A-Za-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for BM25: each identifier as a whole plus, when it is a
+    compound (path, snake_case, dotted), its alphanumeric parts.
+    """
+    terms = []
+    for match in _IDENTIFIER.finditer(text):
+        token = match.group().lower()
+        terms.append(token)
+        parts = _PART.findall(token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 over the memories of one namespace.
+
+    Postings are kept per term (term -> {key: term frequency}), so adding or
+    removing a memory only touches its own terms, and a query only visits the
+    postings of its terms.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._terms: Dict[str, List[str]] = {}  # key -> its distinct terms
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._lengths
+
+    def add(self, key: str, text: str):
+        """Index (or re-index) `key` with `text`"""
+        self.remove(key)
+        terms = tokenize(text)
+        counts = Counter(terms)
+        for term, count in counts.items():
+            self._postings[term][key] = count
+        self._terms[key] = list(counts)
+        self._lengths[key] = len(terms)
+        self._total_length += len(terms)
+
+    def remove(self, key: str):
+        length = self._lengths.pop(key, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(key):
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """The `k` best (key, BM25 score) pairs, best first"""
+        if not self._lengths or k <= 0:
+            return []
+        count = len(self._lengths)
+        average = self._total_length / count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average)
+                scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda hit: hit[1], reverse=True)[:k]
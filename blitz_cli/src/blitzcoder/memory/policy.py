@@ -0,0 +1,234 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langgraph.store.base import BaseStore, Op, PutOp, Result
+from langgraph.store.base.embed import get_text_at_path
+from loguru import logger
+
+from .cache import text_hash
+
+
+class IndexingPolicy:
+    """
+    Decides which fields of a memory actually get embedded on `store.put`.
+
+    Applied to the requested `index` fields of every put:
+
+    - `skip_fields` are never embedded (e.g. a field that is always "conversation").
+    - Fields whose value has already been seen `constant_after` times in the same
+      namespace are treated as constant and skipped (0 disables the detection).
+      Counts are kept for the `seen_capacity` most recently seen values only.
+    - A field whose text is identical to, or contained in, another indexed field
+      of the same memory is dropped, since it adds no new signal.
+    - With `composite_fields`, those fields are joined into one `composite_key`
+      field and only that is embedded: one vector per memory.
+
+    A put never loses all its indexed fields to the constant detection or
+    the containment check: `fallback_field` is embedded instead or, without
+    text there, the first field dropped.
+    """
+
+    def __init__(
+        self,
+        skip_fields: Sequence[str] = (),
+        constant_after: int = 3,
+        drop_contained: bool = True,
+        composite_fields: Optional[Sequence[str]] = None,
+        composite_key: str = "embedding_text",
+        composite_separator: str = "\n",
+        seen_capacity: int = 4096,
+        fallback_field: str = "memory",
+    ):
+        self.skip_fields = set(skip_fields)
+        self.constant_after = constant_after
+        self.drop_contained = drop_contained
+        self.composite_fields = list(composite_fields) if composite_fields else None
+        self.composite_key = composite_key
+        self.composite_separator = composite_separator
+        self.seen_capacity = seen_capacity
+        self.fallback_field = fallback_field
+        self.requested = 0
+        self.embedded = 0
+        # (namespace, field, text hash) -> times seen, least recent first
+        self._seen: "OrderedDict[Tuple[Tuple[str, ...], str, str], int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _text(self, value: Dict[str, Any], field: str) -> str:
+        return "\n".join(get_text_at_path(value, field))
+
+    def apply(self, op: PutOp, default_fields: Optional[List[str]] = None) -> PutOp:
+        """Return `op` with its value/index rewritten according to the policy"""
+        if op.value is None or op.index is False:
+            return op
+        fields = op.index if op.index is not None else default_fields
+        if not fields:
+            return op
+
+        value = op.value
+        if self.composite_fields:
+            parts = [self._text(value, field) for field in self.composite_fields]
+            composite = self.composite_separator.join(part for part in parts if part)
+            value = {**value, self.composite_key: composite}
+            fields = [self.composite_key]
+
+        with self._lock:
+            self.requested += len(fields)
+            texts = {}
+            dropped: List[str] = []
+            for field in fields:
+                if field in self.skip_fields:
+                    continue
+                text = self._text(value, field) if field != "$" else None
+                if text is not None:
+                    if not text.strip():
+                        continue
+                    if self.constant_after and self._is_constant(
+                        op.namespace, field, text
+                    ):
+                        dropped.append(field)
+                        continue
+                texts[field] = text
+
+            kept = []
+            for field, text in texts.items():
+                if self.drop_contained and self._is_redundant(field, text, texts, kept):
+                    dropped.append(field)
+                    continue
+                kept.append(field)
+            if not kept and dropped:
+                kept = [self._fallback(value, dropped)]
+                logger.debug(
+                    f"Indexing policy dropped {dropped} from a put to "
+                    f"{op.namespace}; embedding {kept[0]!r} instead"
+                )
+            self.embedded += len(kept)
+
+        return op._replace(value=value, index=kept if kept else False)
+
+    def _is_constant(self, namespace: Tuple[str, ...], field: str, text: str) -> bool:
+        # Called with _lock held
+        key = (namespace, field, text_hash(text))
+        count = self._seen.pop(key, 0) + 1
+        self._seen[key] = count
+        if len(self._seen) > self.seen_capacity:
+            self._seen.popitem(last=False)
+        if count == self.constant_after + 1:
+            logger.info(
+                f"Indexing policy: {field!r} in {namespace} repeats the same text; "
+                "no longer embedding it"
+            )
+        return count > self.constant_after
+
+    def _fallback(self, value: Dict[str, Any], dropped: List[str]) -> str:
+        field = self.fallback_field
+        if field not in self.skip_fields and self._text(value, field).strip():
+            return field
+        return dropped[0]
+
+    def _is_redundant(
+        self,
+        field: str,
+        text: Optional[str],
+        texts: Dict[str, Optional[str]],
+        kept: List[str],
+    ) -> bool:
+        if text is None:
+            return False
+        for other, other_text in texts.items():
+            if other == field or other_text is None or text not in other_text:
+                continue
+            # Of two identical fields, keep whichever was listed first.
+            if text != other_text or other in kept:
+                return True
+        return False
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requested_fields": self.requested,
+            "embedded_fields": self.embedded,
+            "reduction": self.requested / self.embedded if self.embedded else 0.0,
+        }
+
+
+class PolicyIndexedStore(BaseStore):
+    """
+    A BaseStore wrapper that runs every put through an IndexingPolicy before
+    handing it to the wrapped store. Reads, searches and deletes pass through.
+    """
+
+    def __init__(self, store: BaseStore, policy: IndexingPolicy):
+        self.store = store
+        self.policy = policy
+        index_config = getattr(store, "index_config", None) or {}
+        self.default_fields = index_config.get("fields")
+
+    def _apply(self, ops: Iterable[Op]) -> List[Op]:
+        return [
+            self.policy.apply(op, self.default_fields) if isinstance(op, PutOp) else op
+            for op in ops
+        ]
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        return self.store.batch(self._apply(ops))
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await self.store.abatch(self._apply(ops))
+
+
+class RetentionPolicy:
+    """
+    Bounds and ranks the memories kept per namespace.
+
+    - `max_items` caps each namespace; on overflow the `eviction` order picks
+      the victims: "lru" (least recently returned by a search), "lowest_score"
+      (fewest search hits, then least recent) or "age" (oldest first).
+    - A new memory whose vector has cosine similarity >= `dedup_threshold`
+      with an existing one in the namespace is dropped; the existing memory is
+      counted as accessed instead.
+    - With `half_life_days`, search scores are scaled by
+      `(1 - recency_weight) + recency_weight * 0.5 ** (age / half_life)`, so a
+      memory `half_life_days` old keeps `1 - recency_weight / 2` of its score.
+    """
+
+    EVICTION_ORDER = {
+        "lru": "last_accessed, created_at",
+        "lowest_score": "hits, last_accessed, created_at",
+        "age": "created_at",
+    }
+
+    def __init__(
+        self,
+        max_items: Optional[int] = None,
+        eviction: str = "lru",
+        dedup_threshold: Optional[float] = None,
+        half_life_days: Optional[float] = None,
+        recency_weight: float = 0.3,
+    ):
+        if eviction not in self.EVICTION_ORDER:
+            raise ValueError(
+                f"eviction must be one of {sorted(self.EVICTION_ORDER)}, got {eviction!r}"
+            )
+        if max_items is not None and max_items < 1:
+            raise ValueError("max_items must be at least 1")
+        self.max_items = max_items
+        self.eviction = eviction
+        self.dedup_threshold = dedup_threshold
+        self.half_life_days = half_life_days
+        self.recency_weight = recency_weight
+        self.evicted = 0
+        self.duplicates = 0
+
+    @property
+    def eviction_order(self) -> str:
+        """SQL ORDER BY clause listing eviction victims first"""
+        return self.EVICTION_ORDER[self.eviction]
+
+    def recency_factor(self, age_seconds: float) -> float:
+        if not self.half_life_days:
+            return 1.0
+        decay = 0.5 ** (max(age_seconds, 0.0) / (self.half_life_days * 86400.0))
+        return (1.0 - self.recency_weight) + self.recency_weight * decay
+
+    def stats(self) -> Dict[str, float]:
+        return {"evicted": self.evicted, "duplicates_dropped": self.duplicates}
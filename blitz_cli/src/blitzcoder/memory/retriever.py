@@ -0,0 +1,110 @@
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langgraph.store.base import BaseStore, SearchItem
+
+from .lexical import tokenize
+
+DEFAULT_CANDIDATES = 20
+DEFAULT_TOKEN_BUDGET = 800
+DEFAULT_MMR_LAMBDA = 0.7
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def memory_text(item: SearchItem) -> str:
+    """The part of a memory that gets pasted into the prompt"""
+    return str(item.value.get("memory", ""))
+
+
+def _base_store(store: BaseStore) -> BaseStore:
+    # Look through wrappers (policy, background writer) for the backing store.
+    while hasattr(store, "store") and isinstance(store.store, BaseStore):
+        store = store.store
+    return store
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def mmr_select(
+    candidates: Sequence[SearchItem],
+    vectors: Dict[str, np.ndarray],
+    limit: int,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    mmr_lambda: float = DEFAULT_MMR_LAMBDA,
+    render: Callable[[SearchItem], str] = memory_text,
+) -> List[SearchItem]:
+    """
+    Maximal marginal relevance: repeatedly take the candidate with the best
+    `mmr_lambda * relevance - (1 - mmr_lambda) * max similarity to the ones
+    already taken`, skipping any that would overrun `token_budget`.
+
+    Similarity is the cosine of `vectors[key]` when both items have one and
+    the Jaccard overlap of their terms otherwise.
+    """
+    remaining = list(candidates)
+    terms = {item.key: set(tokenize(render(item))) for item in remaining}
+    costs = {item.key: estimate_tokens(render(item)) for item in remaining}
+    budget = token_budget if token_budget is not None else float("inf")
+
+    def similarity(a: SearchItem, b: SearchItem) -> float:
+        va, vb = vectors.get(a.key), vectors.get(b.key)
+        if va is not None and vb is not None:
+            return float(va @ vb)
+        return _jaccard(terms[a.key], terms[b.key])
+
+    selected: List[SearchItem] = []
+    while remaining and len(selected) < limit:
+        best, best_value = None, -np.inf
+        for item in remaining:
+            if costs[item.key] > budget:
+                continue
+            redundancy = max((similarity(item, s) for s in selected), default=0.0)
+            value = mmr_lambda * (item.score or 0.0) - (1 - mmr_lambda) * redundancy
+            if value > best_value:
+                best, best_value = item, value
+        if best is None:
+            break
+        selected.append(best)
+        remaining.remove(best)
+        budget -= costs[best.key]
+    return selected
+
+
+def retrieve_memories(
+    store: BaseStore,
+    namespace: Sequence[str],
+    query: str,
+    limit: int = 5,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    candidates: int = DEFAULT_CANDIDATES,
+    mmr_lambda: float = DEFAULT_MMR_LAMBDA,
+) -> List[SearchItem]:
+    """
+    Search `candidates` memories (hybrid if the store fuses BM25) and keep at
+    most `limit` relevant, mutually diverse ones that fit in `token_budget`.
+    Only those count as used for the store's retention policy.
+    """
+    base = _base_store(store)
+    deferred = getattr(base, "deferred_access", nullcontext)
+    with deferred():
+        found = store.search(
+            tuple(namespace), query=query, limit=max(candidates, limit)
+        )
+    if not found:
+        return []
+    vectors = (
+        base.get_vectors(namespace, [item.key for item in found])
+        if hasattr(base, "get_vectors")
+        else {}
+    )
+    selected = mmr_select(found, vectors, limit, token_budget, mmr_lambda)
+    if hasattr(base, "record_access"):
+        base.record_access(selected)
+    return selected
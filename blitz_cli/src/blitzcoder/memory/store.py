@@ -0,0 +1,857 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    IndexConfig,
+    Item,
+    ListNamespacesOp,
+    MatchCondition,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from langgraph.store.base.embed import ensure_embeddings, get_text_at_path, tokenize_path
+from loguru import logger
+
+from ..paths import get_data_dir
+from .ann import DEFAULT_MIN_SIZE, IVFVectorIndex
+from .lexical import BM25Index
+from .policy import RetentionPolicy
+from .vector_index import VECTOR_DTYPES, VectorIndex
+
+# Namespace tuples are stored as one TEXT column joined on a control character,
+# which cannot appear in the user ids and labels the agent uses.
+NS_SEPARATOR = "\x1f"
+
+
+def _ns_to_text(namespace: Sequence[str]) -> str:
+    return NS_SEPARATOR.join(namespace)
+
+
+def _ns_from_text(text: str) -> Tuple[str, ...]:
+    return tuple(text.split(NS_SEPARATOR)) if text else ()
+
+
+def _tokenize(field: str) -> Any:
+    # "$" means the whole value; tokenize_path() would turn it into an empty path.
+    return "$" if field == "$" else tokenize_path(field)
+
+
+def _to_datetime(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+class SqliteMemoryStore(BaseStore):
+    """
+    Durable langgraph BaseStore backed by a single SQLite file.
+
+    Items and their embedding vectors (float32 blobs) live in SQLite in WAL
+    mode, so memories survive restarts and several processes can read the
+    same file while one writes. Writes go through one connection guarded by a
+    lock; every thread reads through its own connection.
+
+    Vectors are only embedded on put. For vector search each namespace is
+    loaded once into a VectorIndex (one normalized float32 matrix, scored with
+    a single matrix-vector product) which later puts in this process update
+    in place. Writes by another process drop the loaded indexes.
+
+    With `ann_nprobe` set, namespaces of at least `ann_min_size` vectors are
+    searched through an IVFVectorIndex instead; its centroids are stored in
+    the same file so they are trained once, not on every start.
+
+    `vector_dtype` ("float16" or "int8") shrinks the in-memory indexes to a
+    half or a quarter. SQLite keeps the float32 vectors, so with
+    `rerank_factor` > 1 the index returns that many times more candidates and
+    they are re-scored at full precision before the top k are taken.
+
+    A RetentionPolicy caps each namespace (evicting by LRU, search hits or
+    age), drops near-duplicate memories at insert time and blends a recency
+    decay into search scores. Items carry `last_accessed`/`hits` columns for
+    it; both are bumped whenever a search returns the item, or, for searches
+    inside `deferred_access()`, when the caller passes the items it kept to
+    `record_access`.
+
+    With `lexical_weight` > 0, vector hits are fused with an incremental BM25
+    index over each item's text, so exact identifiers (file names, error
+    codes) that embeddings blur together still surface.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        index: Optional[IndexConfig] = None,
+        ann_nprobe: Optional[int] = None,
+        ann_min_size: int = DEFAULT_MIN_SIZE,
+        vector_dtype: str = "float32",
+        rerank_factor: int = 4,
+        retention: Optional[RetentionPolicy] = None,
+        lexical_weight: float = 0.0,
+    ):
+        if vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(f"vector_dtype must be one of {VECTOR_DTYPES}")
+        self.path = path
+        self.ann_nprobe = ann_nprobe
+        self.ann_min_size = ann_min_size
+        self.vector_dtype = vector_dtype
+        self.rerank_factor = rerank_factor
+        self.retention = retention
+        self.lexical_weight = lexical_weight
+        self.index_config = None
+        self.embeddings = None
+        self._index_paths: List[Tuple[str, Any]] = []
+        if index:
+            self.index_config = dict(index)
+            self.embeddings = ensure_embeddings(index.get("embed"))
+            self._index_paths = [
+                (field, _tokenize(field)) for field in index.get("fields") or ["$"]
+            ]
+
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._lexical: Dict[str, BM25Index] = {}
+        self._index_lock = threading.Lock()
+        self._saved_centroids: Dict[str, int] = {}
+
+        self._conn = self._connect()
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                last_accessed REAL NOT NULL DEFAULT 0,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE TABLE IF NOT EXISTS vectors (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (namespace, key, field)
+            );
+            CREATE TABLE IF NOT EXISTS ann_centroids (
+                namespace TEXT PRIMARY KEY,
+                centroids BLOB NOT NULL,
+                trained_rows INTEGER NOT NULL
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(items)")}
+        # Files created before retention tracking existed lack these columns.
+        if "last_accessed" not in columns:
+            self._conn.execute(
+                "ALTER TABLE items ADD COLUMN last_accessed REAL NOT NULL DEFAULT 0"
+            )
+            self._conn.execute("UPDATE items SET last_accessed = updated_at")
+        if "hits" not in columns:
+            self._conn.execute("ALTER TABLE items ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self._data_version = self._read_data_version()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _read_data_version(self) -> int:
+        with self._write_lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external_writes(self):
+        # data_version only moves when *another* connection commits, so this
+        # catches a second blitzcoder process writing to the same file.
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            with self._index_lock:
+                self._indexes.clear()
+                self._lexical.clear()
+
+    # Batch entry points
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        ops = list(ops)
+        results: List[Result] = [None] * len(ops)
+        put_ops: Dict[Tuple[Tuple[str, ...], str], PutOp] = {}
+        if any(isinstance(op, SearchOp) for op in ops):
+            self._check_external_writes()
+
+        for i, op in enumerate(ops):
+            if isinstance(op, GetOp):
+                results[i] = self._get(op)
+            elif isinstance(op, SearchOp):
+                results[i] = self._search(op)
+            elif isinstance(op, ListNamespacesOp):
+                results[i] = self._list_namespaces(op)
+            elif isinstance(op, PutOp):
+                # Last write to the same key in a batch wins.
+                put_ops[(op.namespace, op.key)] = op
+            else:
+                raise ValueError(f"Unknown operation type: {type(op)}")
+
+        if put_ops:
+            self._apply_puts(list(put_ops.values()))
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.batch, list(ops)
+        )
+
+    # Reads
+
+    def _get(self, op: GetOp) -> Optional[Item]:
+        row = self._reader().execute(
+            "SELECT value, created_at, updated_at FROM items WHERE namespace = ? AND key = ?",
+            (_ns_to_text(op.namespace), op.key),
+        ).fetchone()
+        if row is None:
+            return None
+        return Item(
+            value=json.loads(row[0]),
+            key=op.key,
+            namespace=tuple(op.namespace),
+            created_at=_to_datetime(row[1]),
+            updated_at=_to_datetime(row[2]),
+        )
+
+    def _namespaces_with_prefix(self, prefix: Sequence[str]) -> List[str]:
+        rows = self._reader().execute("SELECT DISTINCT namespace FROM items").fetchall()
+        prefix = tuple(prefix)
+        return [
+            ns for (ns,) in rows if _ns_from_text(ns)[: len(prefix)] == prefix
+        ]
+
+    def _load_items(self, namespace: str, keys: Optional[Sequence[str]] = None) -> List[Item]:
+        conn = self._reader()
+        if keys is None:
+            rows = conn.execute(
+                "SELECT key, value, created_at, updated_at FROM items "
+                "WHERE namespace = ? ORDER BY updated_at DESC",
+                (namespace,),
+            ).fetchall()
+        else:
+            rows = []
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start : start + 500])
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(
+                    conn.execute(
+                        f"SELECT key, value, created_at, updated_at FROM items "
+                        f"WHERE namespace = ? AND key IN ({placeholders})",
+                        (namespace, *chunk),
+                    ).fetchall()
+                )
+        ns = _ns_from_text(namespace)
+        return [
+            Item(
+                value=json.loads(value),
+                key=key,
+                namespace=ns,
+                created_at=_to_datetime(created_at),
+                updated_at=_to_datetime(updated_at),
+            )
+            for key, value, created_at, updated_at in rows
+        ]
+
+    def _load_index(self, namespace: str) -> VectorIndex:
+        """Build the namespace's VectorIndex from disk; call with _index_lock held"""
+        index = self._indexes.get(namespace)
+        if index is not None:
+            return index
+        rows = self._reader().execute(
+            "SELECT key, vector FROM vectors WHERE namespace = ? ORDER BY key",
+            (namespace,),
+        ).fetchall()
+        dims = self.index_config["dims"]
+        if self.ann_nprobe:
+            saved = self._reader().execute(
+                "SELECT centroids, trained_rows FROM ann_centroids WHERE namespace = ?",
+                (namespace,),
+            ).fetchone()
+            index = IVFVectorIndex(
+                dims,
+                capacity=len(rows),
+                dtype=self.vector_dtype,
+                nprobe=self.ann_nprobe,
+                min_size=self.ann_min_size,
+                centroids=np.frombuffer(saved[0], dtype=np.float32) if saved else None,
+                trained_rows=saved[1] if saved else 0,
+            )
+            self._saved_centroids[namespace] = index.version
+        else:
+            index = VectorIndex(dims, capacity=len(rows), dtype=self.vector_dtype)
+        if rows:
+            keys: List[str] = []
+            owners: List[int] = []
+            for key, _ in rows:
+                if not keys or keys[-1] != key:
+                    keys.append(key)
+                owners.append(len(keys) - 1)
+            vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32)
+            index.add_many(keys, vectors, owners)
+        self._indexes[namespace] = index
+        self._save_centroids(namespace, index)
+        return index
+
+    def _load_lexical(self, namespace: str) -> BM25Index:
+        """Build the namespace's BM25 index from disk; call with _index_lock held"""
+        index = self._lexical.get(namespace)
+        if index is None:
+            index = BM25Index()
+            for key, value in self._reader().execute(
+                "SELECT key, value FROM items WHERE namespace = ?", (namespace,)
+            ):
+                index.add(key, _value_text(json.loads(value)))
+            self._lexical[namespace] = index
+        return index
+
+    def _save_centroids(self, namespace: str, index: VectorIndex):
+        """Persist IVF centroids after (re)training; call with _index_lock held"""
+        if not isinstance(index, IVFVectorIndex) or index.centroids is None:
+            return
+        if self._saved_centroids.get(namespace) == index.version:
+            return
+        with self._write_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ann_centroids (namespace, centroids, trained_rows) "
+                "VALUES (?, ?, ?)",
+                (namespace, index.centroids.tobytes(), index.trained_rows),
+            )
+            self._conn.commit()
+        self._saved_centroids[namespace] = index.version
+
+    def ann_recall(self, namespace: Sequence[str], queries: Sequence[str], k: int = 5) -> float:
+        """
+        Recall@k of the namespace's approximate search against exact search
+        for the given text queries (1.0 when the namespace is searched exactly).
+        """
+        vectors = self.embeddings.embed_documents(list(queries))
+        with self._index_lock:
+            index = self._load_index(_ns_to_text(namespace))
+            if not isinstance(index, IVFVectorIndex):
+                return 1.0
+            return index.recall(np.asarray(vectors, dtype=np.float32), k)
+
+    def _search(self, op: SearchOp) -> List[SearchItem]:
+        namespaces = self._namespaces_with_prefix(op.namespace_prefix)
+        wanted = op.offset + op.limit
+
+        if not (op.query and self.embeddings):
+            found: List[SearchItem] = []
+            for ns in namespaces:
+                for item in self._load_items(ns):
+                    if _matches_filter(item.value, op.filter):
+                        found.append(_search_item(item, None))
+            found.sort(key=lambda item: item.updated_at, reverse=True)
+            return found[op.offset : wanted]
+
+        query = self.embeddings.embed_query(op.query)
+
+        # Top-k per namespace, then merge. With a filter some candidates may be
+        # rejected, so widen k until the page is full or the index runs out.
+        k = wanted if not op.filter else max(wanted * 4, 32)
+        if self.retention and self.retention.half_life_days:
+            # Recency can lift an item above better matches; give it candidates.
+            k *= 4
+        rerank = self.rerank_factor if self.vector_dtype != "float32" else 1
+        while True:
+            candidates: Dict[str, List[Tuple[str, float]]] = {}
+            exhausted = True
+            with self._index_lock:
+                for ns in namespaces:
+                    index = self._load_index(ns)
+                    candidates[ns] = index.search(query, k * rerank)
+                    if k * rerank < len(index):
+                        exhausted = False
+            scored: List[Tuple[float, str, str]] = []
+            for ns, hits in candidates.items():
+                if rerank > 1:
+                    hits = self._rerank(ns, hits, query)[:k]
+                if self.lexical_weight:
+                    hits = self._fuse_lexical(ns, hits, op.query, query, k)
+                scored.extend((score, ns, key) for key, score in hits)
+            scored.sort(key=lambda entry: entry[0], reverse=True)
+            results, matched = self._page(scored, op)
+            if matched >= wanted or exhausted:
+                break
+            k *= 4
+
+        if matched >= wanted:
+            self._searched(results)
+            return results
+
+        # Like InMemoryStore, fill up with items that have no vectors.
+        with self._index_lock:
+            indexed = {ns: self._load_index(ns) for ns in namespaces}
+        for ns in namespaces:
+            for item in self._load_items(ns):
+                if item.key in indexed[ns] or not _matches_filter(item.value, op.filter):
+                    continue
+                if matched >= op.offset:
+                    results.append(_search_item(item, None))
+                matched += 1
+                if matched >= wanted:
+                    break
+            if matched >= wanted:
+                break
+        self._searched(results)
+        return results
+
+    @contextmanager
+    def deferred_access(self) -> Iterator[None]:
+        """
+        Searches by this thread inside the block don't mark their results as
+        used; the caller records the ones it keeps with `record_access`.
+        """
+        self._local.defer_access = True
+        try:
+            yield
+        finally:
+            self._local.defer_access = False
+
+    def _searched(self, results: List[SearchItem]):
+        if not getattr(self._local, "defer_access", False):
+            self.record_access(results)
+
+    def record_access(self, results: Sequence[SearchItem]):
+        """Feed LRU / lowest-score eviction: mark returned items as used"""
+        if not self.retention or not results:
+            return
+        now = time.time()
+        with self._write_lock:
+            self._conn.executemany(
+                "UPDATE items SET last_accessed = ?, hits = hits + 1 "
+                "WHERE namespace = ? AND key = ?",
+                [(now, _ns_to_text(item.namespace), item.key) for item in results],
+            )
+            self._conn.commit()
+
+    def _fetch_vectors(self, namespace: str, keys: Sequence[str]) -> List[Tuple[str, np.ndarray]]:
+        """Normalized float32 vectors of `keys` from disk, one (key, vector) per field"""
+        conn = self._reader()
+        fetched: List[Tuple[str, np.ndarray]] = []
+        for start in range(0, len(keys), 500):
+            chunk = list(keys[start : start + 500])
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, vector FROM vectors WHERE namespace = ? AND key IN ({placeholders})",
+                (namespace, *chunk),
+            ).fetchall()
+            if not rows:
+                continue
+            vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32)
+            vectors = vectors.reshape(len(rows), -1)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            fetched.extend(zip((key for key, _ in rows), vectors / norms))
+        return fetched
+
+    def _exact_scores(
+        self, namespace: str, keys: Sequence[str], query: Sequence[float]
+    ) -> Dict[str, float]:
+        """Full-precision cosine score per key (best field), read from disk"""
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        best: Dict[str, float] = {}
+        for key, vector in self._fetch_vectors(namespace, keys):
+            score = float(vector @ query)
+            if score > best.get(key, -np.inf):
+                best[key] = score
+        return best
+
+    def _rerank(
+        self, namespace: str, hits: List[Tuple[str, float]], query: Sequence[float]
+    ) -> List[Tuple[str, float]]:
+        """Re-score quantized-index hits against the float32 vectors on disk"""
+        if not hits:
+            return hits
+        best = self._exact_scores(namespace, [key for key, _ in hits], query)
+        # A key deleted by another process since the index was loaded keeps its
+        # approximate score; the item lookup in _page drops it anyway.
+        rescored = [(key, best.get(key, score)) for key, score in hits]
+        rescored.sort(key=lambda hit: hit[1], reverse=True)
+        return rescored
+
+    def _fuse_lexical(
+        self,
+        namespace: str,
+        hits: List[Tuple[str, float]],
+        query_text: str,
+        query: Sequence[float],
+        k: int,
+    ) -> List[Tuple[str, float]]:
+        """
+        Blend vector hits with the namespace's BM25 hits:
+        (1 - w) * cosine + w * bm25 / best bm25.
+        """
+        with self._index_lock:
+            lexical_hits = self._load_lexical(namespace).search(query_text, k)
+        if not lexical_hits:
+            return hits
+        weight = self.lexical_weight
+        top_bm25 = lexical_hits[0][1]
+        vector_scores = dict(hits)
+        missing = [key for key, _ in lexical_hits if key not in vector_scores]
+        if missing:
+            vector_scores.update(self._exact_scores(namespace, missing, query))
+        lexical_scores = {key: score / top_bm25 for key, score in lexical_hits}
+        fused = [
+            (key, (1 - weight) * vector_scores.get(key, 0.0) + weight * lexical_scores.get(key, 0.0))
+            for key in dict.fromkeys([key for key, _ in hits] + [key for key, _ in lexical_hits])
+        ]
+        fused.sort(key=lambda hit: hit[1], reverse=True)
+        return fused
+
+    def get_vectors(self, namespace: Sequence[str], keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        One normalized float32 vector per key (the mean of its embedded fields),
+        for callers that post-process search results, e.g. MMR.
+        """
+        grouped: Dict[str, List[np.ndarray]] = defaultdict(list)
+        for key, vector in self._fetch_vectors(_ns_to_text(namespace), list(keys)):
+            grouped[key].append(vector)
+        vectors = {}
+        for key, rows in grouped.items():
+            mean = np.mean(rows, axis=0)
+            vectors[key] = mean / (np.linalg.norm(mean) or 1.0)
+        return vectors
+
+    def _page(
+        self, scored: List[Tuple[float, str, str]], op: SearchOp
+    ) -> Tuple[List[SearchItem], int]:
+        """Resolve scored keys to items in score order, applying filter and offset"""
+        wanted = op.offset + op.limit
+        by_ns: Dict[str, List[str]] = defaultdict(list)
+        for _, ns, key in scored:
+            by_ns[ns].append(key)
+        items = {
+            (ns, item.key): item
+            for ns, keys in by_ns.items()
+            for item in self._load_items(ns, keys)
+        }
+        if self.retention and self.retention.half_life_days:
+            now = time.time()
+            decayed = []
+            for score, ns, key in scored:
+                item = items.get((ns, key))
+                if item is not None:
+                    age = now - item.updated_at.timestamp()
+                    decayed.append((score * self.retention.recency_factor(age), ns, key))
+            scored = decayed
+            scored.sort(key=lambda entry: entry[0], reverse=True)
+        results: List[SearchItem] = []
+        matched = 0
+        for score, ns, key in scored:
+            item = items.get((ns, key))
+            if item is None or not _matches_filter(item.value, op.filter):
+                continue
+            if matched >= op.offset:
+                results.append(_search_item(item, score))
+            matched += 1
+            if matched >= wanted:
+                break
+        return results, matched
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> List[Tuple[str, ...]]:
+        rows = self._reader().execute("SELECT DISTINCT namespace FROM items").fetchall()
+        namespaces = [_ns_from_text(ns) for (ns,) in rows]
+        if op.match_conditions:
+            namespaces = [
+                ns
+                for ns in namespaces
+                if all(_does_match(condition, ns) for condition in op.match_conditions)
+            ]
+        if op.max_depth is not None:
+            namespaces = sorted({ns[: op.max_depth] for ns in namespaces})
+        else:
+            namespaces = sorted(namespaces)
+        return namespaces[op.offset : op.offset + op.limit]
+
+    # Writes
+
+    def _texts_to_embed(self, op: PutOp) -> List[Tuple[str, str]]:
+        """(field path, text) pairs to embed for a put"""
+        if not self.embeddings or op.value is None or op.index is False:
+            return []
+        if op.index is None:
+            paths = self._index_paths
+        else:
+            paths = [(field, _tokenize(field)) for field in op.index]
+        pairs = []
+        for path, tokens in paths:
+            texts = get_text_at_path(op.value, tokens)
+            if len(texts) > 1:
+                pairs.extend((f"{path}.{i}", text) for i, text in enumerate(texts))
+            elif texts:
+                pairs.append((path, texts[0]))
+        return pairs
+
+    def _apply_puts(self, put_ops: List[PutOp]):
+        to_embed = [(op, self._texts_to_embed(op)) for op in put_ops]
+        texts = [text for _, pairs in to_embed for _, text in pairs]
+        # Embed outside the write lock: it is by far the slowest step.
+        vectors = self.embeddings.embed_documents(texts) if texts else []
+        matrix = np.asarray(vectors, dtype=np.float32)
+
+        prepared: List[Tuple[PutOp, List[Tuple[str, str]], np.ndarray]] = []
+        offset = 0
+        for op, pairs in to_embed:
+            prepared.append((op, pairs, matrix[offset : offset + len(pairs)]))
+            offset += len(pairs)
+        duplicates: List[Tuple[str, str]] = []
+        if self.retention and self.retention.dedup_threshold is not None:
+            prepared, duplicates = self._drop_duplicates(prepared)
+
+        now = time.time()
+        updates: List[Tuple[str, str, Optional[np.ndarray]]] = []
+        evicted: List[Tuple[str, str]] = []
+        with self._write_lock:
+            try:
+                for op, pairs, op_vectors in prepared:
+                    ns = _ns_to_text(op.namespace)
+                    updates.append((ns, op.key, op_vectors if op.value is not None else None))
+                    self._delete(ns, op.key, vectors_only=op.value is not None)
+                    if op.value is None:
+                        continue
+                    self._conn.execute(
+                        "INSERT INTO items "
+                        "(namespace, key, value, created_at, updated_at, last_accessed) "
+                        "VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (namespace, key) DO UPDATE SET "
+                        "value = excluded.value, updated_at = excluded.updated_at",
+                        (ns, op.key, json.dumps(op.value), now, now, now),
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO vectors (namespace, key, field, vector) "
+                        "VALUES (?, ?, ?, ?)",
+                        [
+                            (ns, op.key, field, vector.tobytes())
+                            for (field, _), vector in zip(pairs, op_vectors)
+                        ],
+                    )
+                if duplicates:
+                    self._conn.executemany(
+                        "UPDATE items SET last_accessed = ?, hits = hits + 1 "
+                        "WHERE namespace = ? AND key = ?",
+                        [(now, ns, key) for ns, key in duplicates],
+                    )
+                if self.retention and self.retention.max_items:
+                    inserted = {ns for ns, _, op_vectors in updates if op_vectors is not None}
+                    for ns in inserted:
+                        evicted.extend((ns, key) for key in self._evict(ns))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if evicted:
+            self.retention.evicted += len(evicted)
+            logger.debug(f"Evicted {len(evicted)} memories over the per-namespace cap")
+        # Keep already-loaded indexes in step instead of reloading them.
+        with self._index_lock:
+            for op, _, _ in prepared:
+                lexical = self._lexical.get(_ns_to_text(op.namespace))
+                if lexical is not None:
+                    if op.value is None:
+                        lexical.remove(op.key)
+                    else:
+                        lexical.add(op.key, _value_text(op.value))
+            for ns, key in evicted:
+                if ns in self._lexical:
+                    self._lexical[ns].remove(key)
+            for ns, key, op_vectors in updates + [(ns, key, None) for ns, key in evicted]:
+                index = self._indexes.get(ns)
+                if index is None:
+                    continue
+                if op_vectors is None or not len(op_vectors):
+                    index.remove(key)
+                else:
+                    index.add(key, op_vectors)
+                self._save_centroids(ns, index)
+
+    def _delete(self, namespace: str, key: str, vectors_only: bool = False):
+        self._conn.execute(
+            "DELETE FROM vectors WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        if not vectors_only:
+            self._conn.execute(
+                "DELETE FROM items WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+
+    def _evict(self, namespace: str) -> List[str]:
+        """Delete the namespace's overflow per the eviction order; call under _write_lock"""
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM items WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+        excess = count - self.retention.max_items
+        if excess <= 0:
+            return []
+        keys = [
+            key
+            for (key,) in self._conn.execute(
+                f"SELECT key FROM items WHERE namespace = ? "
+                f"ORDER BY {self.retention.eviction_order} LIMIT ?",
+                (namespace, excess),
+            )
+        ]
+        for key in keys:
+            self._delete(namespace, key)
+        return keys
+
+    def _drop_duplicates(self, prepared):
+        """
+        Split puts into those to apply and new memories that nearly duplicate
+        one already in the namespace (or earlier in the same batch). Deletes
+        and updates of an existing key are always applied.
+        """
+        threshold = self.retention.dedup_threshold
+        kept = []
+        duplicates: List[Tuple[str, str]] = []
+        batch: Dict[str, VectorIndex] = {}
+        for op, pairs, op_vectors in prepared:
+            if op.value is None or not len(op_vectors):
+                kept.append((op, pairs, op_vectors))
+                continue
+            ns = _ns_to_text(op.namespace)
+            with self._index_lock:
+                index = self._load_index(ns)
+                if op.key in index:
+                    kept.append((op, pairs, op_vectors))
+                    continue
+                hits = [hit for vector in op_vectors for hit in index.search(vector, 1)]
+            pending = batch.setdefault(ns, VectorIndex(op_vectors.shape[1]))
+            hits.extend(hit for vector in op_vectors for hit in pending.search(vector, 1))
+            best = max(hits, key=lambda hit: hit[1], default=None)
+            if best is not None and best[1] >= threshold:
+                duplicates.append((ns, best[0]))
+                continue
+            pending.add(op.key, op_vectors)
+            kept.append((op, pairs, op_vectors))
+        self.retention.duplicates += len(duplicates)
+        return kept, duplicates
+
+    def close(self):
+        with self._write_lock:
+            self._conn.close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _value_text(value: Any) -> str:
+    """All string leaves of a stored value, for lexical indexing"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return "\n".join(_value_text(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return "\n".join(_value_text(v) for v in value)
+    return ""
+
+
+def _search_item(item: Item, score: Optional[float]) -> SearchItem:
+    return SearchItem(
+        namespace=item.namespace,
+        key=item.key,
+        value=item.value,
+        created_at=item.created_at,
+        updated_at=item.updated_at,
+        score=score,
+    )
+
+
+def _matches_filter(value: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    if not filter:
+        return True
+    return all(_compare_values(value.get(key), expected) for key, expected in filter.items())
+
+
+def _compare_values(item_value: Any, filter_value: Any) -> bool:
+    """Same filter semantics as langgraph's InMemoryStore"""
+    if isinstance(filter_value, dict):
+        if any(k.startswith("$") for k in filter_value):
+            return all(
+                _apply_operator(item_value, op_key, op_value)
+                for op_key, op_value in filter_value.items()
+            )
+        if not isinstance(item_value, dict):
+            return False
+        return all(_compare_values(item_value.get(k), v) for k, v in filter_value.items())
+    if isinstance(filter_value, (list, tuple)):
+        return (
+            isinstance(item_value, (list, tuple))
+            and len(item_value) == len(filter_value)
+            and all(_compare_values(iv, fv) for iv, fv in zip(item_value, filter_value))
+        )
+    return item_value == filter_value
+
+
+def _apply_operator(value: Any, operator: str, op_value: Any) -> bool:
+    if operator == "$eq":
+        return value == op_value
+    if operator == "$ne":
+        return value != op_value
+    if value is None:
+        return False
+    if operator == "$gt":
+        return float(value) > float(op_value)
+    if operator == "$gte":
+        return float(value) >= float(op_value)
+    if operator == "$lt":
+        return float(value) < float(op_value)
+    if operator == "$lte":
+        return float(value) <= float(op_value)
+    raise ValueError(f"Unsupported operator: {operator}")
+
+
+def _does_match(condition: MatchCondition, namespace: Tuple[str, ...]) -> bool:
+    path = condition.path
+    if len(namespace) < len(path):
+        return False
+    if condition.match_type == "prefix":
+        pairs = zip(namespace, path)
+    elif condition.match_type == "suffix":
+        pairs = zip(reversed(namespace), reversed(path))
+    else:
+        raise ValueError(f"Unsupported match type: {condition.match_type}")
+    return all(p == "*" or k == p for k, p in pairs)
+
+
+def open_default_store(
+    index: Optional[IndexConfig] = None, **kwargs: Any
+) -> Optional[SqliteMemoryStore]:
+    """Open the memory store in the BlitzCoder data directory, if possible"""
+    try:
+        return SqliteMemoryStore(
+            os.path.join(get_data_dir(), "memory.sqlite3"), index=index, **kwargs
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Persistent memory disabled, could not open it: {e}")
+        return None
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.prebuilt import ToolNode
+from langgraph.types import Command
+
+DEFAULT_MAX_CHARS = 8000
+DEFAULT_MAX_STORE_BYTES = 256 * 2**20
+# Share of the cap given to the start and the end of a long output; the rest
+# is left for the summary and the handle notice.
+HEAD_SHARE = 0.6
+TAIL_SHARE = 0.25
+_HANDLE = re.compile(r"^[0-9a-f]{16}$")
+_ERROR_LINE = re.compile(r"error|exception|traceback|failed|fatal|warn", re.IGNORECASE)
+
+
+def summarize_output(text: str) -> str:
+    """A few facts about a long output that its head and tail may not show"""
+    lines = text.splitlines()
+    facts = [f"{len(text):,} chars, {len(lines):,} lines"]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, list):
+        facts.append(f"a list of {len(data):,} entries")
+        tops = Counter(
+            re.split(r"[\\/]", entry, 1)[0] for entry in data if isinstance(entry, str)
+        )
+        if len(tops) > 1:
+            facts.append(
+                "mostly under "
+                + ", ".join(f"{name} ({count:,})" for name, count in tops.most_common(5))
+            )
+    summary = "; ".join(facts)
+    errors = []
+    for line in lines:
+        line = line.strip()
+        if _ERROR_LINE.search(line) and line not in errors:
+            errors.append(line[:200])
+            if len(errors) == 5:
+                break
+    if errors:
+        summary += "\nError/warning lines:\n" + "\n".join(errors)
+    return summary
+
+
+class ToolOutputStore:
+    """
+    Local blob store for tool outputs too long to keep in the conversation.
+
+    Each payload is written once to `<directory>/<handle>.txt`, the handle
+    being a prefix of its SHA-256, so repeated identical outputs share a file.
+    Files not read or written recently are deleted once the directory grows
+    past `max_bytes`. `max_chars` is how much of an output may stay inline.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_chars: int = DEFAULT_MAX_CHARS,
+        max_bytes: int = DEFAULT_MAX_STORE_BYTES,
+    ):
+        self.directory = directory
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self) -> Iterable[os.DirEntry]:
+        return (e for e in os.scandir(self.directory) if e.name.endswith(".txt"))
+
+    def _path(self, handle: str) -> Optional[str]:
+        if not _HANDLE.match(handle or ""):
+            return None
+        return os.path.join(self.directory, f"{handle}.txt")
+
+    def put(self, text: str) -> str:
+        """Save `text` and return its handle"""
+        data = text.encode("utf-8")
+        handle = hashlib.sha256(data).hexdigest()[:16]
+        path = self._path(handle)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                return handle
+            with open(path, "wb") as f:
+                f.write(data)
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._prune(keep=path)
+        return handle
+
+    def _prune(self, keep: str):
+        # Called with _lock held; oldest first until back under the limit.
+        for entry in sorted(self._entries(), key=lambda e: e.stat().st_mtime):
+            if self._total <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._total -= size
+
+    def read(self, handle: str, offset: int = 0, length: Optional[int] = None) -> str:
+        """
+        Characters [offset, offset + length) of a saved output (at most
+        `max_chars` of them), with their position
+        """
+        length = self.max_chars if length is None else min(length, self.max_chars)
+        path = self._path(handle)
+        if path is None or not os.path.exists(path):
+            return f"Error: no saved tool output with handle {handle!r}"
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        os.utime(path)
+        offset = max(offset, 0)
+        end = min(offset + max(length, 0), len(text))
+        header = f"[{handle}: chars {offset:,}-{end:,} of {len(text):,}]"
+        if end < len(text):
+            header += f" (continue with offset={end})"
+        return f"{header}\n{text[offset:end]}"
+
+    def cap(self, text: str, tool_name: str) -> str:
+        """
+        `text` itself if it fits in `max_chars`; otherwise its head, tail and
+        summary, with the full payload saved under a handle.
+        """
+        max_chars = self.max_chars
+        if len(text) <= max_chars:
+            return text
+        handle = self.put(text)
+        head = text[: int(max_chars * HEAD_SHARE)]
+        tail = text[len(text) - int(max_chars * TAIL_SHARE) :]
+        omitted = len(text) - len(head) - len(tail)
+        return (
+            f"[Output of {tool_name} truncated: {summarize_output(text)}]\n"
+            f"{head}\n"
+            f"[... {omitted:,} chars omitted ...]\n"
+            f"{tail}\n"
+            f'[Full output saved as handle "{handle}". Call '
+            f'read_tool_output(handle="{handle}", offset={len(head)}, length={max_chars}) '
+            "to read the omitted part.]"
+        )
+
+
+class CappedToolNode(ToolNode):
+    """
+    ToolNode whose results are capped by a ToolOutputStore before they enter
+    the message history (and with it every later model call and checkpoint).
+    Tools named in `uncapped` pass through unchanged.
+
+    The cap is applied to what the node returns, so it relies only on the
+    public Runnable interface, not on how ToolNode runs each call.
+    """
+
+    def __init__(
+        self,
+        tools,
+        *,
+        output_store: ToolOutputStore,
+        uncapped: Iterable[str] = (),
+        **kwargs,
+    ):
+        super().__init__(tools, **kwargs)
+        self.output_store = output_store
+        self.uncapped = set(uncapped)
+
+    def _cap(self, message):
+        if (
+            isinstance(message, ToolMessage)
+            and isinstance(message.content, str)
+            and message.name not in self.uncapped
+        ):
+            message.content = self.output_store.cap(
+                message.content, message.name or "tool"
+            )
+        return message
+
+    def _cap_output(self, output: Any) -> Any:
+        # ToolNode returns {"messages": [...]}, a bare list of messages, or
+        # Commands (alone or in that list) whose update carries the messages.
+        if isinstance(output, list):
+            return [self._cap_output(item) for item in output]
+        if isinstance(output, Command) and isinstance(output.update, dict):
+            self._cap_output(output.update)
+        elif isinstance(output, dict):
+            for message in output.get(self.messages_key) or []:
+                self._cap(message)
+        else:
+            self._cap(output)
+        return output
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs):
+        return self._cap_output(super().invoke(input, config, **kwargs))
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs
+    ):
+        return self._cap_output(await super().ainvoke(input, config, **kwargs))
@@ -0,0 +1,245 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+INITIAL_CAPACITY = 64
+VECTOR_DTYPES = ("float32", "float16", "int8")
+# Quantized rows are decoded to float32 this many at a time while scoring, so a
+# query never materializes a full-precision copy of the matrix.
+DECODE_BLOCK = 8192
+
+
+class VectorIndex:
+    """
+    Exact cosine top-k over the vectors of one namespace.
+
+    Vectors are normalized on insert and kept in a single contiguous matrix
+    that grows geometrically, so appends are amortized O(1) and a query is one
+    matrix-vector product plus an `argpartition`. An item may own several rows
+    (one per embedded field); its score is the best of them. Removed rows are
+    masked out and reclaimed by `compact()` once they make up half of the
+    matrix.
+
+    `dtype` sets how rows are held in memory: "float32", "float16" (half the
+    size) or "int8" (a quarter, plus one float32 scale per row: each row is
+    scaled so its largest component maps to 127).
+    """
+
+    def __init__(self, dims: int, capacity: int = INITIAL_CAPACITY, dtype: str = "float32"):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"dtype must be one of {VECTOR_DTYPES}, got {dtype!r}")
+        self.dims = dims
+        self.dtype = dtype
+        capacity = max(capacity, 1)
+        self._matrix = np.zeros((capacity, dims), dtype=np.dtype(dtype))
+        self._scale = np.ones(capacity, dtype=np.float32) if dtype == "int8" else None
+        self._owner = np.zeros(capacity, dtype=np.int64)  # row -> item slot
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._rows = 0
+        self._dead_rows = 0
+        self._multi_row = False
+        # Item slots: slot -> key and key -> (slot, rows); slots are never reused
+        # until compaction so the owner array stays valid.
+        self._keys: List[Optional[str]] = []
+        self._slots: Dict[str, Tuple[int, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the live part of the vector matrix"""
+        size = self._matrix[: self._rows].nbytes
+        if self._scale is not None:
+            size += self._scale[: self._rows].nbytes
+        return size
+
+    def _reserve(self, extra: int):
+        needed = self._rows + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        rows = self._rows
+        matrix = np.zeros((capacity, self.dims), dtype=self._matrix.dtype)
+        matrix[:rows] = self._matrix[:rows]
+        owner = np.zeros(capacity, dtype=np.int64)
+        owner[:rows] = self._owner[:rows]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:rows] = self._alive[:rows]
+        if self._scale is not None:
+            scale = np.ones(capacity, dtype=np.float32)
+            scale[:rows] = self._scale[:rows]
+            self._scale = scale
+        self._matrix, self._owner, self._alive = matrix, owner, alive
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _write_rows(self, start: int, vectors: np.ndarray):
+        """Normalize `vectors` and store them (quantized if needed) from row `start`"""
+        vectors = self._normalize(vectors)
+        end = start + len(vectors)
+        if self.dtype == "int8":
+            peak = np.abs(vectors).max(axis=1)
+            peak[peak == 0] = 1.0
+            self._matrix[start:end] = np.rint(vectors * (127.0 / peak)[:, None])
+            self._scale[start:end] = peak / 127.0
+        else:
+            self._matrix[start:end] = vectors
+
+    def _decode(self, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        """float32 copy of the stored (normalized) rows"""
+        vectors = self._matrix[rows].astype(np.float32)
+        if self._scale is not None:
+            vectors *= self._scale[rows][:, None]
+        return vectors
+
+    def _row_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot products of `query` with all rows, or with the given row numbers"""
+        if self.dtype == "float32":
+            matrix = self._matrix[: self._rows] if rows is None else self._matrix[rows]
+            return matrix @ query
+        count = self._rows if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, DECODE_BLOCK):
+            end = min(start + DECODE_BLOCK, count)
+            block = slice(start, end) if rows is None else rows[start:end]
+            scores[start:end] = self._matrix[block].astype(np.float32) @ query
+            if self._scale is not None:
+                scores[start:end] *= self._scale[block]
+        return scores
+
+    def add(self, key: str, vectors: Sequence[Sequence[float]]):
+        """Insert or replace the vectors of `key`"""
+        self.remove(key)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dims)
+        if not len(vectors):
+            return
+        self._reserve(len(vectors))
+        start, end = self._rows, self._rows + len(vectors)
+        slot = len(self._keys)
+        self._write_rows(start, vectors)
+        self._owner[start:end] = slot
+        self._alive[start:end] = True
+        self._rows = end
+        self._keys.append(key)
+        self._slots[key] = (slot, list(range(start, end)))
+        if len(vectors) > 1:
+            self._multi_row = True
+
+    def add_many(self, keys: Sequence[str], vectors: np.ndarray, owners: Sequence[int]):
+        """
+        Bulk load rows: `owners[i]` is the position in `keys` that row `i` of
+        `vectors` belongs to. Intended for filling an empty index from disk.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dims)
+        owners = np.asarray(owners, dtype=np.int64)
+        for key in keys:
+            self.remove(key)
+        self._reserve(len(vectors))
+        base_slot, start = len(self._keys), self._rows
+        end = start + len(vectors)
+        self._write_rows(start, vectors)
+        self._owner[start:end] = owners + base_slot
+        self._alive[start:end] = True
+        self._rows = end
+        self._keys.extend(keys)
+        rows: Dict[int, List[int]] = {i: [] for i in range(len(keys))}
+        for row, owner in enumerate(owners.tolist(), start):
+            rows[owner].append(row)
+        for i, key in enumerate(keys):
+            self._slots[key] = (base_slot + i, rows[i])
+        if len(owners) != len(keys):
+            self._multi_row = True
+
+    def remove(self, key: str):
+        entry = self._slots.pop(key, None)
+        if entry is None:
+            return
+        slot, rows = entry
+        self._alive[rows] = False
+        self._keys[slot] = None
+        self._dead_rows += len(rows)
+        if self._dead_rows * 2 > self._rows:
+            self.compact()
+
+    def compact(self):
+        """Drop removed rows and item slots"""
+        alive = np.flatnonzero(self._alive[: self._rows])
+        live_slots = [slot for slot, key in enumerate(self._keys) if key is not None]
+        remap = np.full(len(self._keys), -1, dtype=np.int64)
+        remap[live_slots] = np.arange(len(live_slots))
+        keys = [self._keys[slot] for slot in live_slots]
+        owner = remap[self._owner[alive]]
+
+        # Rows are already normalized (and quantized); move them as they are.
+        count = len(alive)
+        capacity = max(INITIAL_CAPACITY, 1 << max(count - 1, 0).bit_length())
+        matrix = np.zeros((capacity, self.dims), dtype=self._matrix.dtype)
+        matrix[:count] = self._matrix[alive]
+        if self._scale is not None:
+            scale = np.ones(capacity, dtype=np.float32)
+            scale[:count] = self._scale[alive]
+            self._scale = scale
+        self._matrix = matrix
+        self._owner = np.zeros(capacity, dtype=np.int64)
+        self._owner[:count] = owner
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:count] = True
+        self._rows = count
+        self._dead_rows = 0
+        self._keys = keys
+        rows: Dict[int, List[int]] = {i: [] for i in range(len(keys))}
+        for row, slot in enumerate(owner.tolist()):
+            rows[slot].append(row)
+        self._slots = {key: (i, rows[i]) for i, key in enumerate(keys)}
+        self._multi_row = any(len(r) > 1 for r in rows.values())
+
+    @staticmethod
+    def _prepare_query(query: Sequence[float]) -> np.ndarray:
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def scores(self, query: Sequence[float]) -> np.ndarray:
+        """Cosine score per item slot (-inf for removed slots)"""
+        row_scores = self._row_scores(self._prepare_query(query))
+        if self._dead_rows:
+            row_scores[~self._alive[: self._rows]] = -np.inf
+        if not self._multi_row:
+            # Without removals/multi-row items, slot i is row i.
+            if not self._dead_rows and len(self._keys) == self._rows:
+                return row_scores
+            slot_scores = np.full(len(self._keys), -np.inf, dtype=np.float32)
+            slot_scores[self._owner[: self._rows]] = row_scores
+            return slot_scores
+        slot_scores = np.full(len(self._keys), -np.inf, dtype=np.float32)
+        np.maximum.at(slot_scores, self._owner[: self._rows], row_scores)
+        return slot_scores
+
+    def search(self, query: Sequence[float], k: int) -> List[Tuple[str, float]]:
+        """The `k` best (key, score) pairs, best first"""
+        if k <= 0 or not self._slots:
+            return []
+        return self._top_k(self.scores(query), k)
+
+    def _top_k(self, scores: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        k = min(k, len(self._slots))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self._keys[slot], float(scores[slot]))
+            for slot in top.tolist()
+            if self._keys[slot] is not None and scores[slot] > -np.inf
+        ]
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from langgraph.store.base import BaseStore, Op, PutOp, Result
+from loguru import logger
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class BackgroundWriteStore(BaseStore):
+    """
+    A BaseStore wrapper that takes puts off the caller's thread.
+
+    Puts are queued and applied by a daemon thread, which hands them to the
+    wrapped store in batches of up to `max_batch` (so a batch is one
+    `embed_documents` call) once the batch is full or `flush_interval`
+    seconds have passed since its first put. Gets, searches and namespace
+    listings wait for queued puts first, so reads always see earlier writes;
+    such a `flush()` has the writer hand over what is queued at once rather
+    than wait out the interval. `close()` flushes whatever is still queued;
+    it also runs at exit. Puts after that are written synchronously.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.store = store
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.last_batch_seconds = 0.0
+        self._queue: List[PutOp] = []
+        self._in_flight = 0
+        # Set by flush(): write without waiting for the interval, then set
+        # each waiting flush's event once the queue is empty.
+        self._drain = False
+        self._flushed: List[threading.Event] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        # Called with _cond held.
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="memory-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._queue) < self.max_batch and not (
+                    self._closed or self._drain
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                ops = self._queue[: self.max_batch]
+                del self._queue[: self.max_batch]
+                self._in_flight = len(ops)
+            self._write(ops)
+            with self._cond:
+                self._in_flight = 0
+                if not self._queue:
+                    self._drain = False
+                    for done in self._flushed:
+                        done.set()
+                    self._flushed.clear()
+                self._cond.notify_all()
+
+    def _write(self, ops: List[PutOp]):
+        start = time.perf_counter()
+        try:
+            self.store.batch(ops)
+            self.written += len(ops)
+        except Exception as e:
+            # Losing a memory must never take the agent down with it.
+            self.failed += len(ops)
+            logger.warning(f"Failed to write {len(ops)} memories: {e}")
+        self.batches += 1
+        self.last_batch_seconds = time.perf_counter() - start
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued put has been written; False on timeout"""
+        with self._cond:
+            if not self._queue and not self._in_flight:
+                return True
+            done = threading.Event()
+            self._flushed.append(done)
+            self._drain = True
+            self._cond.notify_all()
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Write out queued puts and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def batch(self, ops: Iterable[Op]) -> List[Result]:
+        ops = list(ops)
+        puts = [op for op in ops if isinstance(op, PutOp)]
+        reads = [(i, op) for i, op in enumerate(ops) if not isinstance(op, PutOp)]
+        results: List[Result] = [None] * len(ops)
+        if reads:
+            self.flush()
+            for (i, _), result in zip(reads, self.store.batch([op for _, op in reads])):
+                results[i] = result
+        if puts:
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._queue.extend(puts)
+                    self._ensure_thread()
+                    self._cond.notify_all()
+            if closed:
+                # The writer thread is gone or finishing; write in place.
+                self.store.batch(puts)
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> List[Result]:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.batch, list(ops)
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            queued = len(self._queue) + self._in_flight
+        return {
+            "queued": queued,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_seconds": self.last_batch_seconds,
+        }
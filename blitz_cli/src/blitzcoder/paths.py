@@ -0,0 +1,38 @@
+import os
+
+
+def get_data_dir() -> str:
+    """
+    Directory for BlitzCoder's local state (caches, memory, checkpoints).
+
+    Defaults to ~/.blitzcoder and can be moved with the BLITZCODER_HOME
+    environment variable. The directory is created if it does not exist.
+    """
+    path = os.getenv("BLITZCODER_HOME") or os.path.join(
+        os.path.expanduser("~"), ".blitzcoder"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_local_user_id() -> str:
+    """
+    Stable user id for this machine's memories.
+
+    Generated once and kept in the data directory, so every `chat` and
+    `search-memories-cli` run reads and writes the same memory namespace.
+    """
+    import uuid
+
+    path = os.path.join(get_data_dir(), "user_id")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            user_id = f.read().strip()
+        if user_id:
+            return user_id
+    except FileNotFoundError:
+        pass
+    user_id = str(uuid.uuid4())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(user_id)
+    return user_id
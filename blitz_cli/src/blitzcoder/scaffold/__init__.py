@@ -0,0 +1,64 @@
+"""
+BlitzCoder Scaffold Module
+
+Scheduling of the model calls that generate a scaffolded project's files.
+"""
+
+from .engine import (
+    DEFAULT_MAX_WORKERS,
+    FileGenerationEngine,
+    FileJob,
+    FileResult,
+    GenerationReport,
+)
+from .manifest import (
+    COMPLETE,
+    FAILED,
+    MANIFEST_NAME,
+    PENDING,
+    ScaffoldManifest,
+    content_hash,
+)
+from .plan import (
+    DEFAULT_SIGNATURE_CHARS,
+    PlanStreamParser,
+    extract_signatures,
+    plan_jobs,
+    resolve_dependencies,
+    stream_plan_jobs,
+)
+
+from .schemas import (
+    MAX_PROJECT_DEPTH,
+    MAX_PROJECT_FILES,
+    ArchitecturePlan,
+    Component,
+    FileSpec,
+    ProjectStructure,
+)
+
+__all__ = [
+    "COMPLETE",
+    "DEFAULT_MAX_WORKERS",
+    "DEFAULT_SIGNATURE_CHARS",
+    "FAILED",
+    "MANIFEST_NAME",
+    "MAX_PROJECT_DEPTH",
+    "MAX_PROJECT_FILES",
+    "PENDING",
+    "ArchitecturePlan",
+    "Component",
+    "FileGenerationEngine",
+    "FileJob",
+    "FileResult",
+    "FileSpec",
+    "GenerationReport",
+    "PlanStreamParser",
+    "ProjectStructure",
+    "ScaffoldManifest",
+    "content_hash",
+    "extract_signatures",
+    "plan_jobs",
+    "resolve_dependencies",
+    "stream_plan_jobs",
+]
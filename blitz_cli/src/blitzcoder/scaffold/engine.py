@@ -0,0 +1,294 @@
+import contextvars
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+DEFAULT_MAX_WORKERS = 4
+
+# Events of a run, from the job feed and from finished jobs
+_JOB, _FEED_ERROR, _FED, _DONE = range(4)
+
+
+class FileJob:
+    """
+    One file to generate: its path in the project, its plan entry, the paths
+    of the files it depends on and its rank among jobs ready at the same time
+    (lower first). `upstream` holds the dependencies' generated content by
+    the time the job starts.
+    """
+
+    __slots__ = ("path", "info", "deps", "rank", "upstream")
+
+    def __init__(
+        self,
+        path: str,
+        info: Optional[Dict[str, Any]] = None,
+        deps: Iterable[str] = (),
+        rank: int = 0,
+    ):
+        self.path = path
+        self.info = info or {}
+        self.deps = tuple(deps)
+        self.rank = rank
+        self.upstream: Dict[str, str] = {}
+
+
+class FileResult:
+    __slots__ = ("path", "content", "error", "seconds")
+
+    def __init__(self, path: str, content: str, error: Optional[str], seconds: float):
+        self.path = path
+        self.content = content
+        self.error = error
+        self.seconds = seconds
+
+
+class GenerationReport:
+    """Outcome of a generation run, in completion order"""
+
+    def __init__(
+        self,
+        results: List[FileResult],
+        wall_s: float,
+        critical_path_s: float = 0.0,
+        first_file_s: Optional[float] = None,
+    ):
+        self.results = results
+        self.wall_s = wall_s
+        # The slowest chain of dependent files: no amount of workers beats it
+        self.critical_path_s = critical_path_s
+        # From the start of the run, streaming the jobs included
+        self.first_file_s = first_file_s
+
+    @property
+    def sequential_s(self) -> float:
+        # What the same calls cost back to back, i.e. the one-at-a-time loop
+        return sum(result.seconds for result in self.results)
+
+    @property
+    def speedup(self) -> float:
+        return self.sequential_s / self.wall_s if self.wall_s else 1.0
+
+    @property
+    def failed(self) -> List[FileResult]:
+        return [result for result in self.results if result.error]
+
+
+def _critical_path(edges: Dict[str, tuple], results: List[FileResult]) -> float:
+    # `edges` must be acyclic
+    seconds = {result.path: result.seconds for result in results}
+    finish: Dict[str, float] = {}
+
+    def finish_of(path: str) -> float:
+        if path not in finish:
+            longest = max((finish_of(dep) for dep in edges[path]), default=0.0)
+            finish[path] = longest + seconds.get(path, 0.0)
+        return finish[path]
+
+    return max((finish_of(path) for path in edges), default=0.0)
+
+
+def _break_cycles(waiting_on: Dict[str, Set[str]], jobs: Dict[str, FileJob]):
+    """
+    Drop the dependency edges that would close a cycle. Edges that agree
+    with the jobs' ranks are kept first, so the cycle's first-ranked job is
+    the one that goes without.
+    """
+    kept: Dict[str, set] = {path: set() for path in waiting_on}
+
+    def reaches(start: str, target: str) -> bool:
+        stack, seen = [start], set()
+        while stack:
+            path = stack.pop()
+            if path == target:
+                return True
+            if path not in seen:
+                seen.add(path)
+                stack.extend(kept[path])
+        return False
+
+    edges = sorted(
+        ((path, dep) for path, deps in waiting_on.items() for dep in deps),
+        key=lambda e: (jobs[e[1]].rank > jobs[e[0]].rank, jobs[e[0]].rank, e),
+    )
+    for path, dep in edges:
+        if reaches(dep, path):
+            logger.warning(f"Dependency cycle: generating {path} before {dep}")
+            waiting_on[path].discard(dep)
+        else:
+            kept[path].add(dep)
+
+
+class FileGenerationEngine:
+    """
+    Generates files on a bounded thread pool and hands each one to `write`
+    as soon as its content arrives.
+
+    Jobs are scheduled as a DAG: a job starts once every job it depends on
+    has finished (failed ones included), with `upstream` filled in, and
+    among ready jobs the lowest `rank` goes first. Dependencies outside the
+    run are ignored, and in a cycle the edge closing it is, so the job
+    ranked first goes first.
+
+    Jobs may also arrive while the run is under way, e.g. as a plan streams
+    in: then each one can only wait on jobs that arrived before it.
+
+    `generate(job)` returns the file's content. Model calls inside it go
+    through the shared rate limiter, so `max_workers` bounds how many
+    requests may be in flight, not how fast they are sent. Each job runs in
+    a copy of the caller's context, so its priority lane and tracing apply.
+    `on_start(job)` and `on_done(job, result)` report progress; they and
+    `write` are called from worker threads.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[FileJob], str],
+        write: Callable[[FileJob, str], None],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        on_start: Optional[Callable[[FileJob], None]] = None,
+        on_done: Optional[Callable[[FileJob, FileResult], None]] = None,
+    ):
+        self.generate = generate
+        self.write = write
+        self.max_workers = max(max_workers, 1)
+        self.on_start = on_start
+        self.on_done = on_done
+
+    def _run_one(self, job: FileJob) -> FileResult:
+        if self.on_start is not None:
+            self.on_start(job)
+        start = time.perf_counter()
+        try:
+            content = self.generate(job)
+            error = None
+        except Exception as e:
+            logger.warning(f"Generating {job.path} failed: {e}")
+            content, error = f"// TODO: Implement {job.path} - Error: {e}", str(e)
+        seconds = time.perf_counter() - start
+        try:
+            self.write(job, content)
+        except OSError as e:
+            error = error or f"write failed: {e}"
+        result = FileResult(job.path, content, error, seconds)
+        if self.on_done is not None:
+            self.on_done(job, result)
+        return result
+
+    def run(self, jobs: Iterable[FileJob]) -> GenerationReport:
+        """
+        Generate `jobs` and wait for all of them. A list is scheduled as a
+        whole; any other iterable is consumed on its own thread while the
+        jobs it has produced run. An exception from the iterable is raised
+        once the jobs already started have finished.
+        """
+        start = time.perf_counter()
+        events: "queue.Queue[tuple]" = queue.Queue()
+        by_path: Dict[str, FileJob] = {}
+        edges: Dict[str, tuple] = {}
+        waiting_on: Dict[str, Set[str]] = {}
+        dependents: Dict[str, List[str]] = {}
+        contents: Dict[str, str] = {}
+        results: List[FileResult] = []
+        finished: Set[str] = set()
+        ready: List[tuple] = []
+
+        def add(job: FileJob, known):
+            if job.path in by_path:
+                logger.warning(f"Ignoring a second job for {job.path}")
+                return
+            deps = tuple(d for d in job.deps if d in known and d != job.path)
+            by_path[job.path] = job
+            edges[job.path] = deps
+            waiting_on[job.path] = set(deps) - finished
+            for dep in waiting_on[job.path]:
+                dependents.setdefault(dep, []).append(job.path)
+            if not waiting_on[job.path]:
+                heapq.heappush(ready, (job.rank, len(by_path), job.path))
+
+        if isinstance(jobs, list):
+            batch = {job.path: job for job in jobs}
+            graph = {
+                job.path: {d for d in job.deps if d in batch and d != job.path}
+                for job in jobs
+            }
+            _break_cycles(graph, batch)
+            for job in jobs:
+                job.deps = tuple(d for d in job.deps if d in graph[job.path])
+                add(job, batch)
+            feeding = False
+        else:
+
+            def feed():
+                try:
+                    for job in jobs:
+                        events.put((_JOB, job))
+                except Exception as e:
+                    events.put((_FEED_ERROR, e))
+                finally:
+                    events.put((_FED, None))
+
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(feed,),
+                name="scaffold-feed",
+                daemon=True,
+            ).start()
+            feeding = True
+
+        feed_error: Optional[BaseException] = None
+        first_file_s: Optional[float] = None
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="scaffold"
+        ) as pool:
+            running = 0
+            while feeding or ready or running:
+                # Jobs wait here rather than in the pool's FIFO queue, so one
+                # that becomes ready later can still go ahead of lower ranks.
+                while ready and running < self.max_workers:
+                    job = by_path[heapq.heappop(ready)[2]]
+                    job.upstream = {
+                        dep: contents[dep] for dep in job.deps if dep in contents
+                    }
+                    # A fresh context copy per job: one Context can't be
+                    # entered by two threads at once.
+                    future = pool.submit(
+                        contextvars.copy_context().run, self._run_one, job
+                    )
+                    future.add_done_callback(lambda f: events.put((_DONE, f)))
+                    running += 1
+                kind, item = events.get()
+                if kind == _JOB:
+                    add(item, by_path)
+                elif kind == _FEED_ERROR:
+                    feed_error = item
+                elif kind == _FED:
+                    feeding = False
+                else:
+                    running -= 1
+                    result = item.result()
+                    results.append(result)
+                    finished.add(result.path)
+                    if first_file_s is None:
+                        first_file_s = time.perf_counter() - start
+                    if not result.error:
+                        contents[result.path] = result.content
+                    for dependent in dependents.pop(result.path, []):
+                        deps = waiting_on[dependent]
+                        deps.discard(result.path)
+                        if not deps:
+                            job = by_path[dependent]
+                            heapq.heappush(ready, (job.rank, len(results), dependent))
+        if feed_error is not None:
+            raise feed_error
+        return GenerationReport(
+            results,
+            time.perf_counter() - start,
+            _critical_path(edges, results),
+            first_file_s,
+        )
@@ -0,0 +1,170 @@
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+MANIFEST_NAME = ".blitzcoder-scaffold.json"
+MANIFEST_VERSION = 1
+
+COMPLETE = "complete"
+FAILED = "failed"
+PENDING = "pending"
+
+
+def content_hash(value: Any) -> str:
+    """sha256 of a string, or of anything else as canonical JSON"""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class ScaffoldManifest:
+    """
+    What a scaffold run has produced, kept in the project root so a rerun
+    can pick up where the last one stopped.
+
+    It holds the request, the architecture plan and its hash, and per file
+    the hash of the prompt inputs, the hash of the content written and a
+    status. A file whose prompt is unchanged and whose content on disk still
+    has the recorded hash doesn't need generating again. A streamed plan is
+    recorded as it arrives, flagged incomplete until it is finished. Each
+    change saves the manifest, atomically, so a crash loses at most the files
+    in flight.
+    """
+
+    def __init__(self, root: str, data: Optional[Dict[str, Any]] = None):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self.data: Dict[str, Any] = data or {"version": MANIFEST_VERSION, "files": {}}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root: str) -> "ScaffoldManifest":
+        """The manifest in `root`, or an empty one if there is none usable"""
+        path = os.path.join(root, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(root)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable scaffold manifest {path}: {e}")
+            return cls(root)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(root)
+        data.setdefault("files", {})
+        return cls(root, data)
+
+    @property
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        return self.data["files"]
+
+    def plan_for(self, framework: str, use_case: str) -> Optional[Dict[str, Any]]:
+        """The recorded plan, if it was made for this request and is intact"""
+        plan = self.data.get("plan")
+        request = {"framework": framework, "use_case": use_case}
+        if (
+            plan is None
+            or self.data.get("request") != request
+            or self.data.get("plan_hash") != content_hash(plan)
+        ):
+            return None
+        return plan
+
+    @property
+    def plan_complete(self) -> bool:
+        """False while the recorded plan is a streamed one cut short"""
+        return self.data.get("plan_complete", True)
+
+    def start(
+        self,
+        framework: str,
+        use_case: str,
+        plan: Dict[str, Any],
+        complete: bool = True,
+    ):
+        """Record the plan being built; files no longer in it are forgotten"""
+        with self._lock:
+            self.data["request"] = {"framework": framework, "use_case": use_case}
+            self._set_plan(plan, complete)
+            planned = plan.get("file_analysis") or {}
+            self.data["files"] = {
+                path: self.files.get(path, {"status": PENDING}) for path in planned
+            }
+            self._save()
+
+    def extend(self, plan: Dict[str, Any]):
+        """
+        Record a plan still streaming in after `start(..., complete=False)`:
+        its fields so far, and its new files as pending.
+        """
+        with self._lock:
+            self._set_plan(plan, complete=False)
+            for path in plan.get("file_analysis") or {}:
+                self.files.setdefault(path, {"status": PENDING})
+            self._save()
+
+    def reusable(self, path: str, prompt_hash: str) -> Optional[str]:
+        """The content of `path` if it is complete for this exact prompt"""
+        entry = self.files.get(path) or {}
+        if entry.get("status") != COMPLETE or entry.get("prompt_hash") != prompt_hash:
+            return None
+        try:
+            full_path = os.path.join(self.root, path)
+            with open(full_path, "r", encoding="utf-8", newline="") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        # Edited or truncated since: generate it again
+        return content if content_hash(content) == entry.get("output_hash") else None
+
+    def record(
+        self,
+        path: str,
+        prompt_hash: str,
+        content: str,
+        status: str,
+        seconds: float = 0.0,
+    ):
+        with self._lock:
+            self.files[path] = {
+                "status": status,
+                "prompt_hash": prompt_hash,
+                "output_hash": content_hash(content),
+                "chars": len(content),
+                "seconds": round(seconds, 3),
+            }
+            self._save()
+
+    def counts(self) -> Dict[str, int]:
+        counts = {COMPLETE: 0, FAILED: 0, PENDING: 0}
+        for entry in self.files.values():
+            status = entry.get("status", PENDING)
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def _set_plan(self, plan: Dict[str, Any], complete: bool):
+        # Called with _lock held. A copy: a streamed plan keeps changing while
+        # other threads save the manifest.
+        plan = copy.deepcopy(plan)
+        self.data["plan"] = plan
+        self.data["plan_hash"] = content_hash(plan)
+        self.data["plan_complete"] = complete
+
+    def _save(self):
+        # Called with _lock held
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(
+                dir=self.root, prefix=MANIFEST_NAME, suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save scaffold manifest {self.path}: {e}")
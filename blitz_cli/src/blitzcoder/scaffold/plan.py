@@ -0,0 +1,261 @@
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .engine import FileJob
+
+# Declarations worth showing a dependent file: definitions and exports in
+# the languages scaffolds are usually made of. Bodies are left out.
+_SIGNATURE = re.compile(
+    r"""^\s*(?:
+        (?:async\s+)?def\s+\w+ | class\s+\w+ |                         # Python
+        export\s+ | (?:async\s+)?function\s+\w+ | interface\s+\w+ |    # JS/TS
+        (?:type|enum)\s+\w+ |
+        func\s+ |                                                      # Go
+        pub(?:\(crate\))?\s+(?:fn|struct|enum|trait|type|const|mod)\s | # Rust
+        (?:public|protected)\s+ |                                      # Java/C#/Kotlin
+        @(?:app|router|bp|blueprint)\.\w+ |                            # routes
+        [A-Z][A-Z0-9_]+\s*[:=]                                         # constants
+    )""",
+    re.VERBOSE,
+)
+DEFAULT_SIGNATURE_CHARS = 1500
+MAX_SIGNATURE_LINE = 160
+
+
+def extract_signatures(
+    content: str, max_chars: int = DEFAULT_SIGNATURE_CHARS
+) -> str:
+    """The declaration lines of a generated file, up to `max_chars`"""
+    lines: List[str] = []
+    used = 0
+    for line in content.splitlines():
+        if not _SIGNATURE.match(line):
+            continue
+        line = line.rstrip().rstrip("{").rstrip()[:MAX_SIGNATURE_LINE]
+        if used + len(line) + 1 > max_chars:
+            lines.append("...")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path.rstrip("/")))[0].lower()
+
+
+def resolve_dependencies(
+    dependencies: Iterable[Any], files: Sequence[str], own: Optional[str] = None
+) -> List[str]:
+    """
+    The plan files among a file's declared dependencies.
+
+    Plans mix file paths ("src/models/user.py"), bare names ("user.py",
+    "UserService") and libraries ("FastAPI"); the first two are matched by
+    path, path suffix or file stem, libraries match nothing and are dropped.
+    """
+    by_stem: Dict[str, List[str]] = {}
+    for path in files:
+        by_stem.setdefault(_stem(path), []).append(path)
+    resolved: List[str] = []
+    for dependency in dependencies:
+        if not isinstance(dependency, str) or not dependency.strip():
+            continue
+        name = dependency.strip().lstrip("./")
+        if name in files:
+            matches = [name]
+        else:
+            matches = [p for p in files if p.endswith("/" + name)]
+            if not matches:
+                # Ambiguous stems (two index.ts files) say nothing useful.
+                stem_matches = by_stem.get(_stem(name), [])
+                matches = stem_matches if len(stem_matches) == 1 else []
+        for match in matches:
+            if match != own and match not in resolved:
+                resolved.append(match)
+    return resolved
+
+
+def plan_jobs(plan: Dict[str, Any]) -> List[FileJob]:
+    """
+    One job per `file_analysis` entry, with its dependencies on other plan
+    files and its rank in `implementation_order` (unlisted files go last).
+    """
+    file_analysis = plan.get("file_analysis") or {}
+    files = list(file_analysis)
+    order = {
+        path: rank
+        for rank, path in enumerate(plan.get("implementation_order") or [])
+        if isinstance(path, str)
+    }
+    jobs = []
+    for index, path in enumerate(files):
+        info = file_analysis[path] or {}
+        deps = resolve_dependencies(info.get("dependencies") or [], files, own=path)
+        rank = order.get(path, len(order) + index)
+        jobs.append(FileJob(path, info, deps=deps, rank=rank))
+    return jobs
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "expect", "value_start")
+
+    def __init__(self, kind: str):
+        self.kind = kind  # "{" or "["
+        self.key: Optional[str] = None
+        self.expect = "key" if kind == "{" else "value"
+        self.value_start: Optional[int] = None
+
+
+class PlanStreamParser:
+    """
+    Incremental parser for an architecture plan arriving as streamed JSON.
+
+    `feed(text)` returns what the new text completed: ("field", key, value)
+    for each top-level key, and before that ("file", path, info) for each
+    entry of `file_analysis` as soon as its closing brace arrives. The files
+    may be an object keyed by path or a list of objects with a `path_key`
+    field, as JSON-schema output has them; either way the field is reported
+    keyed by path. Anything before the first "{" (prose, a code fence) is
+    skipped. Only the values reported are decoded; the rest is just scanned.
+    """
+
+    def __init__(self, files_key: str = "file_analysis", path_key: str = "path"):
+        self.files_key = files_key
+        self.path_key = path_key
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+    def feed(self, text: str) -> List[tuple]:
+        self.text += text
+        events: List[tuple] = []
+        while self._pos < len(self.text) and not self.done:
+            self._step(self.text[self._pos], self._pos, events)
+            self._pos += 1
+        return events
+
+    def _step(self, char: str, i: int, events: List[tuple]):
+        stack = self._stack
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                frame = stack[-1]
+                if frame.kind == "{" and frame.expect == "key":
+                    frame.key = json.loads(self.text[self._string_start : i + 1])
+                    frame.expect = "colon"
+                elif frame.value_start is not None:
+                    self._complete(i + 1, events)
+            return
+        if not stack:
+            if char == "{":
+                stack.append(_Frame("{"))
+            return
+        frame = stack[-1]
+        if frame.expect == "scalar" and (char in ",}]" or char.isspace()):
+            self._complete(i, events)
+        if char == '"':
+            self._in_string = True
+            self._string_start = i
+            if frame.expect == "value":
+                frame.value_start = i
+        elif char in "{[":
+            if frame.expect == "value":
+                frame.value_start = i
+            stack.append(_Frame(char))
+        elif char in "}]":
+            stack.pop()
+            if not stack:
+                self.done = True
+            elif stack[-1].value_start is not None:
+                self._complete(i + 1, events)
+        elif char == ":" and frame.kind == "{":
+            frame.expect = "value"
+        elif char == ",":
+            frame.expect = "key" if frame.kind == "{" else "value"
+        elif not char.isspace() and frame.expect == "value":
+            frame.value_start = i
+            frame.expect = "scalar"
+
+    def _complete(self, end: int, events: List[tuple]):
+        frame = self._stack[-1]
+        start, frame.value_start = frame.value_start, None
+        frame.expect = "comma"
+        depth = len(self._stack)
+        if depth > 2 or (depth == 2 and self._stack[0].key != self.files_key):
+            return
+        try:
+            value = json.loads(self.text[start:end])
+        except ValueError:
+            return
+        if depth == 1:
+            if frame.key == self.files_key and isinstance(value, list):
+                value = dict(_keyed(entry, self.path_key) for entry in value)
+                value.pop(None, None)
+            events.append(("field", frame.key, value))
+        elif frame.kind == "{":
+            events.append(("file", frame.key, value))
+        else:
+            path, info = _keyed(value, self.path_key)
+            if path is not None:
+                events.append(("file", path, info))
+
+
+def _keyed(entry: Any, path_key: str) -> tuple:
+    # A list entry {"path": ..., ...} as (path, rest)
+    if not isinstance(entry, dict) or not isinstance(entry.get(path_key), str):
+        return None, entry
+    info = dict(entry)
+    return info.pop(path_key), info
+
+
+def stream_plan_jobs(
+    events: Iterable[tuple],
+    plan: Dict[str, Any],
+    max_files: Optional[int] = None,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Iterator[FileJob]:
+    """
+    Jobs for the files of a streamed plan, as their entries complete.
+
+    `plan` is filled in as fields arrive, so a job started early sees what
+    has been planned by then; `on_update(plan)` is called after each change,
+    before the new file's job is yielded. A file may only depend on files
+    announced before it, and ranks follow arrival. More than `max_files`
+    files raises ValueError.
+    """
+    file_analysis = plan.setdefault("file_analysis", {})
+    for event in events:
+        kind, key, value = event
+        if kind == "field":
+            if key == "file_analysis" and isinstance(value, dict):
+                file_analysis.update(value)
+            else:
+                plan[key] = value
+            if on_update:
+                on_update(plan)
+            continue
+        if key in file_analysis:
+            continue
+        info = value if isinstance(value, dict) else {}
+        deps = resolve_dependencies(
+            info.get("dependencies") or [], list(file_analysis), own=key
+        )
+        file_analysis[key] = info
+        if max_files is not None and len(file_analysis) > max_files:
+            raise ValueError(
+                f"Architecture plan too complex: more than {max_files} files"
+            )
+        if on_update:
+            on_update(plan)
+        yield FileJob(key, info, deps=deps, rank=len(file_analysis))
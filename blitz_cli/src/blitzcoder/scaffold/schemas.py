@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+MAX_PROJECT_FILES = 25
+# Folders above a file, at most: deep enough for Java/Kotlin package layouts
+MAX_PROJECT_DEPTH = 8
+
+
+def _clean_path(path: str) -> str:
+    path = path.strip().replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path.strip("/")
+
+
+def _check_paths(paths: List[str]) -> List[str]:
+    cleaned, seen = [], set()
+    for raw in paths:
+        path = _clean_path(raw)
+        if not path:
+            raise ValueError("empty file path")
+        if raw.strip().startswith("/") or ".." in path.split("/"):
+            raise ValueError(f"{raw!r} must be relative to the project root")
+        if path.count("/") > MAX_PROJECT_DEPTH:
+            raise ValueError(
+                f"{path!r} is nested more than {MAX_PROJECT_DEPTH} folders deep"
+            )
+        if path in seen:
+            raise ValueError(f"{path!r} is listed twice")
+        seen.add(path)
+        cleaned.append(path)
+    return cleaned
+
+
+class ProjectStructure(BaseModel):
+    """A project's files; its folders are the ones their paths imply"""
+
+    root: str = Field(description="Name of the project's top-level folder")
+    files: List[str] = Field(
+        description="Path of every file relative to the top-level folder, "
+        "with / separators",
+        min_length=1,
+        max_length=MAX_PROJECT_FILES,
+    )
+
+    @field_validator("root")
+    @classmethod
+    def _root(cls, root: str) -> str:
+        root = _clean_path(root)
+        if not root or "/" in root:
+            raise ValueError("must be a single folder name")
+        return root
+
+    @field_validator("files")
+    @classmethod
+    def _files(cls, files: List[str]) -> List[str]:
+        return _check_paths(files)
+
+    def to_tree(self) -> str:
+        """The structure drawn as a folder tree"""
+        tree: Dict[str, Any] = {}
+        for path in self.files:
+            node = tree
+            *folders, name = path.split("/")
+            for folder in folders:
+                node = node.setdefault(folder + "/", {})
+            node.setdefault(name, None)
+        lines = [self.root + "/"]
+
+        def draw(node: Dict[str, Any], prefix: str):
+            entries = list(node.items())
+            for i, (name, children) in enumerate(entries):
+                last = i == len(entries) - 1
+                lines.append(f"{prefix}{'└── ' if last else '├── '}{name}")
+                if children is not None:
+                    draw(children, prefix + ("    " if last else "│   "))
+
+        draw(tree, "")
+        return "\n".join(lines)
+
+
+class FileSpec(BaseModel):
+    path: str = Field(description="Full path of the file from the project root")
+    purpose: str = Field(description="What the file does")
+    key_features: List[str] = Field(default_factory=list)
+    dependencies: List[str] = Field(
+        default_factory=list,
+        description="Project files it imports, by path, and libraries it uses",
+    )
+    implementation_priority: Literal["high", "medium", "low"] = "medium"
+
+    @field_validator("path")
+    @classmethod
+    def _path(cls, path: str) -> str:
+        return _clean_path(path)
+
+
+class Component(BaseModel):
+    name: str
+    purpose: str
+    dependencies: List[str] = Field(default_factory=list)
+    files: List[str] = Field(default_factory=list)
+
+
+class ArchitecturePlan(BaseModel):
+    """
+    An architecture plan as the model returns it. Fields are declared in
+    the order they stream in: what every file prompt needs first, then the
+    files, each after the files it depends on.
+    """
+
+    architecture_overview: str
+    data_flow: str
+    file_analysis: List[FileSpec] = Field(
+        description="One entry per file in the project structure, each after "
+        "the project files it depends on",
+        min_length=1,
+        max_length=MAX_PROJECT_FILES,
+    )
+    key_components: List[Component] = Field(default_factory=list)
+    implementation_order: List[str] = Field(default_factory=list)
+
+    @field_validator("file_analysis")
+    @classmethod
+    def _file_paths(cls, files: List[FileSpec]) -> List[FileSpec]:
+        for spec, path in zip(files, _check_paths([spec.path for spec in files])):
+            spec.path = path
+        return files
+
+    def to_plan(self) -> Dict[str, Any]:
+        """The plan in the shape the scaffolder uses: files keyed by path"""
+        plan = self.model_dump(exclude={"file_analysis"})
+        plan["file_analysis"] = {
+            spec.path: spec.model_dump(exclude={"path"}) for spec in self.file_analysis
+        }
+        plan["implementation_order"] = self.implementation_order or list(
+            plan["file_analysis"]
+        )
+        return plan
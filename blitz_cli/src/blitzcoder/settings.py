@@ -0,0 +1,19 @@
+_agent_settings = None
+
+
+def get_setting(name: str, default):
+    """
+    An AgentSettings value, or `default` when config/ isn't importable.
+
+    config/ ships with the source tree, not the installed package, so an
+    installed blitzcoder runs on the defaults.
+    """
+    global _agent_settings
+    if _agent_settings is None:
+        try:
+            from config.settings import AgentSettings
+        except ImportError:
+            _agent_settings = False
+        else:
+            _agent_settings = AgentSettings()
+    return getattr(_agent_settings, name, default) if _agent_settings else default
@@ -0,0 +1,247 @@
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from loguru import logger
+
+# Span kinds, in the order the turn summary lists them
+SPAN_KINDS = ("node", "memory", "embedding", "llm", "structured", "tool")
+
+
+class Span:
+    """One timed step of a turn, with whatever counts it produced"""
+
+    __slots__ = ("name", "kind", "start", "duration_s", "attrs", "error")
+
+    def __init__(self, name: str, kind: str, start: float, attrs=None):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.duration_s = 0.0
+        self.attrs: Dict[str, Any] = attrs or {}
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration_s * 1e3, 3),
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Collects the spans of the current turn. With `trace_file`, every span
+    (and a closing "turn" span) is also appended to it as a JSON line.
+    """
+
+    def __init__(self, trace_file: Optional[str] = None):
+        self.trace_file = trace_file
+        self.turn_id: Optional[str] = None
+        self.spans: List[Span] = []
+        self._turn_start = 0.0
+        self._turn_attrs: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._file = open(trace_file, "a", encoding="utf-8") if trace_file else None
+
+    def start_turn(self, **attrs: Any) -> str:
+        with self._lock:
+            self.turn_id = uuid.uuid4().hex[:12]
+            self.spans = []
+            self._turn_start = time.time()
+            self._turn_attrs = attrs
+        return self.turn_id
+
+    def end_turn(self) -> List[Span]:
+        """Close the turn and return its spans"""
+        with self._lock:
+            turn = Span("turn", "turn", self._turn_start, dict(self._turn_attrs))
+            turn.duration_s = time.time() - self._turn_start
+            self._write(turn)
+            spans, self.spans = self.spans + [turn], []
+            self.turn_id = None
+        return spans
+
+    def record(self, span: Span):
+        with self._lock:
+            if self.turn_id is None:
+                return  # e.g. a background memory write finishing after the turn
+            self.spans.append(span)
+            self._write(span)
+
+    def _write(self, span: Span):
+        # Called with _lock held
+        if self._file is None:
+            return
+        try:
+            line = json.dumps({"turn": self.turn_id, **span.to_dict()}, default=str)
+            self._file.write(line + "\n")
+            self._file.flush()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write trace span: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The active tracer, if tracing is on"""
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    global _tracer
+    _tracer = tracer
+
+
+@contextmanager
+def span(name: str, kind: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time the block as a span of the current turn. The yielded dict may be
+    filled with counts while the block runs. Does nothing when not tracing.
+    """
+    tracer = _tracer
+    if tracer is None or tracer.turn_id is None:
+        yield attrs
+        return
+    item = Span(name, kind, time.time(), attrs)
+    start = time.perf_counter()
+    try:
+        yield item.attrs
+    except BaseException as e:
+        item.error = type(e).__name__
+        raise
+    finally:
+        item.duration_s = time.perf_counter() - start
+        tracer.record(item)
+
+
+def _output_bytes(output: Any) -> int:
+    content = getattr(output, "content", output)
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    return len(text.encode("utf-8"))
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks into spans: one per LangGraph node run, chat
+    model call (tokens in/out and stream retries) and tool call (bytes
+    returned). Pass it in the graph's config; nested calls inherit it.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._open: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, name: str, kind: str, **attrs: Any):
+        with self._lock:
+            item = Span(name, kind, time.time(), attrs)
+            self._open[run_id] = (item, time.perf_counter())
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attrs: Any):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        item, start = entry
+        item.duration_s = time.perf_counter() - start
+        item.attrs.update(attrs)
+        if error is not None:
+            item.error = type(error).__name__
+        self.tracer.record(item)
+
+    def on_chain_start(
+        self, serialized, inputs, *, run_id, metadata=None, **kwargs
+    ):
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node carry the node's metadata too; the node
+        # itself is the one named after it.
+        if node and kwargs.get("name") == node:
+            self._start(run_id, node, "node")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ):
+        name = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "llm"
+        self._start(run_id, name, "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attrs = {"tokens_in": 0, "tokens_out": 0, "retries": 0}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                attrs["tokens_in"] += usage.get("input_tokens", 0)
+                attrs["tokens_out"] += usage.get("output_tokens", 0)
+                stats = (getattr(message, "response_metadata", None) or {}).get(
+                    "stream_stats"
+                )
+                if stats:
+                    attrs["retries"] += stats.get("retries", 0)
+                    attrs["ttft_ms"] = round(stats.get("ttft_s", 0) * 1e3, 1)
+        self._end(run_id, **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, name, "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, bytes=_output_bytes(output))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def summarize_spans(spans: List[Span]) -> List[Dict[str, Any]]:
+    """Spans of a turn added up per kind and name, slowest first within a kind"""
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for item in spans:
+        if item.kind == "turn":
+            continue
+        row = rows.setdefault(
+            (item.kind, item.name),
+            {
+                "kind": item.kind,
+                "name": item.name,
+                "calls": 0,
+                "errors": 0,
+                "seconds": 0.0,
+                "tokens_in": 0,
+                "tokens_out": 0,
+                "retries": 0,
+                "bytes": 0,
+            },
+        )
+        row["calls"] += 1
+        row["errors"] += item.error is not None
+        row["seconds"] += item.duration_s
+        for key in ("tokens_in", "tokens_out", "retries", "bytes"):
+            row[key] += item.attrs.get(key, 0)
+    order = {kind: i for i, kind in enumerate(SPAN_KINDS)}
+    return sorted(
+        rows.values(), key=lambda r: (order.get(r["kind"], len(order)), -r["seconds"])
+    )
@@ -39,12 +39,18 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 from loguru import logger
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 
 from langchain_groq import ChatGroq
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from config.settings import AgentSettings
+from blitzcoder.memory import (
+    DEFAULT_DIMS,
+    IndexingPolicy,
+    PolicyIndexedStore,
+    get_embedding_provider,
+)
 
 load_dotenv()
 
@@ -200,17 +206,16 @@ class AgentState(MessagesState):
     documents: list[str]
 
 
-# Semantic memory store for user memories, using Qwen3 embeddings
-semantic_memory_store = InMemoryStore(
-    index={
-        "embed": OpenAIEmbeddings(
-            base_url="https://api.novita.ai/v3/openai",
-            api_key=os.getenv("NOVITA_API_KEY"),
-            model="qwen/qwen3-embedding-8b",
-        ),
-        "dims": 4096,  # Qwen3 embedding dimension
-        "fields": ["memory", "$"],  # Fields to embed
-    }
+# Semantic memory store for user memories, sharing the process-wide embedding model
+semantic_memory_store = PolicyIndexedStore(
+    InMemoryStore(
+        index={
+            "embed": get_embedding_provider(),
+            "dims": DEFAULT_DIMS,
+            "fields": ["memory", "$"],  # Fields to embed
+        }
+    ),
+    IndexingPolicy(skip_fields=("context",)),
 )
 
 error_logs_prompt = ChatPromptTemplate.from_messages(
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+SqliteCheckpointSaver: a chat thread round-trips through the file, messages
+are stored once however many checkpoints reference them, and only the newest
+`keep_last` checkpoints are kept.
+"""
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from blitzcoder.memory.checkpoint import SqliteCheckpointSaver
+
+
+def echo(state: MessagesState):
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+
+def build_graph(saver):
+    builder = StateGraph(MessagesState)
+    builder.add_node("echo", echo)
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=saver)
+
+
+def chat(saver, thread_id, turns):
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in turns:
+        if isinstance(turn, str):
+            turn = HumanMessage(content=turn)
+        graph.invoke({"messages": [turn]}, config)
+    return graph.get_state(config).values["messages"]
+
+
+def count(saver, table):
+    return saver._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_thread_round_trips_through_reopen(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    saver = SqliteCheckpointSaver(path)
+    written = chat(saver, "t", ["hello", "how are you"])
+    saver.close()
+
+    saver = SqliteCheckpointSaver(path)
+    graph = build_graph(saver)
+    state = graph.get_state({"configurable": {"thread_id": "t"}})
+    assert [m.content for m in state.values["messages"]] == [
+        "hello",
+        "echo: hello",
+        "how are you",
+        "echo: how are you",
+    ]
+    assert [m.id for m in state.values["messages"]] == [m.id for m in written]
+    saver.close()
+
+
+def test_messages_are_stored_once(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"), keep_last=100)
+    messages = chat(saver, "t", [f"turn {i}" for i in range(5)])
+
+    stored = saver._conn.execute(
+        "SELECT refs FROM channels WHERE channel = 'messages'"
+    ).fetchall()
+    assert len(stored) > 1
+    # Every message is one blob, referenced by each version that has it
+    hashes = {r[i : i + 16] for (r,) in stored for i in range(0, len(r), 16)}
+    assert len(hashes) == len(messages)
+    placeholders = ",".join("?" * len(hashes))
+    refs = saver._conn.execute(
+        f"SELECT SUM(refs) FROM blobs WHERE hash IN ({placeholders})", list(hashes)
+    ).fetchone()[0]
+    assert refs == sum(len(r) // 16 for (r,) in stored)
+    saver.close()
+
+
+def test_keep_last_prunes_checkpoints_and_blobs(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"), keep_last=2)
+    messages = chat(saver, "t", [f"turn {i}" for i in range(6)])
+
+    assert count(saver, "checkpoints") == 2
+    assert len(list(saver.list({"configurable": {"thread_id": "t"}}))) == 2
+    # The latest state is intact even though older versions were dropped
+    latest = saver.get_tuple({"configurable": {"thread_id": "t"}})
+    assert latest.checkpoint["channel_values"]["messages"] == messages
+    assert not saver._conn.execute("SELECT 1 FROM blobs WHERE refs <= 0").fetchone()
+    saver.close()
+
+
+def test_shared_blobs_survive_deleting_one_thread(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"))
+    question = HumanMessage(content="same question", id="q1")
+    chat(saver, "a", [question])
+    kept = chat(saver, "b", [question])
+    shared = count(saver, "blobs")
+
+    saver.delete_thread("a")
+    # Only thread a's reply goes; the question is still b's
+    assert count(saver, "blobs") == shared - 1
+    assert saver.get_tuple({"configurable": {"thread_id": "a"}}) is None
+    latest = saver.get_tuple({"configurable": {"thread_id": "b"}})
+    assert latest.checkpoint["channel_values"]["messages"] == kept
+
+    saver.delete_thread("b")
+    assert count(saver, "blobs") == 0
+    assert count(saver, "channels") == 0
+    saver.close()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+EmbeddingCache: hits are remembered in memory and written on close (or
+every touch_batch hits), so after a reopen eviction still goes by last use;
+the default cache is closed at exit.
+"""
+
+from blitzcoder.memory import cache as cache_module
+from blitzcoder.memory.cache import EmbeddingCache, open_default_cache
+
+MODEL = "fake-model"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+def fill(path, keys, **kwargs):
+    cache = EmbeddingCache(str(path), **kwargs)
+    for key in keys:  # one put each, so each has its own last_used
+        cache.put_many(MODEL, {key: [0.5, 0.25]})
+    return cache
+
+
+def test_hits_written_on_close_decide_eviction_after_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "time", Clock())
+    path = tmp_path / "cache.sqlite3"
+    cache = fill(path, ["a", "b", "c"], max_entries=3)
+    assert cache.get_many(MODEL, ["a"]) == {"a": [0.5, 0.25]}
+    cache.close()
+
+    cache = EmbeddingCache(str(path), max_entries=3)
+    cache.put_many(MODEL, {"d": [1.0, 0.0]})
+
+    # "b" is now the least recently used: "a" was hit after it
+    assert set(cache.get_many(MODEL, ["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+    cache.close()  # closing twice is harmless
+
+
+def test_hits_are_written_every_touch_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "time", Clock())
+    path = tmp_path / "cache.sqlite3"
+    cache = fill(path, ["a", "b", "c"], touch_batch=2)
+
+    def last_used(key):
+        row = cache._conn.execute(
+            "SELECT last_used FROM embeddings WHERE text_hash = ?", (key,)
+        )
+        return row.fetchone()[0]
+
+    before = last_used("a")
+    cache.get_many(MODEL, ["a"])
+    assert last_used("a") == before  # held in memory
+    cache.get_many(MODEL, ["b"])
+    assert last_used("a") > before and last_used("b") > last_used("a")
+    cache.close()
+
+
+def test_default_cache_is_closed_at_exit(tmp_path, monkeypatch):
+    monkeypatch.setenv("BLITZCODER_HOME", str(tmp_path))
+    registered = []
+    monkeypatch.setattr(cache_module.atexit, "register", registered.append)
+
+    cache = open_default_cache()
+    assert registered == [cache.close]
+    cache.close()
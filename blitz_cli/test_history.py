@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+HistoryManager.compact: old tool outputs are stubbed, then whole turns are
+folded into the summary, oldest first, and never the current one.
+"""
+
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+
+from blitzcoder.memory.history import STUB_PREFIX, HistoryManager
+
+
+def turn(n, output_chars=2000):
+    """A user question, a tool call, its result and the answer"""
+    call = {"name": "read_file", "args": {"path": f"f{n}.py"}, "id": f"call{n}"}
+    return [
+        HumanMessage(content=f"question {n}", id=f"h{n}"),
+        AIMessage(content="", tool_calls=[call], id=f"a{n}"),
+        ToolMessage(
+            content="x" * output_chars,
+            tool_call_id=f"call{n}",
+            name="read_file",
+            id=f"t{n}",
+        ),
+        AIMessage(content=f"answer {n}", id=f"r{n}"),
+    ]
+
+
+def history(turns, **kwargs):
+    return [m for n in range(turns) for m in turn(n, **kwargs)]
+
+
+def test_only_tool_outputs_before_the_kept_turns_are_stubbed():
+    manager = HistoryManager(token_budget=10**6, keep_turns=2)
+    updates, summary = manager.compact(history(4))
+
+    assert [u.id for u in updates] == ["t0", "t1"]
+    for stub in updates:
+        assert isinstance(stub, ToolMessage)
+        assert stub.content.startswith(STUB_PREFIX + "read_file, 2000 chars]")
+        assert stub.tool_call_id == "call" + stub.id[1:]
+    assert summary == ""
+
+
+def test_short_tool_outputs_are_left_alone():
+    manager = HistoryManager(token_budget=10**6, keep_turns=1)
+    updates, _ = manager.compact(history(3, output_chars=100))
+    assert updates == []
+
+
+def test_whole_turns_are_folded_oldest_first():
+    messages = history(4)
+    manager = HistoryManager(keep_turns=1, summarize=lambda prev, dropped: "S")
+    # What each older turn costs once its tool output is stubbed
+    stubs = {u.id: u for u in HistoryManager(10**6, keep_turns=1).compact(messages)[0]}
+    stubbed = [stubs.get(m.id, m) for m in messages]
+    old_turn = manager.total(stubbed[:4])
+    # Room for the current turn and one and a half older ones: two must go
+    manager.token_budget = manager.total(messages[12:]) + old_turn * 3 // 2
+
+    updates, summary = manager.compact(messages)
+    removed = [u.id for u in updates if isinstance(u, RemoveMessage)]
+
+    assert summary == "S"
+    # Each turn leaves with its tool call and result, never half of it
+    assert removed == [m.id for m in messages[:8]]
+    # Only the surviving turn's stub is sent as an update
+    assert [u.id for u in updates if isinstance(u, ToolMessage)] == ["t2"]
+
+
+def test_current_turn_is_always_kept():
+    messages = history(3)
+    manager = HistoryManager(token_budget=1, keep_turns=1)
+    updates, summary = manager.compact(messages)
+
+    removed = {u.id for u in updates if isinstance(u, RemoveMessage)}
+    assert removed == {m.id for m in messages[:8]}
+    assert "User: question 0" in summary and "Assistant: answer 1" in summary
+
+
+def test_failed_summarizer_falls_back_to_an_extract():
+    def summarize(previous, dropped):
+        raise RuntimeError("model unavailable")
+
+    manager = HistoryManager(token_budget=1, keep_turns=1, summarize=summarize)
+    _, summary = manager.compact(history(2), summary="Earlier: setup")
+
+    assert summary.splitlines() == [
+        "Earlier: setup",
+        "User: question 0",
+        "Assistant: answer 0",
+    ]
@@ -17,11 +17,11 @@ try:
     print("✅ blitzcoder.cli imported successfully")
     
     # Test importing the CLI module
-    from blitzcoder.cli import cli_coder
-    print("✅ blitzcoder.cli.cli_coder imported successfully")
+    from blitzcoder.cli import main
+    print("✅ blitzcoder.cli.main imported successfully")
     
     # Test importing the CLI function
-    from blitzcoder.cli.cli_coder import cli
+    from blitzcoder.cli.main import cli
     print("✅ cli function imported successfully")
     
     print("\n🎉 All imports successful!")
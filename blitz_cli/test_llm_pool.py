@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+LLMClientPool: one client per configuration, the least recently used
+evicted past `max_clients`, and bind_tools runnables cached per pooled
+client, dropped with it and never reused for a different client.
+"""
+
+import gc
+
+from langchain_core.tools import tool
+
+from blitzcoder.llm.pool import LLMClientPool
+
+
+class FakeClient:
+    """A chat client whose bind_tools returns a fresh object per call"""
+
+    def __init__(self, model, api_key=None, **params):
+        self.model = model
+        self.binds = 0
+
+    def bind_tools(self, tools, **kwargs):
+        self.binds += 1
+        return (self, tuple(tools), kwargs)
+
+
+@tool
+def list_files(path: str) -> str:
+    """List the files under path"""
+    return path
+
+
+def make_pool(max_clients=2):
+    pool = LLMClientPool(max_clients=max_clients)
+    pool.register("fake", FakeClient)
+    return pool
+
+
+def test_clients_are_shared_and_evicted_oldest_first():
+    pool = make_pool()
+    a = pool.get("fake", "a", api_key="k")
+    assert pool.get("fake", "a", api_key="k") is a
+    assert pool.get("fake", "a", api_key="other") is not a
+    pool.get("fake", "b")
+
+    assert pool.stats() == {"clients": 2, "bound": 0, "hits": 1, "misses": 3}
+    assert pool.get("fake", "a", api_key="k") is not a
+
+
+def test_bound_runnable_is_cached_per_client_and_tools():
+    pool = make_pool()
+    client = pool.get("fake", "a")
+    bound = pool.bind_tools(client, [list_files])
+
+    assert pool.bind_tools(client, [list_files]) is bound
+    assert pool.bind_tools(client, [list_files], tool_choice="any") is not bound
+    assert client.binds == 2
+    assert pool.stats()["bound"] == 2
+
+
+def test_bound_runnables_leave_with_their_client():
+    pool = make_pool(max_clients=1)
+    old = pool.get("fake", "a")
+    pool.bind_tools(old, [list_files])
+    new = pool.get("fake", "b")  # evicts "a"
+
+    assert pool.stats()["bound"] == 0
+    # A client no longer pooled is bound afresh, and not cached
+    pool.bind_tools(old, [list_files])
+    pool.bind_tools(old, [list_files])
+    assert old.binds == 3 and pool.stats()["bound"] == 0
+    assert pool.bind_tools(new, [list_files])[0] is new
+
+
+def test_new_client_never_gets_an_evicted_clients_runnable():
+    pool = make_pool(max_clients=1)
+    pool.bind_tools(pool.get("fake", "a"), [list_files])
+    # With "a" evicted and collected, "b" may well get its id
+    pool.get("fake", "b")
+    gc.collect()
+    client = pool.get("fake", "c")
+
+    assert pool.bind_tools(client, [list_files])[0] is client
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+SqliteMemoryStore: items and vectors survive a reopen, search ranks by the
+stored vectors, deletes remove an item from both, and a RetentionPolicy
+evicts over its cap and drops near-duplicates.
+"""
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from blitzcoder.memory.policy import RetentionPolicy
+from blitzcoder.memory.store import SqliteMemoryStore
+
+DIMS = 32
+NAMESPACE = ("user", "memories")
+
+
+def open_store(path, **kwargs):
+    index = {
+        "dims": DIMS,
+        "embed": DeterministicFakeEmbedding(size=DIMS),
+        "fields": ["memory"],
+    }
+    return SqliteMemoryStore(str(path), index=index, **kwargs)
+
+
+def vector_count(store, *keys):
+    marks = ", ".join("?" * len(keys))
+    query = f"SELECT COUNT(*) FROM vectors WHERE key IN ({marks})"
+    return store._conn.execute(query, keys).fetchone()[0]
+
+
+def test_put_get_survives_reopen(tmp_path):
+    path = tmp_path / "memory.sqlite3"
+    store = open_store(path)
+    store.put(NAMESPACE, "a", {"memory": "prefers tabs over spaces"})
+    store.close()
+
+    store = open_store(path)
+    item = store.get(NAMESPACE, "a")
+    assert item.value == {"memory": "prefers tabs over spaces"}
+    assert store.get(NAMESPACE, "missing") is None
+    store.close()
+
+
+def test_search_ranks_the_matching_memory_first(tmp_path):
+    store = open_store(tmp_path / "memory.sqlite3")
+    texts = [f"memory number {i}" for i in range(10)]
+    for i, text in enumerate(texts):
+        store.put(NAMESPACE, f"k{i}", {"memory": text})
+
+    results = store.search(NAMESPACE, query=texts[7], limit=3)
+    assert [item.key for item in results][0] == "k7"
+    assert results[0].score > results[1].score
+    assert len(results) == 3
+    store.close()
+
+
+def test_delete_removes_item_and_vectors(tmp_path):
+    store = open_store(tmp_path / "memory.sqlite3")
+    store.put(NAMESPACE, "a", {"memory": "uses poetry"})
+    store.put(NAMESPACE, "b", {"memory": "uses pip"})
+    store.search(NAMESPACE, query="uses poetry", limit=2)  # loads the index
+
+    store.delete(NAMESPACE, "a")
+    assert store.get(NAMESPACE, "a") is None
+    keys = [item.key for item in store.search(NAMESPACE, query="uses poetry")]
+    assert keys == ["b"]
+    assert vector_count(store, "a") == 0
+    store.close()
+
+
+def test_eviction_keeps_namespace_under_cap(tmp_path):
+    retention = RetentionPolicy(max_items=3, eviction="age")
+    store = open_store(tmp_path / "memory.sqlite3", retention=retention)
+    for i in range(5):
+        store.put(NAMESPACE, f"k{i}", {"memory": f"fact {i}"})
+
+    keys = {item.key for item in store.search(NAMESPACE, limit=10)}
+    assert keys == {"k2", "k3", "k4"}
+    assert retention.evicted == 2
+    assert vector_count(store, "k0", "k1") == 0
+    store.close()
+
+
+def test_lru_eviction_spares_recently_searched(tmp_path):
+    retention = RetentionPolicy(max_items=2, eviction="lru")
+    store = open_store(tmp_path / "memory.sqlite3", retention=retention)
+    store.put(NAMESPACE, "old", {"memory": "old but used"})
+    store.put(NAMESPACE, "mid", {"memory": "never used"})
+    store.search(NAMESPACE, query="old but used", limit=1)
+    store.put(NAMESPACE, "new", {"memory": "brand new"})
+
+    assert store.get(NAMESPACE, "old") is not None
+    assert store.get(NAMESPACE, "mid") is None
+    store.close()
+
+
+def test_near_duplicate_is_dropped(tmp_path):
+    retention = RetentionPolicy(dedup_threshold=0.95)
+    store = open_store(tmp_path / "memory.sqlite3", retention=retention)
+    store.put(NAMESPACE, "a", {"memory": "deploys with docker"})
+    store.put(NAMESPACE, "b", {"memory": "deploys with docker"})
+    store.put(NAMESPACE, "c", {"memory": "deploys with nix"})
+
+    assert store.get(NAMESPACE, "b") is None
+    assert store.get(NAMESPACE, "c") is not None
+    assert retention.duplicates == 1
+    # Updating an existing key is never treated as a duplicate
+    store.put(NAMESPACE, "c", {"memory": "deploys with docker"})
+    assert store.get(NAMESPACE, "c").value == {"memory": "deploys with docker"}
+    store.close()
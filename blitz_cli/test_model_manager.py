@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+LLMModelManager: clients are cached under their exact configuration in an
+LRU of DEFAULT_MAX_CACHED_MODELS, get_model finds the one last created for
+a name, and each provider's client gets its own constructor arguments.
+"""
+
+import pytest
+
+from models import llm_model
+from models.llm_model import (
+    DEFAULT_MAX_CACHED_MODELS,
+    LLMModelManager,
+    ModelConfig,
+    Provider,
+    SamplingParameters,
+)
+
+
+class FakeClient:
+    """Stands in for every provider class; keeps what it was built with"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(llm_model, "_provider_class", lambda provider: FakeClient)
+    return LLMModelManager()
+
+
+def config(name, provider=Provider.GROQ, api_key="key", base_url=None, **sampling):
+    return ModelConfig(
+        provider=provider,
+        model_name=name,
+        api_key=api_key,
+        base_url=base_url,
+        sampling_params=SamplingParameters(**sampling),
+    )
+
+
+def create(manager, name, **kwargs):
+    return manager.create_model(name, custom_config=config(name, **kwargs))
+
+
+def test_same_configuration_is_a_cache_hit(manager):
+    client = create(manager, "m")
+    assert create(manager, "m") is client
+    # Any part of the exact key builds another client
+    assert create(manager, "m", temperature=0.2) is not client
+    assert create(manager, "m", api_key="other") is not client
+    assert len(manager.models) == 3
+
+
+def test_least_recently_used_client_is_evicted(manager):
+    clients = [create(manager, f"m{i}") for i in range(DEFAULT_MAX_CACHED_MODELS)]
+    assert create(manager, "m0") is clients[0]  # a hit makes m0 the newest
+    create(manager, "new")
+
+    assert len(manager.models) == DEFAULT_MAX_CACHED_MODELS == 32
+    assert manager.get_model("m1") is None
+    assert manager.get_model("m0") is clients[0]
+    assert manager.get_model("m2") is clients[2]
+
+
+def test_get_model_finds_the_latest_client_for_a_name(manager):
+    create(manager, "m")
+    latest = create(manager, "m", temperature=0.2)
+
+    assert manager.get_model("m") is latest
+    assert manager.get_model("never-created") is None
+
+
+def test_provider_constructor_arguments(manager):
+    url = "http://localhost:11434"
+    ollama = create(manager, "llama3", provider=Provider.OLLAMA, base_url=url)
+    assert ollama.kwargs["model"] == "llama3"
+    assert ollama.kwargs["base_url"] == url
+
+    hf = create(manager, "zephyr", provider=Provider.HUGGINGFACE)
+    assert hf.kwargs["model_name"] == "zephyr"
+    assert hf.kwargs["huggingfacehub_api_token"] == "key"
+    assert "model" not in hf.kwargs
+
+    together = create(manager, "mixtral", provider=Provider.TOGETHER, max_tokens=None)
+    assert together.kwargs["max_tokens"] == 2000
+    together = create(manager, "mixtral", provider=Provider.TOGETHER, max_tokens=64)
+    assert together.kwargs["max_tokens"] == 64
+
+    router = create(manager, "r", provider=Provider.OPENROUTER, base_url="https://x.ai")
+    assert router.kwargs["openai_api_key"] == "key"
+    assert router.kwargs["openai_api_base"] == "https://x.ai"
+    assert router.kwargs["temperature"] == 0.7
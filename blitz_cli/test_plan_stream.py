@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+PlanStreamParser reports the same events however the reply is split into
+chunks, including splits inside keys, strings and escapes; stream_plan_jobs
+turns them into jobs as file entries complete.
+"""
+
+import json
+
+import pytest
+
+from blitzcoder.scaffold.plan import PlanStreamParser, stream_plan_jobs
+
+PLAN = {
+    "architecture_overview": 'Flask app; "quoted", {braces} and [brackets]',
+    "data_flow": "request \\u2192 view → db\nline two",
+    "file_analysis": [
+        {"path": "app.py", "purpose": "entry {point}", "dependencies": []},
+        {"path": "db.py", "purpose": 'says "hi"', "dependencies": ["app.py"]},
+    ],
+    "implementation_order": ["db.py", "app.py"],
+    "max_files": 2,
+    "strict": True,
+    "notes": None,
+}
+TEXT = "Here is the plan:\n```json\n" + json.dumps(PLAN, indent=2) + "\n```\n"
+
+
+def parse(chunks):
+    parser = PlanStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    assert parser.done
+    return events
+
+
+EXPECTED = parse([TEXT])
+
+
+def test_whole_reply_events():
+    files = {
+        "app.py": {"purpose": "entry {point}", "dependencies": []},
+        "db.py": {"purpose": 'says "hi"', "dependencies": ["app.py"]},
+    }
+    assert EXPECTED == [
+        ("field", "architecture_overview", PLAN["architecture_overview"]),
+        ("field", "data_flow", PLAN["data_flow"]),
+        ("file", "app.py", files["app.py"]),
+        ("file", "db.py", files["db.py"]),
+        ("field", "file_analysis", files),
+        ("field", "implementation_order", ["db.py", "app.py"]),
+        ("field", "max_files", 2),
+        ("field", "strict", True),
+        ("field", "notes", None),
+    ]
+
+
+def test_every_two_way_split():
+    for cut in range(len(TEXT) + 1):
+        assert parse([TEXT[:cut], TEXT[cut:]]) == EXPECTED, f"split at {cut}"
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13])
+def test_fixed_size_chunks(size):
+    chunks = [TEXT[i : i + size] for i in range(0, len(TEXT), size)]
+    assert parse(chunks) == EXPECTED
+
+
+def test_files_keyed_by_path():
+    plan = {"file_analysis": {"a.py": {"purpose": "x"}, "b/c.py": {}}}
+    text = json.dumps(plan)
+    assert parse(list(text)) == [
+        ("file", "a.py", {"purpose": "x"}),
+        ("file", "b/c.py", {}),
+        ("field", "file_analysis", plan["file_analysis"]),
+    ]
+
+
+def test_text_after_the_document_is_ignored():
+    parser = PlanStreamParser()
+    parser.feed('{"data_flow": "x"}')
+    assert parser.feed(' {"data_flow": "y"}') == []
+
+
+def test_stream_plan_jobs_fills_the_plan_as_files_arrive():
+    plan, updates = {}, []
+    jobs = stream_plan_jobs(
+        iter(parse(list(TEXT))), plan, on_update=lambda p: updates.append(dict(p))
+    )
+
+    first = next(jobs)
+    assert first.path == "app.py" and first.deps == ()
+    # The fields before the files are in by the time the first job starts
+    assert plan["data_flow"] == PLAN["data_flow"]
+    assert "implementation_order" not in plan
+    second = next(jobs)
+    assert second.path == "db.py" and second.deps == ("app.py",)
+    assert second.rank > first.rank
+    assert list(jobs) == []
+    assert plan["implementation_order"] == ["db.py", "app.py"]
+    assert updates[-1] == plan
+
+
+def test_stream_plan_jobs_enforces_max_files():
+    events = [("file", f"f{i}.py", {}) for i in range(3)]
+    jobs = stream_plan_jobs(iter(events), {}, max_files=2)
+    assert [job.path for job in (next(jobs), next(jobs))] == ["f0.py", "f1.py"]
+    with pytest.raises(ValueError, match="more than 2 files"):
+        next(jobs)
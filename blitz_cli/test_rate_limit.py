@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+AdaptiveRateLimiter: the token bucket refills at the configured rate,
+interactive callers go before background ones, a 429 halves the rate and
+pauses every caller, and retry delays are read from provider errors.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from blitzcoder.llm import rate_limit
+from blitzcoder.llm.rate_limit import (
+    BACKGROUND,
+    INTERACTIVE,
+    MAX_PAUSE_S,
+    AdaptiveRateLimiter,
+    is_rate_limit_error,
+    llm_lane,
+    retry_after,
+)
+
+
+HTTP_DATE = "Wed, 21 Oct 2026 07:28:00 GMT"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+class TooManyRequests(Exception):
+    """A provider SDK's 429, with the response it came with"""
+
+    def __init__(self, message="quota exceeded", headers=None):
+        super().__init__(message)
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers=headers or {})
+
+
+def test_bucket_refills_at_the_configured_rate(clock):
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, burst=2)
+    assert limiter.acquire(blocking=False)
+    assert limiter.acquire(blocking=False)
+    assert not limiter.acquire(blocking=False)
+
+    clock.now += 0.5
+    assert not limiter.acquire(blocking=False)
+    clock.now += 0.5
+    assert limiter.acquire(blocking=False)
+    # Idle time fills the bucket up to the burst, no further
+    clock.now += 60
+    assert [limiter.acquire(blocking=False) for _ in range(3)] == [True, True, False]
+
+
+def test_rate_limit_halves_the_rate_and_pauses_everyone(clock):
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, burst=4)
+    limiter.record_error(TooManyRequests(headers={"Retry-After": "5"}))
+
+    assert limiter.rate == pytest.approx(0.5)
+    assert limiter.throttled == 1
+    clock.now += 4.9
+    assert not limiter.acquire(blocking=False)
+    clock.now += 0.1
+    assert limiter.acquire(blocking=False)
+    # Each success wins back a share of the configured rate
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(0.55)
+    assert limiter.stats()["requests_per_minute"] == 33.0
+
+
+def test_rate_never_drops_below_its_floor(clock):
+    limiter = AdaptiveRateLimiter(requests_per_minute=60)
+    for _ in range(20):
+        limiter.on_rate_limited(1.0)
+    assert limiter.rate == pytest.approx(rate_limit.MIN_RATE_SHARE)
+
+
+def test_interactive_callers_go_before_background_ones():
+    limiter = AdaptiveRateLimiter(requests_per_minute=6000, burst=1)
+    limiter.on_rate_limited(0.3)  # hold everyone until both are queued
+    order = []
+
+    def call(lane, name):
+        with llm_lane(lane):
+            limiter.acquire()
+        order.append(name)
+
+    def waiting():
+        return sum(limiter.stats()["waiting"].values())
+
+    threads = []
+    for lane, name in ((BACKGROUND, "background"), (INTERACTIVE, "interactive")):
+        threads.append(threading.Thread(target=call, args=(lane, name)))
+        threads[-1].start()
+        deadline = time.monotonic() + 2
+        while waiting() < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.005)
+    assert limiter.stats()["waiting"] == {"interactive": 1, "background": 1}
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["interactive", "background"]
+
+
+@pytest.mark.parametrize(
+    "error, delay",
+    [
+        (TooManyRequests(headers={"retry-after": "7"}), 7.0),
+        (TooManyRequests("429 Please retry in 1.5s."), 1.5),
+        (TooManyRequests("Rate limited, retry after 250ms"), 0.25),
+        (TooManyRequests("429 quota\nretry_delay {\n  seconds: 30\n}"), 30.0),
+        (TooManyRequests(headers={"Retry-After": "3600"}), MAX_PAUSE_S),
+        (TooManyRequests(headers={"Retry-After": HTTP_DATE}), None),
+        (ValueError("bad request"), None),
+    ],
+)
+def test_retry_after(error, delay):
+    assert retry_after(error) == delay
+
+
+def test_rate_limit_errors_are_recognised():
+    class ResourceExhausted(Exception):
+        pass
+
+    assert is_rate_limit_error(TooManyRequests())
+    assert is_rate_limit_error(ResourceExhausted("quota"))
+    assert not is_rate_limit_error(ConnectionError("reset"))
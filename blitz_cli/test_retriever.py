@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Memory retrieval with fixed vectors: BM25 and its fusion with vector
+scores, MMR selection under a token budget, and retention accounting for
+the memories retrieve_memories keeps.
+"""
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langgraph.store.base import SearchItem
+
+from blitzcoder.memory.lexical import BM25Index, tokenize
+from blitzcoder.memory.policy import RetentionPolicy
+from blitzcoder.memory.retriever import mmr_select, retrieve_memories
+from blitzcoder.memory.store import SqliteMemoryStore
+
+NAMESPACE = ("user", "memories")
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FixedEmbeddings(Embeddings):
+    """Looks every text up in a table of hand-picked vectors"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [list(self.vectors[text]) for text in texts]
+
+    def embed_query(self, text):
+        return list(self.vectors[text])
+
+
+def open_store(path, vectors, **kwargs):
+    index = {"dims": 3, "embed": FixedEmbeddings(vectors), "fields": ["memory"]}
+    return SqliteMemoryStore(str(path), index=index, **kwargs)
+
+
+def item(key, text, score):
+    return SearchItem(
+        namespace=NAMESPACE,
+        key=key,
+        value={"memory": text},
+        created_at="2026-01-01T00:00:00+00:00",
+        updated_at="2026-01-01T00:00:00+00:00",
+        score=score,
+    )
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("Open src/app.py: ERR_MODULE_NOT_FOUND") == [
+        "open",
+        "src/app.py",
+        "src",
+        "app",
+        "py",
+        "err_module_not_found",
+        "err",
+        "module",
+        "not",
+        "found",
+    ]
+
+
+def test_bm25_ranks_rare_terms_and_forgets_removed_keys():
+    index = BM25Index()
+    index.add("a", "the build failed with ERR_MODULE_NOT_FOUND")
+    index.add("b", "the build passed")
+    index.add("c", "the tests passed")
+
+    assert [key for key, _ in index.search("ERR_MODULE_NOT_FOUND", 3)] == ["a"]
+    assert [key for key, _ in index.search("build passed", 3)][0] == "b"
+    index.remove("a")
+    assert index.search("ERR_MODULE_NOT_FOUND", 3) == []
+    assert len(index) == 2 and "a" not in index
+
+
+def test_lexical_fusion_surfaces_exact_identifiers(tmp_path):
+    vectors = {
+        "prefers dark mode": unit(1, 0, 0),
+        "crashed with ERR_MODULE_NOT_FOUND": unit(0, 1, 0),
+        "likes terminal themes": unit(0.9, 0.1, 0),
+        "ERR_MODULE_NOT_FOUND": unit(1, 0, 0.2),
+    }
+    memories = list(vectors)[:3]
+
+    def top(weight):
+        store = open_store(tmp_path / f"m{weight}.sqlite3", vectors,
+                           lexical_weight=weight)
+        for i, text in enumerate(memories):
+            store.put(NAMESPACE, f"k{i}", {"memory": text})
+        hits = store.search(NAMESPACE, query="ERR_MODULE_NOT_FOUND", limit=1)
+        store.close()
+        return hits[0].value["memory"]
+
+    # The query's vector sits near the dark-mode memory; only BM25 knows better
+    assert top(0.0) == "prefers dark mode"
+    assert top(0.5) == "crashed with ERR_MODULE_NOT_FOUND"
+
+
+def test_mmr_prefers_diverse_memories():
+    candidates = [
+        item("a", "uses pytest", 0.95),
+        item("b", "uses pytest for tests", 0.94),
+        item("c", "deploys with docker", 0.80),
+    ]
+    vectors = {"a": unit(1, 0, 0), "b": unit(1, 0.05, 0), "c": unit(0, 1, 0)}
+
+    chosen = mmr_select(candidates, vectors, limit=2, token_budget=None)
+    assert [m.key for m in chosen] == ["a", "c"]
+    # Relevance alone when diversity has no weight
+    chosen = mmr_select(candidates, vectors, 2, token_budget=None, mmr_lambda=1.0)
+    assert [m.key for m in chosen] == ["a", "b"]
+
+
+def test_mmr_skips_memories_over_the_token_budget():
+    candidates = [
+        item("long", "x" * 400, 0.99),  # about 101 tokens
+        item("short", "uses ruff", 0.5),
+        item("other", "uses black", 0.4),
+    ]
+    chosen = mmr_select(candidates, {}, limit=3, token_budget=20)
+    assert [m.key for m in chosen] == ["short", "other"]
+    assert mmr_select(candidates, {}, limit=3, token_budget=2) == []
+
+
+def test_only_kept_memories_count_as_accessed(tmp_path):
+    texts = ["uses pytest", "uses pytest a lot", "deploys with docker", "likes vim"]
+    vectors = {
+        texts[0]: unit(1, 0.01, 0),
+        texts[1]: unit(1, 0, 0),
+        texts[2]: unit(0.8, 0.6, 0),
+        texts[3]: unit(0, 0, 1),
+        "testing setup": unit(1, 0.3, 0),
+    }
+    store = open_store(tmp_path / "m.sqlite3", vectors, retention=RetentionPolicy())
+    for i, text in enumerate(texts):
+        store.put(NAMESPACE, f"k{i}", {"memory": text})
+
+    kept = retrieve_memories(store, NAMESPACE, "testing setup", limit=2, candidates=4)
+    hits = dict(store._conn.execute("SELECT key, hits FROM items").fetchall())
+
+    assert [m.key for m in kept] == ["k0", "k2"]
+    assert hits == {"k0": 1, "k1": 0, "k2": 1, "k3": 0}
+    # A plain search still counts everything it returns
+    store.search(NAMESPACE, query="testing setup", limit=4)
+    hits = dict(store._conn.execute("SELECT key, hits FROM items").fetchall())
+    assert hits == {"k0": 2, "k1": 1, "k2": 2, "k3": 1}
+    store.close()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+FileGenerationEngine: jobs start after their dependencies in rank order,
+cycles are broken at the first-ranked job, and failures reach the report,
+the dependents and, for a failing job feed, the caller.
+"""
+
+import threading
+
+import pytest
+
+from blitzcoder.scaffold.engine import FileGenerationEngine, FileJob
+
+
+class Recorder:
+    """generate/write callbacks that log what ran, with what upstream"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.started = []
+        self.upstream = {}
+        self.written = {}
+        self._lock = threading.Lock()
+
+    def generate(self, job):
+        with self._lock:
+            self.started.append(job.path)
+            self.upstream[job.path] = dict(job.upstream)
+        if job.path in self.fail:
+            raise RuntimeError("model unavailable")
+        return f"content of {job.path}"
+
+    def write(self, job, content):
+        with self._lock:
+            self.written[job.path] = content
+
+
+def run(jobs, max_workers=1, **kwargs):
+    recorder = Recorder(**kwargs)
+    engine = FileGenerationEngine(
+        recorder.generate, recorder.write, max_workers=max_workers
+    )
+    return recorder, engine.run(jobs)
+
+
+def test_dependencies_first_then_rank():
+    jobs = [
+        FileJob("app.py", deps=["models.py", "db.py"], rank=0),
+        FileJob("README.md", rank=3),
+        FileJob("db.py", rank=2),
+        FileJob("models.py", deps=["db.py"], rank=1),
+    ]
+    recorder, report = run(jobs)
+
+    assert recorder.started == ["db.py", "models.py", "app.py", "README.md"]
+    assert recorder.upstream["app.py"] == {
+        "models.py": "content of models.py",
+        "db.py": "content of db.py",
+    }
+    assert len(report.results) == 4 and not report.failed
+
+
+def test_unknown_dependencies_are_ignored():
+    recorder, _ = run([FileJob("main.go", deps=["fmt", "main.go"])])
+    assert recorder.started == ["main.go"]
+    assert recorder.upstream["main.go"] == {}
+
+
+def test_cycle_is_broken_at_the_first_ranked_job():
+    jobs = [
+        FileJob("b.py", deps=["a.py"], rank=1),
+        FileJob("a.py", deps=["b.py"], rank=0),
+        FileJob("c.py", deps=["b.py"], rank=2),
+    ]
+    recorder, report = run(jobs, max_workers=4)
+
+    assert recorder.started == ["a.py", "b.py", "c.py"]
+    assert recorder.upstream["a.py"] == {}
+    assert recorder.upstream["b.py"] == {"a.py": "content of a.py"}
+    assert len(report.results) == 3
+
+
+def test_failure_is_reported_and_dependents_still_run():
+    jobs = [FileJob("db.py", rank=0), FileJob("api.py", deps=["db.py"], rank=1)]
+    recorder, report = run(jobs, fail={"db.py"})
+
+    [failed] = report.failed
+    assert failed.path == "db.py" and "model unavailable" in failed.error
+    assert recorder.written["db.py"].startswith("// TODO: Implement db.py")
+    # The dependent goes ahead without the failed file's content
+    assert recorder.upstream["api.py"] == {}
+    assert recorder.written["api.py"] == "content of api.py"
+
+
+def test_write_errors_are_reported():
+    recorder = Recorder()
+
+    def write(job, content):
+        raise OSError("disk full")
+
+    engine = FileGenerationEngine(recorder.generate, write)
+    [result] = engine.run([FileJob("a.py")]).results
+    assert result.error == "write failed: disk full"
+
+
+def test_streamed_jobs_wait_only_on_earlier_ones():
+    def feed():
+        yield FileJob("models.py", rank=1)
+        yield FileJob("api.py", deps=["models.py", "later.py"], rank=2)
+        yield FileJob("later.py", rank=3)
+
+    recorder, report = run(feed(), max_workers=2)
+    assert set(recorder.started) == {"models.py", "api.py", "later.py"}
+    assert recorder.upstream["api.py"] == {"models.py": "content of models.py"}
+    assert report.first_file_s is not None
+
+
+def test_feed_error_is_raised_after_started_jobs_finish():
+    def feed():
+        yield FileJob("a.py")
+        yield FileJob("b.py", deps=["a.py"])
+        raise ValueError("plan too complex")
+
+    recorder = Recorder()
+    engine = FileGenerationEngine(recorder.generate, recorder.write, max_workers=2)
+    with pytest.raises(ValueError, match="plan too complex"):
+        engine.run(feed())
+    assert set(recorder.written) == {"a.py", "b.py"}
+
+
+def test_no_more_than_max_workers_files_at_once():
+    lock = threading.Lock()
+    running, peak = [0], [0]
+    release = threading.Event()
+
+    def generate(job):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            if running[0] == 3:
+                release.set()
+        release.wait(timeout=0.2)  # hold on so the others get a chance to start
+        with lock:
+            running[0] -= 1
+        return job.path
+
+    engine = FileGenerationEngine(generate, lambda job, content: None, max_workers=3)
+    report = engine.run([FileJob(f"f{i}.py", rank=i) for i in range(8)])
+
+    assert len(report.results) == 8
+    assert peak[0] == 3
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+ScaffoldManifest: a rerun reuses the recorded plan and the files whose
+prompt and content are unchanged, and regenerates anything else. A streamed
+plan is recorded as it arrives.
+"""
+
+import json
+import os
+
+from blitzcoder.scaffold.manifest import (
+    COMPLETE,
+    FAILED,
+    MANIFEST_NAME,
+    PENDING,
+    ScaffoldManifest,
+    content_hash,
+)
+
+PLAN = {
+    "architecture_overview": "A small Flask app",
+    "file_analysis": {"app.py": {"purpose": "entry point"}, "db.py": {}},
+}
+
+
+def write_file(root, path, content):
+    with open(os.path.join(root, path), "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+
+
+def finished_run(root):
+    manifest = ScaffoldManifest.load(root)
+    manifest.start("flask", "todo app", PLAN)
+    write_file(root, "app.py", "print('hi')\n")
+    manifest.record("app.py", "prompt-1", "print('hi')\n", COMPLETE, 1.5)
+    return manifest
+
+
+def test_plan_is_reused_for_the_same_request(tmp_path):
+    finished_run(str(tmp_path))
+    manifest = ScaffoldManifest.load(str(tmp_path))
+
+    assert manifest.plan_for("flask", "todo app") == PLAN
+    assert manifest.plan_for("flask", "blog") is None
+    assert manifest.counts() == {COMPLETE: 1, FAILED: 0, PENDING: 1}
+
+
+def test_tampered_plan_is_not_reused(tmp_path):
+    finished_run(str(tmp_path))
+    path = tmp_path / MANIFEST_NAME
+    data = json.loads(path.read_text())
+    data["plan"]["architecture_overview"] = "edited by hand"
+    path.write_text(json.dumps(data))
+
+    assert ScaffoldManifest.load(str(tmp_path)).plan_for("flask", "todo app") is None
+
+
+def test_file_reused_only_for_same_prompt_and_content(tmp_path):
+    root = str(tmp_path)
+    finished_run(root)
+    manifest = ScaffoldManifest.load(root)
+
+    assert manifest.reusable("app.py", "prompt-1") == "print('hi')\n"
+    assert manifest.reusable("app.py", "prompt-2") is None
+    assert manifest.reusable("db.py", "prompt-1") is None
+
+    write_file(root, "app.py", "print('edited')\n")
+    assert manifest.reusable("app.py", "prompt-1") is None
+    os.remove(os.path.join(root, "app.py"))
+    assert manifest.reusable("app.py", "prompt-1") is None
+
+
+def test_failed_files_are_regenerated(tmp_path):
+    root = str(tmp_path)
+    manifest = finished_run(root)
+    write_file(root, "db.py", "// TODO: Implement db.py")
+    manifest.record("db.py", "prompt-db", "// TODO: Implement db.py", FAILED)
+
+    assert ScaffoldManifest.load(root).reusable("db.py", "prompt-db") is None
+
+
+def test_new_plan_forgets_files_no_longer_in_it(tmp_path):
+    root = str(tmp_path)
+    manifest = finished_run(root)
+    manifest.start("flask", "todo app", {"file_analysis": {"app.py": {}}})
+
+    reloaded = ScaffoldManifest.load(root)
+    assert set(reloaded.files) == {"app.py"}
+    assert reloaded.files["app.py"]["output_hash"] == content_hash("print('hi')\n")
+
+
+def test_streamed_plan_is_recorded_as_it_arrives(tmp_path):
+    root = str(tmp_path)
+    manifest = ScaffoldManifest.load(root)
+    plan = {}
+    manifest.start("flask", "todo app", plan, complete=False)
+    plan["architecture_overview"] = "A small Flask app"
+    plan["file_analysis"] = {"app.py": {"purpose": "entry point"}}
+    manifest.extend(plan)
+    manifest.record("app.py", "prompt-1", "print('hi')\n", COMPLETE)
+
+    # A crash here leaves a resumable, if incomplete, plan
+    reloaded = ScaffoldManifest.load(root)
+    assert reloaded.plan_for("flask", "todo app") == plan
+    assert not reloaded.plan_complete
+    assert reloaded.files["app.py"]["status"] == COMPLETE
+
+    plan["file_analysis"]["db.py"] = {}
+    manifest.start("flask", "todo app", plan)
+    reloaded = ScaffoldManifest.load(root)
+    assert reloaded.plan_complete
+    assert reloaded.counts() == {COMPLETE: 1, FAILED: 0, PENDING: 1}
+
+
+def test_unreadable_manifest_starts_fresh(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text("{not json")
+    manifest = ScaffoldManifest.load(str(tmp_path))
+    assert manifest.files == {}
+    assert manifest.plan_for("flask", "todo app") is None
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Startup-time regression test for the BlitzCoder CLI.
+
+`blitzcoder --help` must not import the agent runtime (langgraph, langchain,
+Gemini, e2b, sentence-transformers/torch) and must stay under a fixed budget.
+Each check runs in a fresh interpreter so that nothing is already cached in
+sys.modules.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+
+# Import + argument parsing budget, excluding interpreter startup.
+IMPORT_TIME_BUDGET = 0.3
+
+HEAVY_MODULES = (
+    "langgraph",
+    "langchain",
+    "langchain_core",
+    "langchain_google_genai",
+    "langchain_huggingface",
+    "sentence_transformers",
+    "torch",
+    "e2b_code_interpreter",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from blitzcoder.cli import cli
+try:
+    cli(sys.argv[1:], prog_name="blitzcoder")
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - start
+heavy = sorted({name.split(".")[0] for name in sys.modules} & set(%r))
+sys.stderr.write(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(*args):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+def check_help(*args):
+    report = measure(*args, "--help")
+    assert not report["heavy"], f"--help imported heavy modules: {report['heavy']}"
+    assert report["elapsed"] < IMPORT_TIME_BUDGET, (
+        f"blitzcoder {' '.join(args)} --help took {report['elapsed']:.3f}s "
+        f"(budget {IMPORT_TIME_BUDGET}s)"
+    )
+    return report
+
+
+def test_root_help_startup_time():
+    check_help()
+
+
+def test_search_memories_help_startup_time():
+    check_help("search-memories-cli")
+
+
+if __name__ == "__main__":
+    for args in ((), ("search-memories-cli",), ("chat",)):
+        report = check_help(*args)
+        print(f"✅ blitzcoder {' '.join(args + ('--help',))}: {report['elapsed'] * 1000:.1f} ms")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Resumed streams: _Stitcher drops whatever the continuation repeats from
+before the cut, and ResumableStreamMixin resumes plain replies but restarts
+JSON-mode ones, for stream() and for invoke() with a streaming handler alike.
+"""
+
+import asyncio
+from typing import ClassVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.fake_chat_models import (
+    GenericFakeChatModel,
+)
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.tracers._streaming import _StreamingCallbackHandler
+
+import blitzcoder.llm.streaming as streaming
+from blitzcoder.llm.streaming import (
+    OVERLAP_WINDOW,
+    STREAM_RESTART,
+    ResumableStreamMixin,
+    _Stitcher,
+)
+
+PREFIX = "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+REST = "\n\ndef mul(a, b):\n    return a * b\n" + "# padding\n" * 30
+
+
+def chunk(text):
+    return ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+def stitch(prefix, continuation, size=7):
+    stitcher = _Stitcher(prefix)
+    out = []
+    for i in range(0, len(continuation), size):
+        merged = stitcher.feed(chunk(continuation[i : i + size]))
+        if merged is not None:
+            out.append(merged.message.content)
+    merged = stitcher.flush()
+    if merged is not None:
+        out.append(merged.message.content)
+    return "".join(out)
+
+
+def test_restart_from_the_beginning_is_dropped():
+    assert stitch(PREFIX, PREFIX + REST) == REST
+
+
+def test_repeated_tail_is_dropped():
+    assert stitch(PREFIX, PREFIX[-25:] + REST) == REST
+
+
+def test_continuation_without_overlap_is_kept():
+    assert stitch(PREFIX, REST) == REST
+
+
+def test_pure_replay_yields_nothing():
+    assert stitch(PREFIX, PREFIX[:40]) == ""
+
+
+def test_periodic_text_drops_the_shortest_repeat():
+    row = "    x = compute(x)  # step\n"
+    padding = " " * OVERLAP_WINDOW
+    # Two rows match the old tail, but only one need be a repeat; the other
+    # may be new, so it is kept
+    assert stitch(row * 4, row * 2 + "done\n" + padding) == row + "done\n" + padding
+
+
+def test_chunks_pass_through_once_stitched():
+    stitcher = _Stitcher(PREFIX)
+    assert stitcher.feed(chunk(REST)).message.content == REST
+    assert stitcher.feed(chunk("tail")).message.content == "tail"
+
+
+DOCUMENT = '{"files": [' + ", ".join(f'"src/module_{i}.py"' for i in range(20)) + "]}"
+CUT = 40
+
+
+class CutOnce(GenericFakeChatModel):
+    """Sends DOCUMENT (or, when asked to continue, the rest of it) and drops
+    the connection once, partway through the first reply"""
+
+    calls: int = 0
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        text = DOCUMENT if len(messages) == 1 else DOCUMENT[CUT:]
+        for i, char in enumerate(text):
+            if self.calls == 1 and i == CUT:
+                raise ConnectionError("connection reset")
+            yield chunk(char)
+
+
+class ResumingModel(ResumableStreamMixin, CutOnce):
+    stream_retry_on: ClassVar[tuple] = (ConnectionError,)
+
+
+def collect(model, **kwargs):
+    text, restarts = "", 0
+    for part in model.stream([HumanMessage(content="plan it")], **kwargs):
+        if part.response_metadata.get(STREAM_RESTART):
+            text, restarts = "", restarts + 1
+            continue
+        text += part.content
+    return text, restarts
+
+
+def test_plain_reply_is_resumed(monkeypatch):
+    monkeypatch.setattr(streaming, "BACKOFF_MIN_S", 0.0)
+    model = ResumingModel(messages=iter([]))
+    assert collect(model) == (DOCUMENT, 0)
+    assert model.calls == 2
+
+
+def test_json_reply_is_restarted(monkeypatch):
+    monkeypatch.setattr(streaming, "BACKOFF_MIN_S", 0.0)
+    model = ResumingModel(messages=iter([]))
+    config = {"response_mime_type": "application/json"}
+    assert collect(model, generation_config=config) == (DOCUMENT, 1)
+    assert model.calls == 2
+
+
+class Tokens(BaseCallbackHandler, _StreamingCallbackHandler):
+    """A streaming handler, as astream_events attaches, that keeps the tokens"""
+
+    def __init__(self):
+        self.tokens = []
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+    def tap_output_iter(self, run_id, output):
+        return output
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+
+def test_json_reply_is_restarted_under_invoke(monkeypatch):
+    monkeypatch.setattr(streaming, "BACKOFF_MIN_S", 0.0)
+    config = {"response_mime_type": "application/json"}
+    message = [HumanMessage(content="plan it")]
+
+    model, handler = ResumingModel(messages=iter([])), Tokens()
+    reply = model.invoke(
+        message, config={"callbacks": [handler]}, generation_config=config
+    )
+    assert reply.content == DOCUMENT
+    assert model.calls == 2
+    # The handler saw the cut-off text, then the whole document again
+    assert "".join(handler.tokens) == DOCUMENT[:CUT] + DOCUMENT
+
+    model = ResumingModel(messages=iter([]))
+    call = model.ainvoke(
+        message, config={"callbacks": [Tokens()]}, generation_config=config
+    )
+    reply = asyncio.run(call)
+    assert reply.content == DOCUMENT
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Structured output: replies are validated against the pydantic model, fixed
+by targeted repair prompts, and the model's schema is converted to the
+subset Gemini's response_schema accepts.
+"""
+
+from typing import List, Optional
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel, Field
+
+from blitzcoder.llm import structured
+from blitzcoder.llm.structured import (
+    StructuredOutputError,
+    invoke_structured,
+    repair_structured,
+    response_schema,
+    structured_totals,
+)
+
+
+class Item(BaseModel):
+    name: str
+    size: int = Field(ge=0, description="Bytes")
+
+
+class Listing(BaseModel):
+    root: str
+    items: List[Item] = Field(min_length=1)
+    note: Optional[str] = None
+
+
+VALID = '{"root": "app", "items": [{"name": "main.py", "size": 10}]}'
+INVALID = '{"root": "app", "items": [{"name": "main.py", "size": -1}]}'
+
+
+class Replies:
+    """A chat model stand-in answering with `replies` in turn"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append((messages, kwargs))
+        return AIMessage(content=self.replies.pop(0))
+
+
+@pytest.fixture(autouse=True)
+def fresh_totals(monkeypatch):
+    monkeypatch.setattr(
+        structured, "_totals", {"calls": 0, "repairs": 0, "failures": 0}
+    )
+
+
+def test_fenced_reply_is_unwrapped():
+    llm = Replies("```json\n" + VALID + "\n```")
+    listing = invoke_structured(llm, [HumanMessage(content="list")], Listing)
+
+    assert listing.items[0].name == "main.py"
+    assert llm.calls[0][1]["generation_config"]["response_mime_type"] == (
+        "application/json"
+    )
+
+
+def test_invalid_reply_is_repaired_once():
+    llm = Replies(VALID)
+    messages = [HumanMessage(content="list")]
+    listing = repair_structured(llm, messages, INVALID, Listing)
+
+    assert listing.items[0].size == 10
+    [(repair, _)] = llm.calls
+    # The bad reply goes back with the error that needs fixing
+    assert repair[1].content == INVALID
+    assert "items.0.size" in repair[2].content
+    totals = structured_totals()
+    assert (totals["calls"], totals["repairs"], totals["failures"]) == (1, 1, 0)
+    assert totals["repair_rate"] == 1.0
+
+
+def test_error_after_all_repairs_fail():
+    llm = Replies(INVALID, "not json")
+    with pytest.raises(StructuredOutputError, match="after 2 repairs"):
+        repair_structured(
+            llm, [HumanMessage(content="list")], INVALID, Listing, repair_attempts=2
+        )
+
+    assert len(llm.calls) == 2
+    totals = structured_totals()
+    assert (totals["calls"], totals["repairs"], totals["failures"]) == (1, 2, 1)
+
+
+def test_schema_conversion():
+    schema = response_schema(Listing)
+
+    assert schema["type"] == "OBJECT"
+    assert schema["property_ordering"] == ["root", "items", "note"]
+    assert schema["required"] == ["root", "items"]
+    # Optional[str] is anyOf [string, null]: a nullable string
+    assert schema["properties"]["note"] == {"type": "STRING", "nullable": True}
+    items = schema["properties"]["items"]
+    assert items["type"] == "ARRAY" and items["min_items"] == 1
+    # $refs are inlined, with keywords renamed or dropped
+    item = items["items"]
+    assert item["property_ordering"] == ["name", "size"]
+    assert item["properties"]["size"] == {
+        "type": "INTEGER",
+        "description": "Bytes",
+        "minimum": 0,
+    }
+    assert "title" not in item and "$defs" not in schema
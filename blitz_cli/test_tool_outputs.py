@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tool output capping: oversized results are cut to a head, a tail and a
+handle, read_tool_output pages through the rest, and the blob store prunes
+its oldest payloads.
+"""
+
+import os
+import re
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+import blitzcoder.cli.CLI_coder as cli
+from blitzcoder.memory.tool_outputs import CappedToolNode, ToolOutputStore
+
+LOG = "".join(f"line {i:05d}: ok\n" for i in range(2000))
+
+
+@tool
+def build_log() -> str:
+    """The full build log"""
+    return LOG
+
+
+@tool
+def status() -> str:
+    """A short status line"""
+    return "clean"
+
+
+def run_tools(node, *calls):
+    builder = StateGraph(MessagesState)
+    builder.add_node("tools", node)
+    builder.add_edge(START, "tools")
+    builder.add_edge("tools", END)
+    tool_calls = [
+        {"name": name, "args": args, "id": f"call{i}"}
+        for i, (name, args) in enumerate(calls)
+    ]
+    request = AIMessage(content="", tool_calls=tool_calls)
+    return builder.compile().invoke({"messages": [request]})["messages"][1:]
+
+
+def test_oversized_output_is_capped_to_a_handle(tmp_path):
+    store = ToolOutputStore(str(tmp_path), max_chars=1000)
+    capped, short = run_tools(
+        CappedToolNode([build_log, status], output_store=store),
+        ("build_log", {}),
+        ("status", {}),
+    )
+
+    assert short.content == "clean"
+    assert len(capped.content) < 1500
+    assert capped.content.startswith("[Output of build_log truncated: ")
+    assert LOG[:600] in capped.content and LOG[-250:] in capped.content
+    handle = re.search(r'handle "([0-9a-f]{16})"', capped.content).group(1)
+    assert store.read(handle, 0, len(LOG)).endswith(LOG[:1000])
+
+
+def test_read_tool_output_pages_through_the_payload(tmp_path, monkeypatch):
+    store = ToolOutputStore(str(tmp_path), max_chars=1000)
+    monkeypatch.setattr(cli, "get_tool_output_store", lambda: store)
+    handle = store.put(LOG)
+
+    page = cli.read_tool_output.invoke(
+        {"handle": handle, "offset": 600, "length": 500}
+    )
+    header, text = page.split("\n", 1)
+    assert header == (
+        f"[{handle}: chars 600-1,100 of {len(LOG):,}] (continue with offset=1100)"
+    )
+    assert text == LOG[600:1100]
+    # Never more than max_chars at a time
+    assert len(store.read(handle, 0, 10**6).split("\n", 1)[1]) == 1000
+    assert store.read("not-a-handle").startswith("Error: no saved tool output")
+
+
+def test_uncapped_tools_pass_through(tmp_path, monkeypatch):
+    store = ToolOutputStore(str(tmp_path), max_chars=1000)
+    monkeypatch.setattr(cli, "get_tool_output_store", lambda: store)
+    handle = store.put(LOG)
+    node = CappedToolNode(
+        [cli.read_tool_output], output_store=store, uncapped={"read_tool_output"}
+    )
+    # Longer than the cap: the page header comes on top of max_chars
+    [page] = run_tools(node, ("read_tool_output", {"handle": handle}))
+    assert not page.content.startswith("[Output of")
+    assert page.content.endswith(LOG[:1000])
+
+
+def test_store_prunes_oldest_payloads_over_its_size(tmp_path):
+    store = ToolOutputStore(str(tmp_path), max_chars=100, max_bytes=2500)
+    handles = []
+    for i in range(3):
+        handles.append(store.put(f"{i}" * 1000))
+        path = os.path.join(str(tmp_path), f"{handles[-1]}.txt")
+        os.utime(path, (i, i))  # distinct ages, oldest first
+    store.put("3" * 1000)
+
+    assert not os.path.exists(os.path.join(str(tmp_path), f"{handles[0]}.txt"))
+    assert os.path.exists(os.path.join(str(tmp_path), f"{handles[2]}.txt"))
+    assert store.read(handles[0]).startswith("Error: no saved tool output")
+
+
+def test_identical_payloads_share_a_handle(tmp_path):
+    store = ToolOutputStore(str(tmp_path))
+    assert store.put(LOG) == store.put(LOG)
+    assert len(os.listdir(str(tmp_path))) == 1
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+BackgroundWriteStore: reads wait for queued puts, flush() hands the queue
+to the wrapped store at once and in batches, and puts after close() are
+written in place.
+"""
+
+import time
+
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from blitzcoder.memory.writer import BackgroundWriteStore
+
+NAMESPACE = ("user", "memories")
+
+
+class CountingStore(InMemoryStore):
+    """InMemoryStore that records the size of each batch of puts"""
+
+    def __init__(self):
+        super().__init__()
+        self.put_batches = []
+
+    def batch(self, ops):
+        ops = list(ops)
+        puts = sum(isinstance(op, PutOp) for op in ops)
+        if puts:
+            self.put_batches.append(puts)
+        return super().batch(ops)
+
+
+def test_reads_see_queued_puts_without_waiting_out_the_interval():
+    inner = CountingStore()
+    store = BackgroundWriteStore(inner, flush_interval=60)
+    start = time.monotonic()
+    store.put(NAMESPACE, "a", {"memory": "uses tabs"})
+
+    assert store.get(NAMESPACE, "a").value == {"memory": "uses tabs"}
+    assert [item.key for item in store.search(NAMESPACE)] == ["a"]
+    assert time.monotonic() - start < 5
+    store.close()
+
+
+def test_flush_drains_the_queue_in_batches():
+    inner = CountingStore()
+    store = BackgroundWriteStore(inner, max_batch=2, flush_interval=60)
+    for i in range(5):
+        store.put(NAMESPACE, f"k{i}", {"memory": f"fact {i}"})
+
+    assert store.flush(timeout=5)
+    assert inner.put_batches == [2, 2, 1]
+    stats = store.stats()
+    assert (stats["queued"], stats["written"], stats["batches"]) == (0, 5, 3)
+    assert store.flush(timeout=0)  # nothing queued: returns at once
+    store.close()
+
+
+def test_close_writes_queued_puts_and_later_ones_in_place():
+    inner = CountingStore()
+    store = BackgroundWriteStore(inner, flush_interval=60)
+    store.put(NAMESPACE, "queued", {"memory": "before close"})
+    store.close()
+
+    assert inner.get(NAMESPACE, "queued") is not None
+    assert not store._thread.is_alive()
+    store.put(NAMESPACE, "late", {"memory": "after close"})
+    assert inner.get(NAMESPACE, "late").value == {"memory": "after close"}
+    assert store.stats()["written"] == 1  # the late put bypassed the queue
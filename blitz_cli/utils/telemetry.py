@@ -0,0 +1,28 @@
+"""
+Source-tree access to BlitzCoder's turn telemetry.
+
+The implementation lives in the installable package (blitzcoder.telemetry),
+since utils/ is not shipped with it.
+"""
+
+from blitzcoder.telemetry import (
+    SPAN_KINDS,
+    Span,
+    TelemetryCallbackHandler,
+    Tracer,
+    get_tracer,
+    set_tracer,
+    span,
+    summarize_spans,
+)
+
+__all__ = [
+    "SPAN_KINDS",
+    "Span",
+    "TelemetryCallbackHandler",
+    "Tracer",
+    "get_tracer",
+    "set_tracer",
+    "span",
+    "summarize_spans",
+]